@@ -1,11 +1,6 @@
-from django.db.models.signals import post_save, pre_delete
+from django.db.models.signals import post_delete
 from django.dispatch import receiver
 
-from forum import jobs
-from forum.jobs.populate_meilisearch import (
-    add_meilisearch_document,
-    delete_meilisearch_document,
-)
 from forum.models import Question, QuestionManager
 
 
@@ -28,11 +23,6 @@ class Article(Question):
         super(Article, self).save(*args, **kwargs)
 
 
-@receiver(post_save, sender=Article)
-def create_meilisearch_doc(sender, instance, created, **kwargs):
-    jobs.start_job(add_meilisearch_document, instance.id)
-
-
-@receiver(pre_delete, sender=Article)
+@receiver(post_delete, sender=Article)
 def delete_meilisearch_doc(sender, instance, **kwargs):
-    jobs.start_job(delete_meilisearch_document, instance.id)
+    Question.sync_search_index([instance.id])
@@ -13,7 +13,6 @@ from common.test_utils import assert_url_in_chain
 from common.utils import TabEnum
 from forum import models, jobs
 from forum.integrations import slack_api
-from forum.jobs import add_meilisearch_document
 from forum.models import PostInvitation
 from forum.views import utils, notifications
 from forum.views.q_and_a_crud.view_thread import view_thread_background_tasks
@@ -158,7 +157,7 @@ class TestArticleDetailView(ArticlesApiTestCase):
                     mock.ANY,
                     self.article.author.email,
                 ),
-                mock.call(review_bagdes_event, TRIGGER_EVENT_TYPES["Create comment"]),
+                mock.call(review_bagdes_event, TRIGGER_EVENT_TYPES["Create comment"], [self.users[0].id]),
             ],
             any_order=True,
         )
@@ -191,7 +190,7 @@ class TestArticleDetailView(ArticlesApiTestCase):
                     mock.ANY,
                     self.article.author.email,
                 ),
-                mock.call(review_bagdes_event, TRIGGER_EVENT_TYPES["Create comment"]),
+                mock.call(review_bagdes_event, TRIGGER_EVENT_TYPES["Create comment"], [self.users[0].id]),
                 mock.call(
                     jobs.notify_user_email,
                     self.users[1],
@@ -201,11 +200,10 @@ class TestArticleDetailView(ArticlesApiTestCase):
                     False,
                 ),
                 mock.call(view_thread_background_tasks, self.users[0], self.article),
-                mock.call(add_meilisearch_document, self.article.id),
             ],
             any_order=True,
         )
-        self.assertEqual(5, start_job.call_count)
+        self.assertEqual(4, start_job.call_count)
         self.article.refresh_from_db()
         self.assertEqual(comment.created_at, self.article.last_activity)
 
@@ -237,13 +235,12 @@ class TestArticleDetailView(ArticlesApiTestCase):
                     mock.ANY,
                     self.article.author.email,
                 ),
-                mock.call(review_bagdes_event, TRIGGER_EVENT_TYPES["Create comment"]),
+                mock.call(review_bagdes_event, TRIGGER_EVENT_TYPES["Create comment"], [self.users[0].id]),
                 mock.call(view_thread_background_tasks, self.users[0], self.article),
-                mock.call(add_meilisearch_document, self.article.id),
             ],
             any_order=True,
         )
-        self.assertEqual(4, start_job.call_count)
+        self.assertEqual(3, start_job.call_count)
 
     @override_settings(MEILISEARCH_ENABLED=False)
     @mock.patch("forum.jobs.start_job")
@@ -273,13 +270,12 @@ class TestArticleDetailView(ArticlesApiTestCase):
                     mock.ANY,
                     self.article.author.email,
                 ),
-                mock.call(review_bagdes_event, TRIGGER_EVENT_TYPES["Create comment"]),
+                mock.call(review_bagdes_event, TRIGGER_EVENT_TYPES["Create comment"], [self.users[0].id]),
                 mock.call(view_thread_background_tasks, self.users[0], self.article),
-                mock.call(add_meilisearch_document, self.article.id),
             ],
             any_order=True,
         )
-        self.assertEqual(4, start_job.call_count)
+        self.assertEqual(3, start_job.call_count)
 
     def test_articles_detail_view_create_comment__bad_question(self):
         # arrange
@@ -9,7 +9,6 @@ from articles.tests.base import ArticlesApiTestCase
 from badges.jobs import review_bagdes_event
 from common.test_utils import assert_message_in_response, assert_url_in_chain
 from forum import models, jobs
-from forum.jobs import add_meilisearch_document
 from forum.views import utils
 from forum.views.q_and_a_crud.view_thread import view_thread_background_tasks
 from userauth.models import ForumUser
@@ -73,11 +72,16 @@ class TestEditArticleView(ArticlesApiTestCase):
         self.assertEqual(set(new_tags), set(self.article.tag_words()))
         assert_message_in_response(res, "Article updated successfully")
         assert_url_in_chain(res, reverse("articles:detail", args=[self.article.pk]))
-        start_job.assert_has_calls(
-            [
-                mock.call(jobs.update_user_tag_stats, self.article.id, self.user1.id),
-            ]
-        )  # No notification should be sent if author edited.
+        self.assertEqual(
+            set(new_tags),
+            set(
+                models.UserTagStats.objects.filter(user=self.user1, questions_by_user=1).values_list(
+                    "tag__tag_word", flat=True
+                )
+            ),
+        )
+        # No notification should be sent if author edited.
+        self.assertNotIn(jobs.notify_user_email, [c.args[0] for c in start_job.call_args_list])
 
     def test_edit_article_post__no_changes(self):
         # arrange
@@ -118,8 +122,6 @@ class TestEditArticleView(ArticlesApiTestCase):
         self.assertEqual(2, admin_user.reputation_score)
         start_job.assert_has_calls(
             [
-                mock.call(jobs.update_user_tag_stats, self.article.id, self.article.author_id),
-                mock.call(add_meilisearch_document, self.article.id),
                 mock.call(
                     jobs.notify_user_email,
                     self.article.author,
@@ -128,7 +130,7 @@ class TestEditArticleView(ArticlesApiTestCase):
                     mock.ANY,
                     False,
                 ),
-                mock.call(review_bagdes_event, mock.ANY),
+                mock.call(review_bagdes_event, mock.ANY, mock.ANY),
                 mock.call(view_thread_background_tasks, admin_user, self.article),
             ]
         )
@@ -1,5 +1,4 @@
 from django.contrib import admin
-from django.db.models import Count
 from rangefilter.filters import DateRangeFilter
 
 from badges.models import Badge
@@ -33,7 +32,8 @@ class BadgeAdmin(admin.ModelAdmin):
         "section",
         "type",
         "trigger",
-        "users_earned",
+        "holders_count",
+        "active_holders_count",
         "only_once",
         "active",
         "created_at",
@@ -46,9 +46,15 @@ class BadgeAdmin(admin.ModelAdmin):
         "trigger",
         "only_once",
         "active",
+        "holders_count",
+        "active_holders_count",
+        "created_at",
+    )
+    readonly_fields = (
+        "holders_count",
+        "active_holders_count",
         "created_at",
     )
-    readonly_fields = ("created_at",)
     list_filter = (
         "section",
         "type",
@@ -58,14 +64,3 @@ class BadgeAdmin(admin.ModelAdmin):
         ("created_at", DateRangeFilter),
     )
     inlines = (ActivityInline,)
-
-    def get_queryset(self, request):
-        qs = super(BadgeAdmin, self).get_queryset(request)
-        qs = qs.annotate(
-            activity_count=Count("voteactivity"),
-        )
-        return qs
-
-    @admin.display(ordering="activity_count")
-    def users_earned(self, o: Badge) -> int:
-        return o.activity_count  # type: ignore
@@ -0,0 +1,63 @@
+from typing import Dict, Iterable, List
+
+from django.core.cache import cache
+
+from badges.models import BadgeProgress
+
+RECENT_AWARDS_CACHE_KEY = "badges:recent-awards"
+RECENT_AWARDS_COUNT = 20
+CACHE_TIMEOUT = 60 * 60
+
+
+def _user_earned_badges_cache_key(user_id: int) -> str:
+    return f"badges:user-earned:{user_id}"
+
+
+def get_recent_awards() -> List[Dict]:
+    """Most recent badge awards, as dictionaries with the badge and the user (target) awarded.
+    The list is cached until the badge engine awards badges.
+    """
+    recent = cache.get(RECENT_AWARDS_CACHE_KEY)
+    if recent is not None:
+        return recent
+    progress_qs = (
+        BadgeProgress.objects.filter(count__gt=0, awarded_at__isnull=False)
+        .select_related("badge", "user")
+        .order_by("-awarded_at")[:RECENT_AWARDS_COUNT]
+    )
+    recent = [
+        {
+            "badge": {
+                "pk": p.badge.pk,
+                "name": p.badge.name,
+                "type": p.badge.type,
+                "description": p.badge.description,
+            },
+            "target": {
+                "username": p.user.username,
+                "display_name": p.user.display_name(),
+            },
+            "created_at": p.awarded_at,
+        }
+        for p in progress_qs
+    ]
+    cache.set(RECENT_AWARDS_CACHE_KEY, recent, CACHE_TIMEOUT)
+    return recent
+
+
+def get_user_earned_badges(user_id: int) -> Dict[int, int]:
+    """Badges a user earned, as number of times earned by badge_id.
+    Cached until the badge engine changes the user badges.
+    """
+    key = _user_earned_badges_cache_key(user_id)
+    earned = cache.get(key)
+    if earned is not None:
+        return earned
+    earned = dict(BadgeProgress.objects.filter(user_id=user_id, count__gt=0).values_list("badge_id", "count"))
+    cache.set(key, earned, CACHE_TIMEOUT)
+    return earned
+
+
+def invalidate_awards_cache(user_ids: Iterable[int]) -> None:
+    """Clear cached awards after the badges of users changed"""
+    cache.delete_many([RECENT_AWARDS_CACHE_KEY] + [_user_earned_badges_cache_key(user_id) for user_id in user_ids])
@@ -1,14 +1,114 @@
-from typing import Callable
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, Optional
 
 from django.db.models import F, Count
 from scheduler import job
 
 from forum.models import VoteActivity
-from userauth.models import ForumUser
+from userauth.models import ForumUser, ForumUserAdditionalData
 from .apps import logger
-from .logic.utils import BadgeType
-from .models import Badge
-from .populate_db import BADGE_LOGIC
+from .awards import invalidate_awards_cache
+from .logic.utils import BadgeType, BadgeCalculation
+from .models import Badge, BadgeProgress
+from .populate_db import BADGE_LOGIC, BADGE_ALL_USERS_LOGIC
+
+
+BADGE_TYPE_COUNTER_FIELD = {
+    BadgeType.GOLD: "gold_badges",
+    BadgeType.SILVER: "silver_badges",
+    BadgeType.BRONZE: "bronze_badges",
+}
+
+
+def _current_badge_counts(badge: Badge, user_ids: Iterable[int] = None) -> Dict[int, int]:
+    """Number of times each user earned a badge, users without the badge are missing"""
+    qs = VoteActivity.objects.filter(badge=badge)
+    if user_ids is not None:
+        qs = qs.filter(target_id__in=user_ids)
+    return dict(qs.order_by().values("target_id").annotate(count=Count("id")).values_list("target_id", "count"))
+
+
+def _update_badge_counters(badge: Badge, changes: Dict[int, int]) -> None:
+    """Apply changes in number of badges users have on their counters for the badge type, one update per change"""
+    field = BADGE_TYPE_COUNTER_FIELD.get(badge.type)
+    if field is None:
+        logger.error(f"No matching counter field for badge {badge.name} of type {badge.type}")
+        return
+    users_per_change = defaultdict(list)
+    for user_id, change in changes.items():
+        users_per_change[change].append(user_id)
+    for change, user_ids in users_per_change.items():
+        ForumUser.objects.filter(id__in=user_ids).update(**{field: F(field) + change})
+        ForumUserAdditionalData.objects.filter(user_id__in=user_ids).update(**{field: F(field) + change})
+
+
+def _apply_badge_calculations(
+    badge: Badge, calculations: Dict[int, BadgeCalculation], current: Dict[int, int], all_users: bool = False
+) -> int:
+    """
+    Create and remove badge activities so users have the number of badges they deserve,
+    and write the users progress towards the badge.
+    Users who have a badge that can be earned only once keep it.
+
+    Args:
+        badge: Badge to apply
+        calculations: Badge calculation for each user evaluated, users missing deserve none.
+        current: Number of badges each user currently has, users missing have none.
+        all_users: Were all users evaluated.
+
+    Returns:
+        Number of users badge earning activity created for.
+    """
+    to_create = dict()
+    to_remove = dict()
+    progress = dict()
+    for user_id in calculations.keys() | current.keys():
+        badge_count = current.get(user_id, 0)
+        if badge.only_once and badge_count > 0:
+            progress[user_id] = (badge_count, 0)
+            continue
+        deserved, needed_for_next = calculations.get(user_id, (0, 0))
+        expected_count = min(deserved, 1) if badge.only_once else deserved
+        progress[user_id] = (expected_count, needed_for_next)
+        if expected_count > badge_count:
+            to_create[user_id] = expected_count - badge_count
+        elif expected_count < badge_count:
+            logger.info(
+                f'User {user_id} has {badge_count} "{badge.name}" badges where they should have {expected_count}'
+                " - removing last"
+            )
+            to_remove[user_id] = badge_count - expected_count
+    if to_remove:
+        remove_ids = list()
+        remaining = dict(to_remove)
+        activities = (
+            VoteActivity.objects.filter(badge=badge, target_id__in=to_remove)
+            .order_by("target_id", "-created_at")
+            .values_list("id", "target_id")
+        )
+        for activity_id, user_id in activities:
+            if remaining[user_id] > 0:
+                remove_ids.append(activity_id)
+                remaining[user_id] -= 1
+        VoteActivity.objects.filter(id__in=remove_ids).delete()
+    VoteActivity.objects.bulk_create(
+        [
+            VoteActivity(target_id=user_id, badge=badge, type=VoteActivity.ActivityType.BADGE)
+            for user_id, count in to_create.items()
+            for _ in range(count)
+        ],
+        batch_size=500,
+    )
+    counter_changes = dict(to_create)
+    counter_changes.update({user_id: -count for user_id, count in to_remove.items()})
+    _update_badge_counters(badge, counter_changes)
+    BadgeProgress.update_badge(badge, progress, all_users, awarded=to_create.keys())
+    if to_create or to_remove or all_users:
+        # The periodic review of all users also recounts holders who were deactivated
+        Badge.refresh_holders_count([badge.id])
+    if to_create or to_remove:
+        invalidate_awards_cache(to_create.keys() | to_remove.keys())
+    return len(to_create)
 
 
 def _check_badge_for_user(badge: Badge, user: ForumUser, method: Callable[[ForumUser], int]) -> bool:
@@ -26,38 +126,23 @@ def _check_badge_for_user(badge: Badge, user: ForumUser, method: Callable[[Forum
     """
     if method is None:
         return False
-    badge_count = VoteActivity.objects.filter(badge=badge, target=user).count()
-    if badge.only_once and badge_count > 0:
+    current = _current_badge_counts(badge, [user.id])
+    if badge.only_once and current:
         return False
-    expected_count = method(user)[0]
-    while expected_count < badge_count:  # User has more badges than expected
-        logger.info(
-            f'User has {badge_count} "{badge.name}" badges where they should have {expected_count} - removing last'
-        )
-        last = VoteActivity.objects.filter(badge=badge, target=user).order_by("-created_at").first()
-        last.delete()
-        badge_count = VoteActivity.objects.filter(badge=badge, target=user).count()
-    if expected_count > badge_count:
-        VoteActivity.objects.create(target=user, badge=badge, type=VoteActivity.ActivityType.BADGE)
-        if badge.type == BadgeType.GOLD:
-            user.gold_badges += 1
-        elif badge.type == BadgeType.SILVER:
-            user.silver_badges += 1
-        elif badge.type == BadgeType.BRONZE:
-            user.bronze_badges += 1
-        else:
-            logger.error(f"No matching counter field for badge {badge.name} of type {badge.type}")
-        user.save()
-        return True
-    return False
+    created = _apply_badge_calculations(badge, {user.id: method(user)}, current) > 0
+    user.refresh_from_db(fields=list(BADGE_TYPE_COUNTER_FIELD.values()))
+    return created
 
 
-def check_users(badge: Badge) -> int:
+def check_users(badge: Badge, user_ids: Iterable[int] = None) -> int:
     """
     Create badge activity for all users entitled.
+    Badges with logic for all users are calculated using a single query,
+    otherwise the badge logic runs for every user.
 
     Args:
         badge: Badge to check.
+        user_ids: Only check these users, using the badge logic for each user. Checks all users if None.
 
     Returns:
         Number of users badge earning activity created for.
@@ -69,11 +154,22 @@ def check_users(badge: Badge) -> int:
     if method is None:
         logger.error(f"Couldn't find logic for badge '{badge.name}'")
         return 0
-    res = 0
-    user_qs = ForumUser.objects.all()
-    for u in user_qs:
-        if _check_badge_for_user(badge, u, method):
-            res += 1
+    current = _current_badge_counts(badge, user_ids)
+    all_users_method = BADGE_ALL_USERS_LOGIC.get(badge.name, None)
+    if user_ids is None and all_users_method is not None:
+        calculations = all_users_method()
+    else:
+        if user_ids is None:
+            user_qs = ForumUser.objects.all()
+            if badge.only_once:
+                user_qs = user_qs.exclude(id__in=current.keys())
+        else:
+            user_qs = ForumUser.objects.filter(id__in=user_ids)
+        calculations = {u.id: method(u) for u in user_qs}
+        if user_ids is not None:
+            # Users not found do not exist anymore, their badges are left for the periodic review
+            current = {user_id: count for user_id, count in current.items() if user_id in calculations}
+    res = _apply_badge_calculations(badge, calculations, current, all_users=user_ids is None)
     logger.info(f"{res} users received {badge.name}")
     return res
 
@@ -130,26 +226,100 @@ def review_all_badges() -> None:
 
 
 @job()
-def review_bagdes_event(event: int) -> None:
+def review_bagdes_event(event: int, user_ids: Iterable[Optional[int]] = None) -> None:
+    """
+    Review badges triggered by an event.
+
+    Args:
+        event: Trigger event type, see TRIGGER_EVENT_TYPES.
+        user_ids: Users affected by the event (e.g., voter, author, question owner), only they are checked.
+            All users are checked if None. Other users are reviewed by the periodic `review_all_badges`.
+
+    Returns:
+        None
+    """
+    if user_ids is not None:
+        user_ids = {user_id for user_id in user_ids if user_id is not None}
+        if not user_ids:
+            return
     badge_qs = Badge.objects.filter(trigger=event)
     for badge in badge_qs:
         logger.info(f"Checking users entitled to badge {badge.name}")
-        check_users(badge)
+        check_users(badge, user_ids)
+
+
+def _users_next_badge() -> Dict[int, int]:
+    """The badge each user is closest to earning next, relative to the count it requires, by user_id"""
+    closest = dict()
+    rows = BadgeProgress.objects.filter(progress__gt=0, badge__active=True, badge__required__gt=1).values_list(
+        "user_id", "badge_id", "progress", "badge__required"
+    )
+    for user_id, badge_id, progress, required in rows:
+        if user_id not in closest or progress / required > closest[user_id][0]:
+            closest[user_id] = (progress / required, badge_id)
+    return {user_id: badge_id for user_id, (_, badge_id) in closest.items()}
 
 
 @job()
-def recalculate_user_badges_stats():
-    user_qs = ForumUser.objects.all()
-    for user in user_qs:
-        stats = user.additional_data
-        badges_total_list = list(
-            VoteActivity.objects.filter(target=user, badge__isnull=False)
-            .values(badge_type=F("badge__type"))
-            .annotate(count=Count("badge_type"))
-            .values_list("badge_type", "count")
+def recalculate_user_badges_stats(batch_size: int = 1000) -> int:
+    """
+    Recalculate the badge counters of all users from their badge activities and their next badge
+    from their badges progress, keeping ForumUser and ForumUserAdditionalData consistent.
+
+    Args:
+        batch_size: Number of users to write in a single bulk update.
+
+    Returns:
+        Number of users whose counters or next badge were changed.
+    """
+    fields = list(BADGE_TYPE_COUNTER_FIELD.values())
+    next_badges = _users_next_badge()
+    totals = defaultdict(dict)
+    rows = (
+        VoteActivity.objects.filter(badge__isnull=False)
+        .order_by()
+        .values("target_id", "badge__type")
+        .annotate(count=Count("id"))
+        .values_list("target_id", "badge__type", "count")
+    )
+    for user_id, badge_type, count in rows:
+        if badge_type in BADGE_TYPE_COUNTER_FIELD:
+            totals[user_id][BADGE_TYPE_COUNTER_FIELD[badge_type]] = count
+    changed_users, changed_stats, missing_stats = list(), list(), list()
+    changed = set()
+    user_qs = (
+        ForumUser.objects.select_related("additional_data")
+        .only(
+            "id",
+            "next_badge",
+            *fields,
+            "additional_data__id",
+            "additional_data__next_badge",
+            *[f"additional_data__{field}" for field in fields],
         )
-        badges_total_dict = {i[0]: i[1] for i in badges_total_list}
-        stats.bronze_badges = badges_total_dict.get(BadgeType.BRONZE, 0)
-        stats.silver_badges = badges_total_dict.get(BadgeType.SILVER, 0)
-        stats.gold_badges = badges_total_dict.get(BadgeType.GOLD, 0)
-        stats.save()
+        .order_by("id")
+    )
+    for user in user_qs.iterator(chunk_size=batch_size):
+        expected = {field: totals.get(user.id, {}).get(field, 0) for field in fields}
+        expected["next_badge_id"] = next_badges.get(user.id)
+        stats = getattr(user, "additional_data", None)
+        user_changed = any(getattr(user, field) != value for field, value in expected.items())
+        stats_changed = stats is None or any(getattr(stats, field) != value for field, value in expected.items())
+        for field, value in expected.items():
+            setattr(user, field, value)
+        if user_changed:
+            changed_users.append(user)
+        if stats is None:
+            missing_stats.append(ForumUserAdditionalData(user=user, **expected))
+        elif stats_changed:
+            for field, value in expected.items():
+                setattr(stats, field, value)
+            changed_stats.append(stats)
+        if user_changed or stats_changed:
+            changed.add(user.id)
+            logger.debug(f"Badges stats of user {user.id} changed to {expected}")
+    ForumUser.objects.bulk_update(changed_users, fields + ["next_badge"], batch_size=batch_size)
+    ForumUserAdditionalData.objects.bulk_update(changed_stats, fields + ["next_badge"], batch_size=batch_size)
+    ForumUserAdditionalData.objects.bulk_create(missing_stats, batch_size=batch_size)
+    logger.info(f"Recalculated badges stats, {len(changed)} users changed")
+    return len(changed)
@@ -1,4 +1,7 @@
 from functools import partial
+from typing import Dict
+
+from django.db.models import Count, F, OuterRef, Subquery
 
 from forum import models
 from userauth.models import ForumUser
@@ -29,6 +32,43 @@ def user_answer_not_accepted_higher_score(user: ForumUser) -> BadgeCalculation:
     return count, 0
 
 
+def users_answers_query(min_votes: int, required: int) -> Dict[int, BadgeCalculation]:
+    rows = (
+        models.Answer.objects.filter(author__isnull=False, votes__gte=min_votes)
+        .order_by()
+        .values("author_id")
+        .annotate(count=Count("id"))
+        .values_list("author_id", "count")
+    )
+    return {user_id: divmod(count, required) for user_id, count in rows}
+
+
+def users_accepted_answers_with_no_votes(required: int) -> Dict[int, BadgeCalculation]:
+    rows = (
+        models.Answer.objects.exclude(question__author=F("author"))
+        .filter(author__isnull=False, votes=0, is_accepted=True)
+        .order_by()
+        .values("author_id")
+        .annotate(count=Count("id"))
+        .values_list("author_id", "count")
+    )
+    return {user_id: divmod(count, required) for user_id, count in rows}
+
+
+def users_answer_not_accepted_higher_score() -> Dict[int, BadgeCalculation]:
+    accepted_votes = models.Answer.objects.filter(question=OuterRef("question"), is_accepted=True).values("votes")[:1]
+    rows = (
+        models.Answer.objects.filter(author__isnull=False, is_accepted=False, question__has_accepted_answer=True)
+        .annotate(accepted_votes=Subquery(accepted_votes))
+        .filter(votes__gt=F("accepted_votes") + 5)
+        .order_by()
+        .values("author_id")
+        .annotate(count=Count("id"))
+        .values_list("author_id", "count")
+    )
+    return {user_id: (count, 0) for user_id, count in rows}
+
+
 answer_badges = [
     BadgeData(
         "Teacher",
@@ -39,6 +79,7 @@ answer_badges = [
         TRIGGER_EVENT_TYPES["Upvote"],
         group=0,
         required=1,
+        all_users_logic=partial(users_answers_query, 1, 1),
     ),
     BadgeData(
         "Tenacious",
@@ -49,6 +90,7 @@ answer_badges = [
         TRIGGER_EVENT_TYPES["Accept answer"],
         group=1,
         required=5,
+        all_users_logic=partial(users_accepted_answers_with_no_votes, 5),
     ),
     BadgeData(
         "Unsung Hero",
@@ -59,6 +101,7 @@ answer_badges = [
         TRIGGER_EVENT_TYPES["Accept answer"],
         group=1,
         required=10,
+        all_users_logic=partial(users_accepted_answers_with_no_votes, 10),
     ),
     BadgeData(
         "Populist",
@@ -68,5 +111,6 @@ answer_badges = [
         True,
         TRIGGER_EVENT_TYPES["Upvote"],
         group=3,
+        all_users_logic=users_answer_not_accepted_higher_score,
     ),
 ]
@@ -1,4 +1,8 @@
+from collections import Counter
 from functools import partial
+from typing import Dict
+
+from django.db.models import Count, F
 
 from forum import models
 from forum.models import Question, Answer
@@ -28,6 +32,54 @@ def user_upvoted_competing_answers_count_vs_expected(required: int, user: ForumU
     return divmod(upvoted_count, required)
 
 
+def users_edited_count_vs_expected(required: int) -> Dict[int, BadgeCalculation]:
+    questions_edited = (
+        Question.objects.filter(editor__isnull=False)
+        .order_by()
+        .values("editor_id")
+        .annotate(count=Count("id"))
+        .values_list("editor_id", "count")
+    )
+    answers_edited = (
+        Answer.objects.filter(editor__isnull=False)
+        .order_by()
+        .values("editor_id")
+        .annotate(count=Count("id"))
+        .values_list("editor_id", "count")
+    )
+    totals = Counter()
+    for user_id, count in questions_edited.union(answers_edited, all=True):
+        totals[user_id] += count
+    return {user_id: divmod(total, required) for user_id, total in totals.items()}
+
+
+def users_upvoted_count_vs_expected(required: int) -> Dict[int, BadgeCalculation]:
+    rows = (
+        models.VoteActivity.objects.filter(source__isnull=False, reputation_change__gt=0)
+        .order_by()
+        .values("source_id")
+        .annotate(count=Count("id"))
+        .values_list("source_id", "count")
+    )
+    return {user_id: divmod(count, required) for user_id, count in rows}
+
+
+def users_upvoted_competing_answers_count_vs_expected(required: int) -> Dict[int, BadgeCalculation]:
+    rows = (
+        models.VoteActivity.objects.filter(
+            source__isnull=False,
+            reputation_change__gt=0,
+            question__answer__author=F("source"),
+            question__answer__votes__gt=0,
+        )
+        .order_by()
+        .values("source_id")
+        .annotate(count=Count("id"))
+        .values_list("source_id", "count")
+    )
+    return {user_id: divmod(count, required) for user_id, count in rows}
+
+
 moderation_badges = [
     BadgeData(
         "Editor",
@@ -38,6 +90,7 @@ moderation_badges = [
         TRIGGER_EVENT_TYPES["Update post"],
         group=1,
         required=1,
+        all_users_logic=partial(users_edited_count_vs_expected, 1),
     ),
     BadgeData(
         "Strunk & White",
@@ -48,6 +101,7 @@ moderation_badges = [
         TRIGGER_EVENT_TYPES["Update post"],
         group=1,
         required=20,
+        all_users_logic=partial(users_edited_count_vs_expected, 20),
     ),
     BadgeData(
         "Copy editor",
@@ -58,6 +112,7 @@ moderation_badges = [
         TRIGGER_EVENT_TYPES["Update post"],
         group=1,
         required=100,
+        all_users_logic=partial(users_edited_count_vs_expected, 100),
     ),
     BadgeData(
         "Supporter",
@@ -68,6 +123,7 @@ moderation_badges = [
         TRIGGER_EVENT_TYPES["Upvote"],
         group=2,
         required=1,
+        all_users_logic=partial(users_upvoted_count_vs_expected, 1),
     ),
     BadgeData(
         "Sportsmanship",
@@ -78,5 +134,6 @@ moderation_badges = [
         TRIGGER_EVENT_TYPES["Upvote"],
         group=3,
         required=10,
+        all_users_logic=partial(users_upvoted_competing_answers_count_vs_expected, 10),
     ),
 ]
@@ -1,11 +1,14 @@
+from collections import Counter
 from functools import partial
+from typing import Dict
 
-from django.db.models import Count, F
+from django.db.models import Count, F, Q, Max
 
 from forum.models import QuestionComment
 from userauth.models import ForumUser, UserVisit
 from .utils import (
     user_authored_vs_required,
+    users_authored_vs_required,
     BadgeData,
     TRIGGER_EVENT_TYPES,
     BadgeType,
@@ -13,6 +16,7 @@ from .utils import (
 )
 
 user_commented_10 = partial(user_authored_vs_required, QuestionComment, 10)
+users_commented_10 = partial(users_authored_vs_required, QuestionComment, 10)
 
 
 def user_edited_profile(user: ForumUser) -> BadgeCalculation:
@@ -54,6 +58,61 @@ def user_login_from_multiple_countries(required: int, user: ForumUser) -> BadgeC
     return countries // required, countries % required
 
 
+def users_edited_profile() -> Dict[int, BadgeCalculation]:
+    user_ids = (
+        ForumUser.objects.exclude(Q(about_me__isnull=True) | Q(about_me=""))
+        .exclude(Q(title__isnull=True) | Q(title=""))
+        .values_list("id", flat=True)
+    )
+    return {user_id: (1, 0) for user_id in user_ids}
+
+
+def users_commented_10_with_5_upvotes() -> Dict[int, BadgeCalculation]:
+    rows = (
+        QuestionComment.objects.filter(author__isnull=False, votes__gte=5)
+        .order_by()
+        .values("author_id")
+        .annotate(count=Count("id"))
+        .values_list("author_id", "count")
+    )
+    return {user_id: divmod(count, 10) for user_id, count in rows}
+
+
+def users_visited_30_consecutive_days() -> Dict[int, BadgeCalculation]:
+    rows = (
+        UserVisit.objects.order_by()
+        .values("user_id")
+        .annotate(count=Count("id", filter=Q(consecutive_days__gte=30)), closest=Max(F("consecutive_days") % 30))
+        .values_list("user_id", "count", "closest")
+    )
+    return {user_id: (1 if count else 0, closest or 0) for user_id, count, closest in rows}
+
+
+def users_login_from_multiple_cities() -> Dict[int, BadgeCalculation]:
+    user_ids = (
+        UserVisit.objects.order_by()
+        .values("user_id", "country")
+        .annotate(cities=Count("city", distinct=True))
+        .filter(cities__gt=1)
+        .values_list("user_id", flat=True)
+    )
+    return {user_id: (count, 0) for user_id, count in Counter(user_ids).items()}
+
+
+def users_login_from_multiple_countries(required: int) -> Dict[int, BadgeCalculation]:
+    rows = (
+        UserVisit.objects.order_by()
+        .values("user_id")
+        .annotate(
+            countries=Count("country", distinct=True),
+            unknown_country=Count("id", filter=Q(country__isnull=True)),
+        )
+        .values_list("user_id", "countries", "unknown_country")
+    )
+    # Visits with unknown country count as another country
+    return {user_id: divmod(countries + (unknown > 0), required) for user_id, countries, unknown in rows}
+
+
 participation_badges = [
     BadgeData(
         "Autobiographer",
@@ -63,6 +122,7 @@ participation_badges = [
         True,
         TRIGGER_EVENT_TYPES["Edit profile"],
         group=1,
+        all_users_logic=users_edited_profile,
     ),
     BadgeData(
         "Commenter",
@@ -73,6 +133,7 @@ participation_badges = [
         TRIGGER_EVENT_TYPES["Create comment"],
         group=2,
         required=10,
+        all_users_logic=users_commented_10,
     ),
     BadgeData(
         "Pundit",
@@ -82,6 +143,7 @@ participation_badges = [
         False,
         TRIGGER_EVENT_TYPES["Upvote"],
         group=3,
+        all_users_logic=users_commented_10_with_5_upvotes,
     ),
     BadgeData(
         "Workaholic",
@@ -92,6 +154,7 @@ participation_badges = [
         TRIGGER_EVENT_TYPES["Visit"],
         group=4,
         required=30,
+        all_users_logic=users_visited_30_consecutive_days,
     ),
     BadgeData(
         "Commuter",
@@ -101,6 +164,7 @@ participation_badges = [
         True,
         TRIGGER_EVENT_TYPES["Visit"],
         group=5,
+        all_users_logic=users_login_from_multiple_cities,
     ),
     BadgeData(
         "Traveller",
@@ -111,6 +175,7 @@ participation_badges = [
         TRIGGER_EVENT_TYPES["Visit"],
         group=6,
         required=2,
+        all_users_logic=partial(users_login_from_multiple_countries, 2),
     ),
     BadgeData(
         "Digital Nomad",
@@ -121,5 +186,6 @@ participation_badges = [
         TRIGGER_EVENT_TYPES["Visit"],
         group=6,
         required=5,
+        all_users_logic=partial(users_login_from_multiple_countries, 5),
     ),
 ]
@@ -1,11 +1,14 @@
 from functools import partial
+from typing import Dict
 
-from django.db.models import Count, F
+from django.db.models import Count, F, Q, Max
 
 from forum.models import Question
 from userauth.models import ForumUser
 from .utils import (
     user_authored_vs_required,
+    users_authored_vs_required,
+    users_count_vs_required,
     BadgeData,
     TRIGGER_EVENT_TYPES,
     BadgeType,
@@ -50,6 +53,29 @@ def first_questions_in_site(user: ForumUser) -> BadgeCalculation:
     return 1 if user_authored else 0, 0
 
 
+def users_question_bookmarked(required: int) -> Dict[int, BadgeCalculation]:
+    rows = (
+        Question.objects.order_by().annotate(num_bookmarks=Count("bookmarks")).values_list("author_id", "num_bookmarks")
+    )
+    return users_count_vs_required(rows, required)
+
+
+def users_question_views(required: int) -> Dict[int, BadgeCalculation]:
+    rows = (
+        Question.objects.filter(author__isnull=False)
+        .order_by()
+        .values("author_id")
+        .annotate(count=Count("id", filter=Q(views__gte=required)), closest=Max(F("views") % required))
+        .values_list("author_id", "count", "closest")
+    )
+    return {user_id: (count, closest or 0) for user_id, count, closest in rows}
+
+
+def users_first_questions_in_site() -> Dict[int, BadgeCalculation]:
+    author_ids = Question.objects.order_by("created_at").values_list("author_id", flat=True)[:10]
+    return {user_id: (1, 0) for user_id in author_ids if user_id is not None}
+
+
 question_badges = [
     BadgeData(
         "Starter",
@@ -59,6 +85,7 @@ question_badges = [
         True,
         TRIGGER_EVENT_TYPES["Create post"],
         group=1,
+        all_users_logic=partial(users_authored_vs_required, Question, 1),
     ),
     BadgeData(
         "Pioneer",
@@ -68,6 +95,7 @@ question_badges = [
         True,
         TRIGGER_EVENT_TYPES["Create post"],
         group=20,
+        all_users_logic=users_first_questions_in_site,
     ),
     BadgeData(
         "Curious",
@@ -78,6 +106,7 @@ question_badges = [
         TRIGGER_EVENT_TYPES["Create post"],
         group=1,
         required=10,
+        all_users_logic=partial(users_authored_vs_required, Question, 10),
     ),
     BadgeData(
         "Philosopher",
@@ -88,6 +117,7 @@ question_badges = [
         TRIGGER_EVENT_TYPES["Create post"],
         group=1,
         required=100,
+        all_users_logic=partial(users_authored_vs_required, Question, 100),
     ),
     # Question bookmarks badges
     BadgeData(
@@ -99,6 +129,7 @@ question_badges = [
         TRIGGER_EVENT_TYPES["Bookmark thread"],
         group=2,
         required=3,
+        all_users_logic=partial(users_question_bookmarked, 3),
     ),
     BadgeData(
         "Stellar Question",
@@ -109,6 +140,7 @@ question_badges = [
         TRIGGER_EVENT_TYPES["Bookmark thread"],
         group=2,
         required=10,
+        all_users_logic=partial(users_question_bookmarked, 10),
     ),
     # Question views badges
     BadgeData(
@@ -120,6 +152,7 @@ question_badges = [
         TRIGGER_EVENT_TYPES["View post"],
         group=3,
         required=50,
+        all_users_logic=partial(users_question_views, 50),
     ),
     BadgeData(
         "Notable Question",
@@ -130,6 +163,7 @@ question_badges = [
         TRIGGER_EVENT_TYPES["View post"],
         group=3,
         required=250,
+        all_users_logic=partial(users_question_views, 250),
     ),
     BadgeData(
         "Famous Question",
@@ -140,5 +174,6 @@ question_badges = [
         TRIGGER_EVENT_TYPES["View post"],
         group=3,
         required=1000,
+        all_users_logic=partial(users_question_views, 1000),
     ),
 ]
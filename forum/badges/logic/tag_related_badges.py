@@ -1,9 +1,12 @@
 from functools import partial
+from typing import Dict
 
 from django.db.models import Count
 
 from badges.logic.utils import (
     user_authored_vs_required,
+    users_authored_vs_required,
+    users_count_vs_required,
     BadgeData,
     TRIGGER_EVENT_TYPES,
     BadgeType,
@@ -31,6 +34,13 @@ def tags_created_with_num_questions_vs_required(required: int, user: ForumUser)
     return count, closest
 
 
+def users_tags_created_with_num_questions_vs_required(required: int) -> Dict[int, BadgeCalculation]:
+    rows = (
+        Tag.objects.order_by().annotate(questions_count=Count("question")).values_list("author_id", "questions_count")
+    )
+    return users_count_vs_required(rows, required)
+
+
 tag_badges = [
     BadgeData(
         "Synonymizer",
@@ -40,6 +50,7 @@ tag_badges = [
         True,
         TRIGGER_EVENT_TYPES["Synonym approved"],
         group=1,
+        all_users_logic=partial(users_authored_vs_required, Synonym, 1),
     ),
     BadgeData(
         "Meticulous",
@@ -50,6 +61,7 @@ tag_badges = [
         TRIGGER_EVENT_TYPES["Synonym approved"],
         group=1,
         required=10,
+        all_users_logic=partial(users_authored_vs_required, Synonym, 10),
     ),
     BadgeData(
         "Tag Editor",
@@ -59,6 +71,7 @@ tag_badges = [
         True,
         TRIGGER_EVENT_TYPES["Tag edit"],
         group=1,
+        all_users_logic=partial(users_authored_vs_required, TagEdit, 1),
     ),
     BadgeData(
         "Taxonomist",
@@ -69,5 +82,6 @@ tag_badges = [
         TRIGGER_EVENT_TYPES["Tag created"],
         group=2,
         required=20,
+        all_users_logic=partial(users_tags_created_with_num_questions_vs_required, 20),
     ),
 ]
@@ -1,8 +1,9 @@
 import dataclasses
 from collections import namedtuple
-from typing import Type, Callable
+from typing import Type, Callable, Dict, Iterable, Tuple
 
 from django.db import models as base_models
+from django.db.models import Count
 
 from userauth.models import ForumUser
 
@@ -24,6 +25,9 @@ class BadgeData:
     trigger: int
     group: int = None
     required: int = None
+    # Set based logic calculating the badge for all users in one query, returns {user_id: BadgeCalculation}.
+    # Users missing from the result deserve no badge.
+    all_users_logic: Callable[[], Dict[int, BadgeCalculation]] = None
 
 
 class BadgeType:
@@ -64,3 +68,45 @@ def user_authored_vs_required(model: Type[base_models.Model], required: int, use
     """
     count = model.objects.filter(author=user).count()
     return divmod(count, required)
+
+
+def users_authored_vs_required(model: Type[base_models.Model], required: int) -> Dict[int, BadgeCalculation]:
+    """
+    Set based version of `user_authored_vs_required` for all users.
+
+    Args:
+        model: The model to query
+        required: the number of rows to divide by
+
+    Returns:
+        A dictionary of user_id => (model count // required, model count % required)
+    """
+    rows = (
+        model.objects.filter(author__isnull=False)
+        .order_by()
+        .values("author_id")
+        .annotate(count=Count("id"))
+        .values_list("author_id", "count")
+    )
+    return {user_id: divmod(count, required) for user_id, count in rows}
+
+
+def users_count_vs_required(rows: Iterable[Tuple[int, int]], required: int) -> Dict[int, BadgeCalculation]:
+    """
+    Fold (user_id, count) rows of objects owned by users to badge calculations, where each object
+    with count >= required deserves a badge, and the closest to the next badge is the max count % required.
+
+    Args:
+        rows: pairs of (user_id, count) per object, e.g., (question author, number of bookmarks).
+        required: the count required for a single object to deserve a badge.
+
+    Returns:
+        A dictionary of user_id => (objects with count >= required, max count % required)
+    """
+    res = dict()
+    for user_id, count in rows:
+        if user_id is None:
+            continue
+        deserved, closest = res.get(user_id, (0, 0))
+        res[user_id] = (deserved + (count >= required), max(closest, count % required))
+    return res
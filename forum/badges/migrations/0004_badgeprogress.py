@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_badges_progress(apps, schema_editor):
+    VoteActivity = apps.get_model("forum", "VoteActivity")
+    BadgeProgress = apps.get_model("badges", "BadgeProgress")
+    rows = (
+        VoteActivity.objects.filter(badge__isnull=False)
+        .order_by()
+        .values("target_id", "badge_id")
+        .annotate(count=Count("id"))
+        .values_list("target_id", "badge_id", "count")
+    )
+    BadgeProgress.objects.bulk_create(
+        [BadgeProgress(user_id=user_id, badge_id=badge_id, count=count) for user_id, badge_id, count in rows],
+        batch_size=1000,
+    )
+
+
+def do_nothing(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("badges", "0001_squashed_0003_auto_20211211_1535"),
+        ("forum", "0016_alter_voteactivity_type"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="badge",
+            name="required",
+            field=models.IntegerField(
+                blank=True,
+                default=None,
+                help_text="Count required to earn the badge, used to measure progress towards it",
+                null=True,
+            ),
+        ),
+        migrations.CreateModel(
+            name="BadgeProgress",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("count", models.IntegerField(default=0, help_text="Number of times the user earned the badge")),
+                (
+                    "progress",
+                    models.IntegerField(default=0, help_text="Progress of the user towards earning the badge next"),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("badge", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="badges.badge")),
+                ("user", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "verbose_name_plural": "Badges progress",
+                "default_related_name": "badges_progress",
+                "constraints": [models.UniqueConstraint(fields=("user", "badge"), name="unique_user_badge_progress")],
+            },
+        ),
+        migrations.RunPython(populate_badges_progress, do_nothing),
+    ]
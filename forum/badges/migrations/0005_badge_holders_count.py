@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:01
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+
+def populate_awards(apps, schema_editor):
+    VoteActivity = apps.get_model("forum", "VoteActivity")
+    Badge = apps.get_model("badges", "Badge")
+    BadgeProgress = apps.get_model("badges", "BadgeProgress")
+    awarded_at = {
+        (user_id, badge_id): last
+        for user_id, badge_id, last in VoteActivity.objects.filter(badge__isnull=False)
+        .order_by()
+        .values("target_id", "badge_id")
+        .annotate(last=Max("created_at"))
+        .values_list("target_id", "badge_id", "last")
+    }
+    progress_list = list(BadgeProgress.objects.filter(count__gt=0))
+    for progress in progress_list:
+        progress.awarded_at = awarded_at.get((progress.user_id, progress.badge_id))
+    BadgeProgress.objects.bulk_update(progress_list, ["awarded_at"], batch_size=1000)
+    counts = {
+        badge_id: (holders, active_holders)
+        for badge_id, holders, active_holders in BadgeProgress.objects.filter(count__gt=0)
+        .order_by()
+        .values("badge_id")
+        .annotate(holders=Count("id"), active_holders=Count("id", filter=Q(user__is_active=True)))
+        .values_list("badge_id", "holders", "active_holders")
+    }
+    badges = list(Badge.objects.all())
+    for badge in badges:
+        badge.holders_count, badge.active_holders_count = counts.get(badge.id, (0, 0))
+    Badge.objects.bulk_update(badges, ["holders_count", "active_holders_count"])
+
+
+def do_nothing(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("badges", "0004_badgeprogress"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="badge",
+            name="active_holders_count",
+            field=models.IntegerField(default=0, help_text="Number of active users holding the badge"),
+        ),
+        migrations.AddField(
+            model_name="badge",
+            name="holders_count",
+            field=models.IntegerField(default=0, help_text="Number of users holding the badge"),
+        ),
+        migrations.AddField(
+            model_name="badgeprogress",
+            name="awarded_at",
+            field=models.DateTimeField(blank=True, help_text="Last time the user was awarded the badge", null=True),
+        ),
+        migrations.RunPython(populate_awards, do_nothing),
+    ]
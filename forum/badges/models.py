@@ -1,4 +1,9 @@
+from typing import Dict, Tuple, Iterable
+
+from django.conf import settings
 from django.db import models
+from django.db.models import Count, Q
+from django.utils import timezone
 
 from badges.logic.utils import TRIGGER_EVENT_TYPES, BadgeType
 
@@ -44,6 +49,14 @@ class Badge(models.Model):
         default=None,
         choices=TRIGGER_EVENT_TYPES_LIST,
     )
+    required = models.IntegerField(
+        null=True,
+        blank=True,
+        default=None,
+        help_text="Count required to earn the badge, used to measure progress towards it",
+    )
+    holders_count = models.IntegerField(default=0, help_text="Number of users holding the badge")
+    active_holders_count = models.IntegerField(default=0, help_text="Number of active users holding the badge")
 
     def __str__(self):
         return f"{self.name}"
@@ -51,3 +64,86 @@ class Badge(models.Model):
     @property
     def count(self):
         return self.voteactivity_set.count()
+
+    @classmethod
+    def refresh_holders_count(cls, badge_ids: Iterable[int] = None) -> None:
+        """Recount the users holding badges from their badges progress.
+        :param badge_ids: badges to recount, all badges if None
+        """
+        badge_qs = cls.objects.all() if badge_ids is None else cls.objects.filter(id__in=badge_ids)
+        counts = {
+            badge_id: (holders, active_holders)
+            for badge_id, holders, active_holders in BadgeProgress.objects.filter(badge__in=badge_qs, count__gt=0)
+            .order_by()
+            .values("badge_id")
+            .annotate(holders=Count("id"), active_holders=Count("id", filter=Q(user__is_active=True)))
+            .values_list("badge_id", "holders", "active_holders")
+        }
+        badges = list(badge_qs.only("id", "holders_count", "active_holders_count"))
+        for badge in badges:
+            badge.holders_count, badge.active_holders_count = counts.get(badge.id, (0, 0))
+        cls.objects.bulk_update(badges, ["holders_count", "active_holders_count"])
+
+
+class BadgeProgress(models.Model):
+    """Progress of a user towards a badge, kept by the badge engine whenever it evaluates the user"""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    badge = models.ForeignKey(Badge, on_delete=models.CASCADE)
+    count = models.IntegerField(default=0, help_text="Number of times the user earned the badge")
+    progress = models.IntegerField(default=0, help_text="Progress of the user towards earning the badge next")
+    awarded_at = models.DateTimeField(null=True, blank=True, help_text="Last time the user was awarded the badge")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        default_related_name = "badges_progress"
+        constraints = [
+            models.UniqueConstraint(fields=["user", "badge"], name="unique_user_badge_progress"),
+        ]
+        verbose_name_plural = "Badges progress"
+
+    def __str__(self):
+        return f"BadgeProgress[{self.user_id} - {self.badge_id}] count={self.count}, progress={self.progress}"
+
+    @classmethod
+    def update_badge(
+        cls,
+        badge: Badge,
+        progress: Dict[int, Tuple[int, int]],
+        all_users: bool = False,
+        awarded: Iterable[int] = (),
+    ) -> None:
+        """Write the progress of evaluated users towards a badge, users without progress have no row.
+        :param badge: the badge evaluated
+        :param progress: (count, progress) by user_id of users evaluated
+        :param all_users: were all users evaluated, if so rows of users missing from progress are deleted
+        :param awarded: users who were just awarded the badge
+        """
+        nonempty = {user_id: values for user_id, values in progress.items() if any(values)}
+        started = timezone.now()
+        awarded = set(awarded) & nonempty.keys()
+        for user_ids, update_fields in [
+            (nonempty.keys() - awarded, ["count", "progress", "updated_at"]),
+            (awarded, ["count", "progress", "updated_at", "awarded_at"]),
+        ]:
+            cls.objects.bulk_create(
+                [
+                    cls(
+                        user_id=user_id,
+                        badge=badge,
+                        count=nonempty[user_id][0],
+                        progress=nonempty[user_id][1],
+                        awarded_at=started if user_id in awarded else None,
+                    )
+                    for user_id in user_ids
+                ],
+                update_conflicts=True,
+                unique_fields=["user", "badge"],
+                update_fields=update_fields,
+                batch_size=500,
+            )
+        if all_users:
+            # Rows not written in this run belong to users without progress
+            cls.objects.filter(badge=badge, updated_at__lt=started).delete()
+        elif progress.keys() - nonempty.keys():
+            cls.objects.filter(badge=badge, user_id__in=progress.keys() - nonempty.keys()).delete()
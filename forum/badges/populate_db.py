@@ -9,6 +9,7 @@ from badges.models import Badge
 from .apps import logger
 
 BADGE_LOGIC = dict()
+BADGE_ALL_USERS_LOGIC = dict()
 
 
 @register()
@@ -35,9 +36,11 @@ def upsert_badges_in_db(app_configs, **kwargs) -> List[Any]:
             badge.section = section
             badge.trigger = badge_data.trigger
             badge.group = badge_data.group
+            badge.required = badge_data.required
             if badge.name in BADGE_LOGIC and BADGE_LOGIC[badge.name] != badge_data.logic:
                 logger.error(f"Logic for badge {badge.name} changed")
                 raise ValueError(f"Logic for badge {badge.name} changed")
             BADGE_LOGIC[badge.name] = badge_data.logic
+            BADGE_ALL_USERS_LOGIC[badge.name] = badge_data.all_users_logic
             badge.save()
     return messages
@@ -1,17 +1,24 @@
 import re
+from datetime import date
 
 from bs4 import BeautifulSoup
 from django.test import Client
 from django.test import TestCase
 from django.test.utils import override_settings
 from django.urls import reverse
+from django.utils import timezone
 
 from badges import logic
-from badges.models import Badge
+from badges.awards import get_recent_awards, get_user_earned_badges
+from badges.jobs import check_users, review_bagdes_event, recalculate_user_badges_stats
+from badges.logic.utils import TRIGGER_EVENT_TYPES
+from badges.models import Badge, BadgeProgress
 from badges.populate_db import upsert_badges_in_db
 from common.test_utils import assert_url_in_chain
-from forum.models import VoteActivity
-from userauth.models import ForumUser
+from forum.models import VoteActivity, Question, Answer, QuestionBookmark
+from forum.views import utils
+from tags.models import Synonym, TagEdit
+from userauth.models import ForumUser, UserVisit, ForumUserAdditionalData
 
 MATCH_ALL = r".*"
 
@@ -75,7 +82,9 @@ class BadgesApiTestCase(TestCase):
         for badge in badge_qs:
             u = ForumUser.objects.create_user(f"user_{badge.name}", f"user_{badge.name}@a.com", cls.password)
             VoteActivity.objects.create(badge=badge, target=u, type=VoteActivity.ActivityType.BADGE)
+            BadgeProgress.objects.create(badge=badge, user=u, count=1, awarded_at=timezone.now())
             cls.users.append(u)
+        Badge.refresh_holders_count()
 
     def setUp(self):
         self.client = BadgesClient()
@@ -133,6 +142,17 @@ class TestSingleBadgeUsersListView(BadgesApiTestCase):
         users_list = soup.find_all("div", {"class": "user-card-container"})
         self.assertEqual(1, len(users_list))
 
+    def test_view_single_badge__inactive_user__not_listed(self):
+        # arrange
+        ForumUser.objects.filter(id=self.users[0].id).update(is_active=False)
+        self.client.login(self.users[1].username, self.password)
+        # act
+        res = self.client.single_badge_users_list(self.badge.id)
+        # assert
+        self.assertEqual(200, res.status_code)
+        soup = BeautifulSoup(res.content, "html.parser")
+        self.assertEqual(0, len(soup.find_all("div", {"class": "user-card-container"})))
+
 
 class BadgesAdminTest(BadgesApiTestCase):
     superuser_name = "superuser"
@@ -160,3 +180,209 @@ class BadgesAdminTest(BadgesApiTestCase):
         res = self.client.admin_change("badge", Badge.objects.all()[0].id)
         # assert
         self.assertEqual(200, res.status_code)
+
+
+@override_settings(SKIP_USER_VISIT_LOG=True, SLACK_NOTIFICATIONS_CHANNEL=None)
+class BadgesEngineTest(TestCase):
+    password = "1111"
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        upsert_badges_in_db([], force=True)
+        cls.users = [ForumUser.objects.create_user(f"user{i}", f"user{i}@a.com", cls.password) for i in range(4)]
+        cls.users[0].title = "title"
+        cls.users[0].about_me = "about me"
+        cls.users[0].save()
+        questions = [
+            utils.create_question(cls.users[i % 2], f"question {i}", "question content with 20 chars", "tag1,tag2")
+            for i in range(12)
+        ]
+        Question.objects.filter(id=questions[0].id).update(views=60, editor=cls.users[2])
+        Question.objects.filter(id__in=[questions[1].id, questions[2].id]).update(views=260)
+        for user in cls.users[1:]:
+            QuestionBookmark.objects.create(question=questions[0], user=user)
+        for i, question in enumerate(questions[:6]):
+            answer = utils.create_answer("answer content with 20 chars", cls.users[2 + i % 2], question)
+            utils.accept_answer(answer)
+            if i % 3 == 0:
+                utils.upvote(cls.users[0], answer)
+            if i == 5:
+                competing = utils.create_answer("competing answer with 20 chars", cls.users[1], question)
+                for user in cls.users[2:]:
+                    utils.upvote(user, competing)
+        Answer.objects.filter(author=cls.users[2]).update(editor=cls.users[3])
+        for i in range(11):
+            comment = utils.create_comment(f"comment content number {i}", cls.users[3], questions[i])
+            for user in cls.users[:3]:
+                utils.upvote_comment(user, comment)
+        for i, (country, city) in enumerate([("IL", "TLV"), ("IL", "Haifa"), ("US", "NYC"), (None, None)]):
+            UserVisit.objects.create(
+                user=cls.users[1], visit_date=date(2023, 1, i + 1), consecutive_days=31 + i, country=country, city=city
+            )
+        UserVisit.objects.create(user=cls.users[2], visit_date=date(2023, 1, 1), consecutive_days=12, country="IL")
+        tag = questions[0].tags.first()
+        Synonym.objects.create(tag=tag, author=cls.users[2], name="synonym")
+        TagEdit.objects.create(tag=tag, author=cls.users[3], summary="edit")
+
+    def test_all_users_logic__matches_user_logic(self):
+        for section in logic.badges:
+            for badge_data in logic.badges[section]:
+                self.assertIsNotNone(badge_data.all_users_logic, badge_data.name)
+                # act
+                res = badge_data.all_users_logic()
+                # assert
+                for user in ForumUser.objects.all():
+                    self.assertEqual(
+                        tuple(badge_data.logic(user)),
+                        tuple(res.get(user.id, (0, 0))),
+                        f"{badge_data.name} for {user.username}",
+                    )
+
+    def test_check_users__creates_badges_in_bulk(self):
+        badge = Badge.objects.get(name="Starter")
+        # act
+        with self.assertNumQueries(10):
+            res = check_users(badge)
+        # assert
+        self.assertEqual(2, res)
+        self.assertEqual(
+            {self.users[0].id, self.users[1].id}, set(badge.voteactivity_set.values_list("target_id", flat=True))
+        )
+        self.assertEqual(1, ForumUser.objects.get(id=self.users[0].id).bronze_badges)
+        self.assertEqual(0, ForumUser.objects.get(id=self.users[2].id).bronze_badges)
+        self.assertEqual(0, check_users(badge))
+
+    def test_check_users__removes_undeserved_badges(self):
+        badge = Badge.objects.get(name="Famous Question")
+        for user in self.users[:2]:
+            VoteActivity.objects.create(badge=badge, target=user, type=VoteActivity.ActivityType.BADGE)
+        ForumUser.objects.filter(id__in=[u.id for u in self.users[:2]]).update(gold_badges=1)
+        # act
+        res = check_users(badge)
+        # assert
+        self.assertEqual(0, res)
+        self.assertFalse(badge.voteactivity_set.exists())
+        self.assertEqual(0, ForumUser.objects.get(id=self.users[0].id).gold_badges)
+
+    def test_check_users__not_only_once__creates_all_deserved(self):
+        badge = Badge.objects.get(name="Popular Question")
+        # act
+        res = check_users(badge)
+        # assert
+        self.assertEqual(2, res)
+        self.assertEqual(2, badge.voteactivity_set.filter(target=self.users[0]).count())
+        self.assertEqual(2, ForumUser.objects.get(id=self.users[0].id).bronze_badges)
+
+    def test_check_users__user_ids__checks_only_given_users(self):
+        badge = Badge.objects.get(name="Starter")
+        # act
+        res = check_users(badge, [self.users[1].id, self.users[2].id])
+        # assert
+        self.assertEqual(1, res)
+        self.assertEqual([self.users[1].id], list(badge.voteactivity_set.values_list("target_id", flat=True)))
+
+    def test_review_badges_event__user_ids__checks_only_given_users(self):
+        # act
+        review_bagdes_event(TRIGGER_EVENT_TYPES["Upvote"], [self.users[0].id, None])
+        # assert
+        self.assertEqual(
+            {"Supporter"},
+            set(VoteActivity.objects.filter(badge__isnull=False).values_list("badge__name", flat=True)),
+        )
+        self.assertEqual(
+            {self.users[0].id},
+            set(VoteActivity.objects.filter(badge__isnull=False).values_list("target_id", flat=True)),
+        )
+
+    def test_recalculate_user_badges_stats__counters_drift__repaired(self):
+        bronze = Badge.objects.filter(type="bronze").first()
+        gold = Badge.objects.filter(type="gold").first()
+        for badge in (bronze, bronze, gold):
+            VoteActivity.objects.create(badge=badge, target=self.users[0], type=VoteActivity.ActivityType.BADGE)
+        ForumUser.objects.filter(id=self.users[1].id).update(silver_badges=3)
+        ForumUserAdditionalData.objects.filter(user=self.users[2]).update(bronze_badges=1)
+        # act
+        with self.assertNumQueries(5):
+            res = recalculate_user_badges_stats()
+        # assert
+        self.assertEqual(3, res)
+        for user_id, badges in [
+            (self.users[0].id, [2, 0, 1]),
+            (self.users[1].id, [0, 0, 0]),
+            (self.users[2].id, [0, 0, 0]),
+        ]:
+            user = ForumUser.objects.get(id=user_id)
+            self.assertEqual(badges, user.badges)
+            stats = user.additional_data
+            self.assertEqual(badges, [stats.bronze_badges, stats.silver_badges, stats.gold_badges])
+        self.assertEqual(0, recalculate_user_badges_stats())
+
+    def test_check_users__writes_badge_progress(self):
+        badge = Badge.objects.get(name="Notable Question")
+        BadgeProgress.objects.create(user=self.users[3], badge=badge, count=1, progress=1)
+        # act
+        check_users(badge)
+        # assert
+        self.assertEqual(
+            {self.users[0].id: (1, 60), self.users[1].id: (1, 10)},
+            {p.user_id: (p.count, p.progress) for p in BadgeProgress.objects.filter(badge=badge)},
+        )
+
+    def test_check_users__user_ids__updates_only_given_users_progress(self):
+        badge = Badge.objects.get(name="Notable Question")
+        BadgeProgress.objects.create(user=self.users[3], badge=badge, count=1, progress=1)
+        # act
+        check_users(badge, [self.users[0].id])
+        # assert
+        self.assertEqual(
+            {self.users[0].id: (1, 60), self.users[3].id: (1, 1)},
+            {p.user_id: (p.count, p.progress) for p in BadgeProgress.objects.filter(badge=badge)},
+        )
+
+    def test_recalculate_user_badges_stats__sets_next_badge(self):
+        for name in ("Popular Question", "Notable Question", "Famous Question"):
+            check_users(Badge.objects.get(name=name))
+        # act
+        recalculate_user_badges_stats()
+        # assert
+        user = ForumUser.objects.get(id=self.users[1].id)
+        self.assertEqual("Famous Question", user.next_badge.name)
+        self.assertEqual(user.next_badge_id, user.additional_data.next_badge_id)
+
+    def test_profile_badges_tab__reads_badge_progress(self):
+        badge = Badge.objects.get(name="Popular Question")
+        check_users(badge)
+        client = BadgesClient()
+        client.login(self.users[0].username, self.password)
+        # act
+        res = client.get(reverse("userauth:profile", args=[self.users[0].username, "badges"]))
+        # assert
+        self.assertEqual(200, res.status_code)
+        self.assertEqual(2, res.context["counters"]["badges"])
+        self.assertEqual([(badge.id, 2)], [(item["pk"], item["count"]) for item in res.context["items"]])
+
+    def test_badges_list__earned_from_badge_progress(self):
+        badge = Badge.objects.get(name="Popular Question")
+        check_users(badge)
+        client = BadgesClient()
+        client.login(self.users[0].username, self.password)
+        # act
+        res = client.badges_list()
+        # assert
+        earned = {item.name for item in res.context["items"] if item.earned}
+        self.assertEqual({badge.name}, earned)
+
+    def test_check_users__updates_holders_count_and_recent_awards(self):
+        badge = Badge.objects.get(name="Popular Question")
+        ForumUser.objects.filter(id=self.users[1].id).update(is_active=False)
+        # act
+        check_users(badge)
+        # assert
+        badge.refresh_from_db()
+        self.assertEqual(2, badge.holders_count)
+        self.assertEqual(1, badge.active_holders_count)
+        recent = get_recent_awards()
+        self.assertEqual(2, len(recent))
+        self.assertEqual({badge.name}, {award["badge"]["name"] for award in recent})
+        self.assertEqual({badge.id: 2}, get_user_earned_badges(self.users[0].id))
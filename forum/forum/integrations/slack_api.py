@@ -72,7 +72,7 @@ def _get_slack_userid(email: str):
                 logger.warning(f"Couldn't find slack user for email {email}, slack error: {response['error']}")
                 return None
             user.slack_userid = response["user"]["id"]
-            user.save()
+            user.save(update_fields=["slack_userid"])
         except SlackApiError as e:
             logger.warning(f"Couldn't find slack user for email {email}, slack error: {e.response['error']}")
             return None
@@ -94,7 +94,7 @@ def _get_forumuser_by_slack_userid(slack_user_id: str) -> Union[ForumUser, None]
             logger.warning(f"Couldn't find forum user for slack user {slack_user_id} with email: {email}")
             return None
         user.slack_userid = slack_user_id
-        user.save()
+        user.save(update_fields=["slack_userid"])
         return user
     except SlackApiError as e:
         logger.warning(f"Couldn't find slack user {slack_user_id}, slack error: {e.response['error']}")
@@ -1,5 +1,10 @@
 from .base import start_job
-from .calculate_user_tag_stats import update_user_tag_stats, recalculate_user_reputation_score
+from .calculate_user_tag_stats import (
+    update_user_tag_stats,
+    recalculate_user_reputation_score,
+    rebuild_user_tag_stats,
+    update_user_tag_stats_last_month,
+)
 from .check_urls import scan_media_links_usage, check_urls
 from .config_updated_signal import constance_updated
 from .moderator_check import (
@@ -8,17 +13,22 @@ from .moderator_check import (
 )
 from .notify_user import notify_user_email, send_email_async
 from .others import create_documentation_posts, log_search
-from .populate_meilisearch import populate_meilisearch, add_meilisearch_document
+from .populate_meilisearch import populate_meilisearch, flush_meilisearch_sync
 from .purge_data import purge_question_views
+from .question_views import flush_question_views
+from .reconcile_reputation import reconcile_users_reputation
 from .reports_jobs import (
     send_daily_activity_report_for_admins,
     send_weekly_digest_for_users,
 )
+from .search_vectors import flush_search_vector_updates
 from .user_impact import calculate_user_impact, calculate_all_users_impact
 
 __all__ = [
     "start_job",
     "update_user_tag_stats",
+    "rebuild_user_tag_stats",
+    "update_user_tag_stats_last_month",
     "scan_media_links_usage",
     "check_urls",
     "update_moderator_status_for_users",
@@ -28,8 +38,11 @@ __all__ = [
     "create_documentation_posts",
     "log_search",
     "populate_meilisearch",
-    "add_meilisearch_document",
+    "flush_meilisearch_sync",
     "purge_question_views",
+    "flush_question_views",
+    "reconcile_users_reputation",
+    "flush_search_vector_updates",
     "send_daily_activity_report_for_admins",
     "send_weekly_digest_for_users",
     "calculate_user_impact",
@@ -1,5 +1,6 @@
 import redis
 from django.conf import settings
+from scheduler.helpers.queues import get_current_job, get_queue
 
 from forum.apps import logger
 
@@ -17,3 +18,20 @@ def start_job(method, *args, **kwargs):
         logger.debug(f"started job {method.__name__}")
     except redis.exceptions.ConnectionError as e:
         logger.warning(f"Could not publish job {method} to redis: {e}")
+
+
+def report_progress(step: str, progress: float) -> None:
+    """Report the progress of the running job in its meta, which is shown in the scheduler admin.
+    Does nothing when the method is not run by a worker.
+    :param step: current step of the job
+    :param progress: fraction of the job done, between 0 and 1
+    """
+    logger.debug(f"{step}: {progress:.0%}")
+    current_job = get_current_job()
+    if current_job is None:
+        return
+    current_job.meta.update(step=step, progress=round(progress, 2))
+    try:
+        current_job.set_field("meta", current_job.meta, get_queue(current_job.queue_name).connection)
+    except redis.exceptions.ConnectionError as e:
+        logger.warning(f"Could not report progress of job {current_job.name}: {e}")
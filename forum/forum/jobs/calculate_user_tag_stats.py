@@ -1,26 +1,152 @@
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db.models import Count, Sum
+from django.utils import timezone
 from scheduler import job
 
-from forum.models import Question
-from forum.views.follow_models import handle_user_tag_stats
-from forum.views.utils import recalculate_user_reputation
-from userauth.models import ForumUser
+from forum.apps import logger
+from forum.jobs.base import report_progress
+from forum.jobs.reconcile_reputation import reconcile_users_reputation
+from forum.models import Answer, Question, UserTagStats, VoteActivity
+
+
+def _filter_users_tags(qs, user_field: str, tag_field: str, user_ids, tag_ids):
+    if user_ids is not None:
+        qs = qs.filter(**{f"{user_field}__in": user_ids})
+    if tag_ids is not None:
+        qs = qs.filter(**{f"{tag_field}__in": tag_ids})
+    return qs.order_by()
+
+
+def _reputation_by_user_tag(
+    user_ids: Optional[Iterable[int]], tag_ids: Optional[Iterable[int]], since=None
+) -> Dict[Tuple[int, int], int]:
+    qs = VoteActivity.objects.filter(question__isnull=False, reputation_change__isnull=False)
+    if since is not None:
+        qs = qs.filter(created_at__gte=since)
+    qs = _filter_users_tags(qs, "target_id", "question__tags", user_ids, tag_ids)
+    return {
+        (target_id, tag_id): reputation
+        for target_id, tag_id, reputation in qs.values("target_id", "question__tags")
+        .annotate(reputation=Sum("reputation_change"))
+        .values_list("target_id", "question__tags", "reputation")
+        if tag_id is not None
+    }
+
+
+def _write_user_tag_stats(
+    expected: Dict[Tuple[int, int], Dict[str, int]],
+    fields: Iterable[str],
+    user_ids: Optional[Iterable[int]],
+    tag_ids: Optional[Iterable[int]],
+    batch_size: int,
+    create: bool = True,
+) -> int:
+    """Write the expected counters of users in tags, stats with no questions, answers or reputation are deleted.
+    :param create: create missing stats
+    :returns: number of stats created, updated or deleted
+    """
+    fields = list(fields)
+    existing_qs = _filter_users_tags(UserTagStats.objects.all(), "user_id", "tag_id", user_ids, tag_ids)
+    to_update, to_delete, seen = list(), list(), set()
+    for stats in existing_qs.only("id", "user_id", "tag_id", *UserTagStats.COUNTERS).iterator(chunk_size=batch_size):
+        pair = (stats.user_id, stats.tag_id)
+        values = expected.get(pair, dict())
+        changed = [field for field in fields if getattr(stats, field) != values.get(field, 0)]
+        for field in changed:
+            setattr(stats, field, values.get(field, 0))
+        if pair in seen or not any(getattr(stats, field) for field in UserTagStats.COUNTERS):
+            to_delete.append(stats.id)
+        elif changed:
+            to_update.append(stats)
+        seen.add(pair)
+    to_create = [
+        UserTagStats(user_id=user_id, tag_id=tag_id, **values)
+        for (user_id, tag_id), values in expected.items()
+        if create and (user_id, tag_id) not in seen and any(values.values())
+    ]
+    UserTagStats.objects.filter(id__in=to_delete).delete()
+    UserTagStats.objects.bulk_update(to_update, fields, batch_size=batch_size)
+    UserTagStats.objects.bulk_create(to_create, batch_size=batch_size)
+    return len(to_create) + len(to_update) + len(to_delete)
+
+
+@job()
+def rebuild_user_tag_stats(
+    user_ids: Optional[Iterable[int]] = None, tag_ids: Optional[Iterable[int]] = None, batch_size: int = 1000
+) -> int:
+    """Calculate the stats of users in tags from scratch with a few aggregate queries, and write them in bulk.
+    Stats are maintained incrementally when posts, tags and reputation change, this repairs any drift.
+    :param user_ids: rebuild only the stats of these users, all users if None
+    :param tag_ids: rebuild only the stats in these tags, all tags if None
+    :param batch_size: number of stats to write in a single bulk query
+    :returns: number of stats created, updated or deleted
+    """
+    expected = defaultdict(dict)
+    questions_qs = _filter_users_tags(Question.tags.through.objects, "question__author_id", "tag_id", user_ids, tag_ids)
+    for author_id, tag_id, count in (
+        questions_qs.values("question__author_id", "tag_id")
+        .annotate(count=Count("question_id"))
+        .values_list("question__author_id", "tag_id", "count")
+    ):
+        expected[(author_id, tag_id)]["questions_by_user"] = count
+    answers_qs = _filter_users_tags(Answer.objects, "author_id", "question__tags", user_ids, tag_ids)
+    for author_id, tag_id, count in (
+        answers_qs.values("author_id", "question__tags")
+        .annotate(count=Count("id"))
+        .values_list("author_id", "question__tags", "count")
+    ):
+        if tag_id is not None:
+            expected[(author_id, tag_id)]["answers_by_user"] = count
+    for pair, reputation in _reputation_by_user_tag(user_ids, tag_ids).items():
+        expected[pair]["reputation"] = reputation
+    last_month = timezone.now() - timedelta(days=30)
+    for pair, reputation in _reputation_by_user_tag(user_ids, tag_ids, since=last_month).items():
+        expected[pair]["reputation_last_month"] = reputation
+    count = _write_user_tag_stats(expected, UserTagStats.COUNTERS, user_ids, tag_ids, batch_size)
+    logger.info(f"Rebuilt users tag stats, {count} stats changed")
+    return count
+
+
+@job()
+def update_user_tag_stats_last_month(batch_size: int = 1000) -> int:
+    """Recalculate the reputation users earned in tags during the last month,
+    reputation older than a month is only removed from it by this job.
+    :returns: number of stats created, updated or deleted
+    """
+    last_month = timezone.now() - timedelta(days=30)
+    expected = {
+        pair: dict(reputation_last_month=reputation)
+        for pair, reputation in _reputation_by_user_tag(None, None, since=last_month).items()
+    }
+    return _write_user_tag_stats(expected, ["reputation_last_month"], None, None, batch_size, create=False)
 
 
 @job()
 def update_user_tag_stats(post_id: int, user_id: int):
-    post = Question.objects.get(id=post_id)
-    user = ForumUser.objects.get(id=user_id)
-    tags_to_update = post.tags.all()
-    for tag in tags_to_update:
-        # Actual calculation
-        handle_user_tag_stats(tag, user)
+    tag_ids = list(Question.tags.through.objects.filter(question_id=post_id).values_list("tag_id", flat=True))
+    rebuild_user_tag_stats(user_ids=[user_id], tag_ids=tag_ids)
 
 
 @job()
-def recalculate_user_reputation_score():
-    posts = Question.objects.all()
-    users = ForumUser.objects.all()
-    for user in users:
-        recalculate_user_reputation(user)
-        for post in posts:
-            update_user_tag_stats(post.id, user.id)
+def recalculate_user_reputation_score(batch_size: int = 1000) -> int:
+    """Recalculate reputation after the reputation change of activity types was configured:
+    the reputation change of activities is updated with a single query per activity type,
+    and the reputation of users, and of users in tags, is aggregated with GROUP BY queries and written in bulk.
+    :param batch_size: number of users/stats to write in a single bulk query
+    :returns: number of users whose reputation changed
+    """
+    reputation_changes = VoteActivity.reputation_changes()
+    steps = len(reputation_changes) + 2
+    for i, (activity_type, reputation_change) in enumerate(reputation_changes.items()):
+        VoteActivity.objects.filter(type=activity_type).exclude(reputation_change=reputation_change).update(
+            reputation_change=reputation_change
+        )
+        report_progress(f"Updated {activity_type.label} activities", (i + 1) / steps)
+    count = reconcile_users_reputation(batch_size=batch_size)
+    report_progress("Updated users reputation", (steps - 1) / steps)
+    rebuild_user_tag_stats(batch_size=batch_size)
+    report_progress("Updated users tag stats", 1)
+    return count
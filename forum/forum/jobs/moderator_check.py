@@ -34,7 +34,7 @@ def revoke_moderator(user: ForumUser, num_visits: int, last_month: datetime):
     )
     notify_user.notify_user_email(user, subject, subject, html, True)
     user.is_moderator = False
-    user.save()
+    user.save(update_fields=["is_moderator"])
 
 
 def grant_moderator(user: ForumUser, num_visits: int, last_month: datetime):
@@ -51,7 +51,7 @@ def grant_moderator(user: ForumUser, num_visits: int, last_month: datetime):
     )
     notify_user.notify_user_email(user, subject, subject, html, True)
     user.is_moderator = True
-    user.save()
+    user.save(update_fields=["is_moderator"])
 
 
 def _generate_questions_report_for_user(user: ForumUser, bom: datetime):
@@ -129,4 +129,4 @@ def notify_user_email(user: ForumUser, subject: str, text: str, html: str, impor
     send_email_async(email)
     # Update user last email
     user.last_email_datetime = timezone.now()
-    user.save()
+    user.save(update_fields=["last_email_datetime"])
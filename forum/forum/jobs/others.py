@@ -19,7 +19,7 @@ def log_search(user: ForumUser, query: str, results: List[int], timems: int):
     logger.info(f'Searching for: "{query}" in {timems}ms. got first 5 results: {results}')
     SearchRecord.objects.create(author=user, query=query, results=",".join(map(str, results)), time=timems)
     user.search_count += 1
-    user.save()
+    user.save(update_fields=["search_count"])
     pass
 
 
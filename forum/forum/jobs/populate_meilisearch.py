@@ -1,10 +1,15 @@
-import meilisearch
-from django.conf import settings
-from meilisearch.errors import MeilisearchApiError
+from typing import Iterable, List
+
+from django.db.models import Prefetch
 from scheduler import job
 
 from forum.apps import logger
-from forum.models import Question
+from forum.meilisearch_client import MeilisearchIndex
+from forum.models import Question, Answer
+from forum.models.base import MEILISEARCH_SYNC_QUEUE
+from forum.search_cache import bump_search_generation
+from tags.models import Tag
+from .base import report_progress
 
 
 def question_doc(q: Question) -> dict:
@@ -13,22 +18,22 @@ def question_doc(q: Question) -> dict:
         "title": q.title,
         "content": q.content,
         "tags": q.tag_words(),
-        # 'answers': [
-        #  {
-        #   'id': a.id,
-        #   'content': a.content,
-        #  } for a in q.answer_set.all()
-        # ],
+        "answers": [a.content for a in q.answer_set.all()],
+        "author": q.author.username,
+        "votes": q.votes,
+        "answers_count": q.answers_count,
+        "space": q.space.short_name if q.space_id else None,
         "has_accepted": q.has_accepted_answer,
+        "created_at": int(q.created_at.timestamp()),
         "last_updated": int(q.last_activity.timestamp()),
     }
 
 
 INDEX_SETTINGS = {
     "displayedAttributes": ["id"],
-    "searchableAttributes": ["title", "content", "tags"],
-    "filterableAttributes": [],
-    "sortableAttributes": ["has_accepted", "last_updated"],
+    "searchableAttributes": ["title", "content", "tags", "answers"],
+    "filterableAttributes": ["tags", "author", "votes", "answers_count", "space", "has_accepted"],
+    "sortableAttributes": ["has_accepted", "votes", "created_at", "last_updated"],
     "rankingRules": ["words", "typo", "proximity", "attribute", "sort", "exactness"],
     "stopWords": [
         "'ll",
@@ -1339,56 +1344,118 @@ INDEX_SETTINGS = {
         "disableOnAttributes": [],
     },
     "faceting": {"maxValuesPerFacet": 100},
-    "pagination": {"maxTotalHits": 20},
+    "pagination": {"maxTotalHits": 1000},
 }
 
 
+POSTS_INDEX = MeilisearchIndex("posts", INDEX_SETTINGS)
+
+
 def _get_meilisearch_index():
-    if not settings.MEILISEARCH_ENABLED:
-        logger.warning("meilisearch Index could not be created")
-        return None
-    client = meilisearch.Client(settings.MEILISEARCH_SERVER_ADDRESS, settings.MEILISEARCH_MASTERKEY)
-    try:
-        index = client.index("posts")
-    except MeilisearchApiError:
-        client.create_index("posts", {"primaryKey": "id"})
-        index = client.index("posts")
-        index.update_settings(INDEX_SETTINGS)
+    index = POSTS_INDEX.get()
+    if index is None:
+        logger.warning("meilisearch is disabled, index is not available")
     return index
 
 
-@job()
-def populate_meilisearch():
-    index = _get_meilisearch_index()
-    if index is None:
-        return
-    question_qs = Question.objects.all()
-    for q in question_qs:
-        doc = question_doc(q)
-        index.add_documents(
-            [
-                doc,
-            ]
+def _submit_documents(index, docs: List[dict]):
+    task = index.add_documents(docs, primary_key="id")
+    logger.debug(f"Submitted {len(docs)} documents to meilisearch, task {task.task_uid}")
+    return task
+
+
+def _questions_to_index():
+    return (
+        Question.objects.select_related("author", "space")
+        .only(
+            "id",
+            "title",
+            "content",
+            "votes",
+            "answers_count",
+            "has_accepted_answer",
+            "created_at",
+            "last_activity",
+            "author__username",
+            "space__short_name",
+        )
+        .prefetch_related(
+            Prefetch("tags", queryset=Tag.objects.only("id", "tag_word")),
+            Prefetch("answer_set", queryset=Answer.objects.only("id", "question_id", "content").order_by("id")),
         )
+    )
 
 
-@job()
-def add_meilisearch_document(question_id: int):
+@job(timeout=3600)
+def populate_meilisearch(batch_size: int = 5000, chunk_size: int = 2000, timeout_in_ms: int = 600_000) -> int:
+    """Index all questions in meilisearch.
+
+    Questions are streamed with their tags prefetched and submitted in batches,
+    then the indexing tasks are awaited.
+
+    :param batch_size: Number of documents to submit in a single add_documents call.
+    :param chunk_size: Number of questions to read from the database at once.
+    :param timeout_in_ms: Time to wait for each indexing task to finish.
+    :returns: Number of documents indexed successfully.
+    """
     index = _get_meilisearch_index()
     if index is None:
-        return
-    question = Question.objects.get(id=question_id)
-    doc = question_doc(question)
-    index.add_documents(
-        [
-            doc,
-        ]
-    )
+        return 0
+    question_qs = _questions_to_index().order_by("id")
+    tasks = list()
+    docs = list()
+    for q in question_qs.iterator(chunk_size=chunk_size):
+        docs.append(question_doc(q))
+        if len(docs) >= batch_size:
+            tasks.append((_submit_documents(index, docs), len(docs)))
+            docs = list()
+    if docs:
+        tasks.append((_submit_documents(index, docs), len(docs)))
+    indexed = 0
+    for i, (task, count) in enumerate(tasks):
+        result = index.wait_for_task(task.task_uid, timeout_in_ms=timeout_in_ms)
+        if result.status == "succeeded":
+            indexed += count
+        else:
+            logger.error(f"meilisearch task {task.task_uid} indexing {count} documents {result.status}: {result.error}")
+        report_progress("Indexing documents", (i + 1) / len(tasks))
+    bump_search_generation()
+    logger.info(f"Indexed {indexed} documents in meilisearch using {len(tasks)} tasks")
+    return indexed
 
 
-@job()
-def delete_meilisearch_document(question_id: int):
+def sync_meilisearch_documents(question_ids: Iterable[int], batch_size: int = 1000) -> int:
+    """Upsert the documents of questions to meilisearch, questions no longer existing are deleted from the index.
+    :param question_ids: Questions to sync.
+    :param batch_size: Number of documents to submit in a single add_documents call.
+    :returns: Number of documents upserted or deleted.
+    """
+    question_ids = set(question_ids)
     index = _get_meilisearch_index()
-    if index is None:
-        return
-    index.delete_document(question_id)
+    if index is None or not question_ids:
+        return 0
+    docs = [question_doc(q) for q in _questions_to_index().filter(id__in=question_ids).order_by("id")]
+    for i in range(0, len(docs), batch_size):
+        _submit_documents(index, docs[i : i + batch_size])
+    deleted = sorted(question_ids - {doc["id"] for doc in docs})
+    if deleted:
+        index.delete_documents(deleted)
+    bump_search_generation()
+    return len(docs) + len(deleted)
+
+
+@job()
+def flush_meilisearch_sync() -> int:
+    """Sync the questions changed since the last run to meilisearch.
+    Questions are put back in the queue when the sync fails.
+    :returns: Number of documents upserted or deleted.
+    """
+    pending = MEILISEARCH_SYNC_QUEUE.drain()
+    try:
+        count = sync_meilisearch_documents(int(question_id) for question_id in pending)
+    except Exception as e:
+        logger.warning(f"Could not sync {len(pending)} questions to meilisearch: {e}")
+        MEILISEARCH_SYNC_QUEUE.add(*pending)
+        raise
+    logger.debug(f"Synced {count} documents to meilisearch")
+    return count
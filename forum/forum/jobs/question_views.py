@@ -0,0 +1,50 @@
+from collections import Counter
+from typing import Iterable, Tuple
+
+from django.db.models import F
+from scheduler import job
+
+from forum.apps import logger
+from forum.models import Question, QuestionView
+from userauth.models import ForumUser
+from wiwik_lib.write_behind import WriteBehindBuffer
+
+QUESTION_VIEWS_BUFFER = WriteBehindBuffer("question-views")
+
+
+def _write_question_views(views: Iterable[Tuple[int, int]]) -> int:
+    """Insert QuestionView rows and increase the views counter with one update per question.
+    :param views: pairs of (question_id, user_id)
+    :returns: number of views written
+    """
+    views = list(views)
+    question_ids = set(Question.objects.filter(id__in={q for q, _ in views}).values_list("id", flat=True))
+    user_ids = set(ForumUser.objects.filter(id__in={u for _, u in views}).values_list("id", flat=True))
+    views = [(q, u) for q, u in views if q in question_ids and u in user_ids]
+    QuestionView.objects.bulk_create([QuestionView(question_id=q, author_id=u) for q, u in views], batch_size=500)
+    for question_id, count in Counter(q for q, _ in views).items():
+        Question.objects.filter(id=question_id).update(views=F("views") + count)
+    return len(views)
+
+
+def record_question_view(user: ForumUser, q: Question) -> None:
+    """Record a user viewed a question, the view is written to the database by `flush_question_views`.
+    A user viewing the same question several times before a flush is counted once.
+    """
+    if not QUESTION_VIEWS_BUFFER.add(f"{q.id}:{user.id}"):
+        _write_question_views([(q.id, user.id)])
+        return
+    if QUESTION_VIEWS_BUFFER.is_local:
+        flush_question_views()
+
+
+@job()
+def flush_question_views() -> int:
+    """Write pending question views to the database.
+    :returns: number of views written
+    """
+    pending = QUESTION_VIEWS_BUFFER.drain()
+    views = [tuple(map(int, member.split(":"))) for member in pending]
+    count = _write_question_views(views)
+    logger.debug(f"Flushed {count} question views")
+    return count
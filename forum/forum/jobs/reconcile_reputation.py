@@ -0,0 +1,39 @@
+from django.db.models import Sum
+from scheduler import job
+
+from forum.apps import logger
+from forum.models import VoteActivity
+from userauth.models import ForumUser
+
+
+@job()
+def reconcile_users_reputation(batch_size: int = 1000) -> int:
+    """Verify users reputation matches the sum of their VoteActivity reputation changes.
+
+    Reputation is maintained incrementally whenever a VoteActivity is created or deleted,
+    this job repairs any drift in bulk.
+
+    Args:
+        batch_size: Number of users to write in a single bulk update.
+
+    Returns:
+        Number of users whose reputation was repaired.
+    """
+    totals = dict(
+        VoteActivity.objects.filter(reputation_change__isnull=False)
+        .order_by()
+        .values("target_id")
+        .annotate(total=Sum("reputation_change"))
+        .values_list("target_id", "total")
+    )
+    drifted = list()
+    for user in ForumUser.objects.only("id", "username", "reputation_score").iterator(chunk_size=batch_size):
+        expected = totals.get(user.id) or 0
+        if user.reputation_score == expected:
+            continue
+        logger.warning(f"User {user.username} reputation is {user.reputation_score} where it should be {expected}")
+        user.reputation_score = expected
+        drifted.append(user)
+    ForumUser.objects.bulk_update(drifted, ["reputation_score"], batch_size=batch_size)
+    logger.info(f"Reconciled reputation for {len(drifted)} users")
+    return len(drifted)
@@ -0,0 +1,16 @@
+from scheduler import job
+
+from forum.apps import logger
+from forum.models import QuestionAdditionalData
+from forum.models.base import SEARCH_VECTOR_UPDATES
+
+
+@job()
+def flush_search_vector_updates() -> int:
+    """Recalculate the search vectors of questions changed since the last run.
+    :returns: number of search vectors updated
+    """
+    question_ids = [int(question_id) for question_id in SEARCH_VECTOR_UPDATES.drain()]
+    count = QuestionAdditionalData.update_search_vectors(question_ids) if question_ids else 0
+    logger.debug(f"Updated {count} search vectors")
+    return count
@@ -14,7 +14,7 @@ def calculate_user_impact(user: ForumUser):
     )["reach"]
     userdata.posts_edited = Question.objects.filter(editor=user).count() + Answer.objects.filter(editor=user).count()
     userdata.votes = VoteActivity.objects.filter(source=user, reputation_change__isnull=False).count()
-    userdata.save()
+    userdata.save(update_fields=["people_reached", "posts_edited", "votes"])
 
 
 @job()
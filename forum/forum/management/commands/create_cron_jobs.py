@@ -1,3 +1,4 @@
+from django.conf import settings
 from scheduler.models import Task, TaskType
 
 from wiwik_lib.utils import ManagementCommand
@@ -47,3 +48,18 @@ class Command(ManagementCommand):
             "0 0 * * *",
         )
         self.create_job("Calculate badges for users", "badges.jobs.review_all_badges", "0 */3 * * *")
+        self.create_job(
+            "Reconcile users reputation",
+            "forum.jobs.reconcile_users_reputation",
+            "30 0 * * *",
+        )
+        self.create_job("Flush question views", "forum.jobs.flush_question_views", "*/5 * * * *")
+        self.create_job("Update search vectors", "forum.jobs.flush_search_vector_updates", "* * * * *")
+        self.create_job("Sync meilisearch index", "forum.jobs.flush_meilisearch_sync", settings.MEILISEARCH_SYNC_CRON)
+        self.create_job("Refresh tags stats", "tags.jobs.refresh_dirty_tags_stats", "* * * * *")
+        self.create_job(
+            "Update users tag stats of last month", "forum.jobs.update_user_tag_stats_last_month", "45 0 * * *"
+        )
+        self.create_job(
+            "Calculate posts similarity", "similarity.calculate_similarity_job.calculate_tfidf", "0 3 * * *"
+        )
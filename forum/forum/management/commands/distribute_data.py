@@ -71,4 +71,4 @@ class Command(ManagementCommand):
             profile_pic_filename = "default_pics/" + random.choice(filenames)
             user.profile_pic = profile_pic_filename
             logger.info(f"Resetting profile-pic for {user.username}: using {profile_pic_filename}")
-            user.save()
+            user.save(update_fields=["profile_pic"])
@@ -0,0 +1,24 @@
+from django.core.management import CommandParser
+
+from forum.models import Question, QuestionAdditionalData
+from wiwik_lib.utils import ManagementCommand
+
+
+class Command(ManagementCommand):
+    help = "Rebuild the full-text search vectors of all questions in batches"
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of questions to update in a single query",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        question_ids = list(Question.objects.order_by("id").values_list("id", flat=True))
+        count = 0
+        for i in range(0, len(question_ids), batch_size):
+            count += QuestionAdditionalData.update_search_vectors(question_ids[i : i + batch_size])
+        self.print(f"Rebuilt search vectors for {count} questions")
@@ -0,0 +1,20 @@
+from django.core.management import CommandParser
+
+from forum.jobs import rebuild_user_tag_stats
+from wiwik_lib.utils import ManagementCommand
+
+
+class Command(ManagementCommand):
+    help = "Rebuild the stats of all users in all tags (questions, answers and reputation)"
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of stats to write in a single query",
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild_user_tag_stats(batch_size=options["batch_size"])
+        self.print(f"Rebuilt users tag stats, {count} stats changed")
@@ -0,0 +1,11 @@
+from forum.models import Question, Answer
+from wiwik_lib.utils import ManagementCommand
+
+
+class Command(ManagementCommand):
+    help = "Rebuild votes counters of questions and answers from the upvotes/downvotes tables"
+
+    def handle(self, *args, **options):
+        for model in (Question, Answer):
+            count = model.recount_votes()
+            self.print(f"Rebuilt votes counters for {count} {model._meta.verbose_name_plural}")
@@ -0,0 +1,142 @@
+"""Shared, pooled connection to meilisearch.
+
+The meilisearch client sends its requests with the module-level `requests` functions, opening a
+new connection per request. To reuse connections, `_SessionHttpRequests` replaces the private
+`meilisearch._httprequests.HttpRequests` of the client and relies on `send_request` dispatching on
+`http_method.__name__`. This is not a public API of the SDK: the `meilisearch<0.33` pin in
+pyproject.toml is load-bearing, and test_meilisearch_client checks the contract on upgrades.
+"""
+
+import threading
+import time
+from typing import Optional, Tuple
+
+import requests
+from django.conf import settings
+from meilisearch import Client
+from meilisearch._httprequests import HttpRequests
+from meilisearch.config import Config
+from meilisearch.errors import MeilisearchApiError, MeilisearchCommunicationError, MeilisearchTimeoutError
+from meilisearch.index import Index
+from requests.adapters import HTTPAdapter
+
+from forum.apps import logger
+
+HEALTH_CHECK_INTERVAL_SECONDS = 30
+
+
+class _SessionHttpRequests(HttpRequests):
+    """Send the requests of the meilisearch client with a keep-alive session, so connections are reused"""
+
+    def __init__(self, config: Config, session: requests.Session):
+        super().__init__(config)
+        self.session = session
+
+    def send_request(self, http_method, *args, **kwargs):
+        return super().send_request(getattr(self.session, http_method.__name__), *args, **kwargs)
+
+
+def _new_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.MEILISEARCH_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _is_healthy(client: Client) -> bool:
+    try:
+        client.health()
+    except (MeilisearchApiError, MeilisearchCommunicationError, MeilisearchTimeoutError):
+        return False
+    return True
+
+
+def _use_session(obj, session: requests.Session) -> None:
+    obj.http = _SessionHttpRequests(obj.config, session)
+    obj.task_handler.http = _SessionHttpRequests(obj.config, session)
+
+
+class MeilisearchIndex:
+    """Handle to a meilisearch index shared by the process.
+
+    Requests go through a pooled keep-alive session. The index is created on first use,
+    and its settings are applied once. The server health is checked periodically,
+    when the check fails the handle reconnects with a new session.
+    """
+
+    def __init__(self, uid: str, index_settings: dict):
+        self.uid = uid
+        self.index_settings = index_settings
+        self._lock = threading.Lock()
+        self._session: Optional[requests.Session] = None
+        self._client: Optional[Client] = None
+        self._index: Optional[Index] = None
+        self._checked_at = 0.0
+        self._settings_applied = False
+
+    def get(self) -> Optional[Index]:
+        """Get the index, connecting to meilisearch when not connected or not healthy.
+        Network calls are made outside the lock, which only guards swapping the handles.
+        :returns: The index, None when meilisearch is disabled.
+        :raises MeilisearchCommunicationError: meilisearch is not reachable.
+        """
+        if not settings.MEILISEARCH_ENABLED:
+            return None
+        with self._lock:
+            client, index = self._client, self._index
+            check_due = index is not None and time.monotonic() - self._checked_at > HEALTH_CHECK_INTERVAL_SECONDS
+            if check_due:
+                # Claim the check, other threads keep using the current index meanwhile
+                self._checked_at = time.monotonic()
+        if index is not None and (not check_due or _is_healthy(client)):
+            return index
+        if index is not None:
+            logger.warning(f"meilisearch index {self.uid} is not healthy, reconnecting")
+        session, client, new_index = self._connect()
+        with self._lock:
+            if self._index is not index:
+                # Another thread reconnected meanwhile, keep its handles
+                session.close()
+                return self._index
+            old_session = self._session
+            self._session, self._client, self._index = session, client, new_index
+            self._checked_at = time.monotonic()
+        if old_session is not None:
+            old_session.close()
+        return new_index
+
+    def reset(self) -> None:
+        """Close the session, the next `get` reconnects"""
+        with self._lock:
+            session = self._session
+            self._session, self._client, self._index = None, None, None
+        if session is not None:
+            session.close()
+
+    def _connect(self) -> Tuple[requests.Session, Client, Index]:
+        session = _new_session()
+        client = Client(
+            settings.MEILISEARCH_SERVER_ADDRESS, settings.MEILISEARCH_MASTERKEY, timeout=settings.MEILISEARCH_TIMEOUT
+        )
+        _use_session(client, session)
+        try:
+            index = self._get_or_create_index(client)
+            _use_session(index, session)
+            if not self._settings_applied:
+                index.update_settings(self.index_settings)
+                self._settings_applied = True
+        except Exception:
+            session.close()
+            raise
+        return session, client, index
+
+    def _get_or_create_index(self, client: Client) -> Index:
+        try:
+            return client.get_index(self.uid)
+        except MeilisearchApiError as e:
+            if e.code != "index_not_found":
+                raise
+        logger.info(f"Creating meilisearch index {self.uid}")
+        client.wait_for_task(client.create_index(self.uid, {"primaryKey": "id"}).task_uid)
+        return client.index(self.uid)
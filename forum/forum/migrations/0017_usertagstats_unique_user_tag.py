@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:21
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+COUNTERS = ("questions_by_user", "answers_by_user", "reputation", "reputation_last_month")
+
+
+def merge_duplicate_user_tag_stats(apps, schema_editor):
+    """Keep one stats row per user and tag. Counters updates were applied to every duplicate,
+    so the duplicates hold the same counters, and the largest of each is kept.
+    """
+    UserTagStats = apps.get_model("forum", "UserTagStats")
+    duplicates = (
+        UserTagStats.objects.order_by()
+        .values("user_id", "tag_id")
+        .annotate(count=Count("id"), first_id=Min("id"))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        stats = list(UserTagStats.objects.filter(user_id=duplicate["user_id"], tag_id=duplicate["tag_id"]))
+        kept = next(s for s in stats if s.id == duplicate["first_id"])
+        for field in COUNTERS:
+            setattr(kept, field, max(getattr(s, field) for s in stats))
+        kept.save(update_fields=COUNTERS)
+        UserTagStats.objects.filter(id__in=[s.id for s in stats if s.id != kept.id]).delete()
+
+
+def do_nothing(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("forum", "0016_alter_voteactivity_type"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_user_tag_stats, do_nothing),
+        migrations.AddConstraint(
+            model_name="usertagstats",
+            constraint=models.UniqueConstraint(fields=("user", "tag"), name="unique_user_tag_stats"),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from .base import (
     VotableUserInput,
     Question,
+    QuestionAdditionalData,
     Answer,
     UserInput,
     QuestionView,
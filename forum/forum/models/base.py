@@ -1,5 +1,6 @@
+from collections import defaultdict
 from datetime import timedelta, datetime
-from typing import Optional
+from typing import Dict, Iterable, Optional, Set, Tuple
 
 from constance import config
 from django.conf import settings
@@ -9,17 +10,25 @@ from django.contrib.postgres.indexes import GinIndex
 from django.contrib.postgres.search import SearchVector
 from django.contrib.postgres.search import SearchVectorField
 from django.db import models
-from django.db.models import F, TextField
-from django.db.models.signals import post_save
+from django.db.models import F, TextField, OuterRef, Subquery, Count, Q, Sum
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed, pre_delete
 from django.urls import reverse
 from django.utils import timezone
+from model_utils import FieldTracker
 
 from common.utils import dedent_code
 from forum.apps import logger
+from forum.search_cache import bump_search_generation
 from spaces.models import Space
-from tags.models import Tag
+from tags.models import Tag, TagCooccurrence
 from wiwik_lib.models import Flaggable, Editable, Followable
 from wiwik_lib.utils import CURRENT_SITE
+from wiwik_lib.write_behind import WriteBehindBuffer
+from .stats import UserTagStats
+
+SEARCH_VECTOR_UPDATES = WriteBehindBuffer("search-vector-updates")
+MEILISEARCH_SYNC_QUEUE = WriteBehindBuffer("meilisearch-sync")
 
 
 class Votable(models.Model):
@@ -36,6 +45,54 @@ class Votable(models.Model):
     )
     votes = models.IntegerField(default=0)
 
+    def change_votes(self, change: int) -> None:
+        """Atomically change the votes counter without saving (and signaling) the whole model.
+        :param change: number of votes to add, negative to subtract
+        """
+        self.__class__.objects.filter(pk=self.pk).update(votes=F("votes") + change)
+        self.refresh_from_db(fields=["votes"])
+
+    @classmethod
+    def voters_changed(cls, sender, instance, action, reverse, pk_set, *args, **kwargs):
+        """Change the votes counter by the voters actually added or removed.
+        Django sends post_add only with the voters that were missing. Voters removed (or cleared) are counted
+        among the existing ones before they are deleted, in the same transaction, so a vote sent twice is
+        counted once.
+        """
+        if reverse or action not in {"post_add", "pre_remove", "pre_clear"}:
+            return
+        upvoted = sender is cls.users_upvoted.through
+        m2m_field = (cls.users_upvoted if upvoted else cls.users_downvoted).field
+        if action == "post_add":
+            change = len(pk_set)
+        else:
+            removed = sender.objects.filter(**{m2m_field.m2m_field_name(): instance.pk})
+            if action == "pre_remove":
+                removed = removed.filter(**{f"{m2m_field.m2m_reverse_field_name()}__in": pk_set})
+            change = -removed.count()
+        if change != 0:
+            instance.change_votes(change if upvoted else -change)
+
+    @classmethod
+    def recount_votes(cls) -> int:
+        """Rebuild votes counters of all rows from the users_upvoted/users_downvoted tables.
+        :returns: number of rows updated
+        """
+
+        def voters_count(m2m_field) -> Coalesce:
+            through = m2m_field.through
+            source_field = m2m_field.field.m2m_field_name()
+            voters = (
+                through.objects.filter(**{source_field: OuterRef("pk")})
+                .order_by()
+                .values(source_field)
+                .annotate(count=Count("*"))
+                .values("count")
+            )
+            return Coalesce(Subquery(voters, output_field=models.IntegerField()), 0)
+
+        return cls.objects.update(votes=voters_count(cls.users_upvoted) - voters_count(cls.users_downvoted))
+
 
 class UserInput(Editable):
     """Abstract class to represent 'main' user input, i.e., question and answers (but not comment)."""
@@ -86,9 +143,6 @@ class VotableUserInput(UserInput, Votable):
         abstract = True
 
     def save(self, *args, **kwargs):
-        if self.id is not None:
-            logger.debug(f"`{self.__class__.__name__}:{self.id}`, updating votes before saving")
-            self.votes = self.users_upvoted.count() - self.users_downvoted.count()
         self.content = dedent_code(self.content)
         super(VotableUserInput, self).save(*args, **kwargs)
 
@@ -211,6 +265,7 @@ class Question(VotableUserInput, Flaggable, Followable):
         help_text="Link to post source in its originating platform",
     )
     objects = QuestionManager()
+    tracker = FieldTracker(fields=["title", "content", "has_accepted_answer", "last_activity", "space"])
 
     def __str__(self):
         return f"[{self.id}] {self.title} ({self.author.display_name()})"
@@ -268,10 +323,140 @@ class Question(VotableUserInput, Flaggable, Followable):
     def tag_words(self) -> list[str]:
         return [t.tag_word for t in self.tags.all()]
 
+    def change_votes(self, change: int) -> None:
+        super(Question, self).change_votes(change)
+        Question.sync_search_index([self.pk])
+
     def save(self, *args, **kwargs):
+        created = self.pk is None
+        changed = self.tracker.changed()
         super(Question, self).save(*args, **kwargs)
-        additional_data, _ = QuestionAdditionalData.objects.get_or_create(question=self)
-        additional_data.save()
+        if created or "title" in changed or "content" in changed:
+            self.update_search_vector()
+        if created or changed:
+            Question.sync_search_index([self.pk])
+
+    def update_search_vector(self) -> None:
+        """Recalculate the search vector of the question, its title, content, tags and answers.
+        The update is deferred to `flush_search_vector_updates`, so a burst of changes is calculated once.
+        """
+        if not SEARCH_VECTOR_UPDATES.is_local and SEARCH_VECTOR_UPDATES.add(str(self.pk)):
+            return
+        QuestionAdditionalData.update_search_vectors([self.pk])
+
+    @staticmethod
+    def sync_search_index(question_ids: Iterable[int]) -> None:
+        """Mark questions to be synced to meilisearch, the documents are upserted (or deleted)
+        in batches by `flush_meilisearch_sync`, so a question changed several times is synced once.
+        Does nothing when meilisearch is disabled. When the queue is not available the questions are
+        not synced, rather than calling meilisearch in the request, the next `populate_meilisearch` catches up.
+        """
+        if not settings.MEILISEARCH_ENABLED:
+            return
+        from forum.jobs.populate_meilisearch import flush_meilisearch_sync
+
+        question_ids = set(question_ids)
+        if not MEILISEARCH_SYNC_QUEUE.add(*map(str, question_ids)):
+            logger.warning(f"Could not queue questions {question_ids} to sync to meilisearch, skipping")
+        elif MEILISEARCH_SYNC_QUEUE.is_local:
+            flush_meilisearch_sync()
+
+    @classmethod
+    def tags_changed(cls, sender, instance, action, reverse, pk_set, *args, **kwargs):
+        if action in {"post_add", "post_remove", "pre_clear"}:
+            change = 1 if action == "post_add" else -1
+            changed_tags = cls._changed_tags(instance, action, reverse, pk_set)
+            for changed, current in changed_tags.values():
+                TagCooccurrence.change(changed, current, change)
+            cls._update_user_tag_stats({q_id: changed for q_id, (changed, _) in changed_tags.items()}, change)
+        if action not in {"post_add", "post_remove", "post_clear"}:
+            return
+        if not reverse:
+            instance.update_search_vector()
+            cls.sync_search_index([instance.pk])
+        elif pk_set:
+            for q in cls.objects.filter(pk__in=pk_set).only("id"):
+                q.update_search_vector()
+            cls.sync_search_index(pk_set)
+
+    @classmethod
+    def _changed_tags(
+        cls, instance, action: str, reverse: bool, pk_set: Optional[set]
+    ) -> Dict[int, Tuple[Set[int], Set[int]]]:
+        """Get the tags added/removed by question id, along with all the tags of the question"""
+        if not reverse:
+            current = set(instance.tags.values_list("id", flat=True))
+            changed = current if action == "pre_clear" else set(pk_set)
+            return {instance.pk: (changed, current | changed)}
+        question_ids = instance.question_set.values_list("id", flat=True) if action == "pre_clear" else pk_set
+        question_tags = {question_id: {instance.pk} for question_id in question_ids}
+        for question_id, tag_id in cls.tags.through.objects.filter(question_id__in=question_tags.keys()).values_list(
+            "question_id", "tag_id"
+        ):
+            question_tags[question_id].add(tag_id)
+        return {question_id: ({instance.pk}, tag_ids) for question_id, tag_ids in question_tags.items()}
+
+    @classmethod
+    def _update_user_tag_stats(cls, question_tags: Dict[int, Set[int]], change: int) -> None:
+        """Add (or remove) the questions, their answers and the reputation earned on them
+        to the stats of their users in tags.
+        :param question_tags: tags added to (or removed from) questions, by question id
+        :param change: 1 when tags are added, -1 when removed
+        """
+        question_tags = {question_id: tag_ids for question_id, tag_ids in question_tags.items() if tag_ids}
+        if len(question_tags) == 0:
+            return
+        changes = defaultdict(lambda: defaultdict(int))
+        for question_id, author_id in cls.objects.filter(id__in=question_tags.keys()).values_list("id", "author_id"):
+            for tag_id in question_tags[question_id]:
+                changes[(author_id, tag_id)]["questions_by_user"] += change
+        answers_qs = (
+            Answer.objects.filter(question_id__in=question_tags.keys())
+            .order_by()
+            .values("question_id", "author_id")
+            .annotate(count=Count("id"))
+            .values_list("question_id", "author_id", "count")
+        )
+        for question_id, author_id, count in answers_qs:
+            for tag_id in question_tags[question_id]:
+                changes[(author_id, tag_id)]["answers_by_user"] += change * count
+        reputation_qs = (
+            cls.objects.filter(id__in=question_tags.keys(), voteactivity__reputation_change__isnull=False)
+            .order_by()
+            .values("id", "voteactivity__target_id")
+            .annotate(
+                reputation=Sum("voteactivity__reputation_change"),
+                reputation_last_month=Sum(
+                    "voteactivity__reputation_change",
+                    filter=Q(voteactivity__created_at__gte=timezone.now() - timedelta(days=30)),
+                ),
+            )
+            .values_list("id", "voteactivity__target_id", "reputation", "reputation_last_month")
+        )
+        for question_id, target_id, reputation, reputation_last_month in reputation_qs:
+            for tag_id in question_tags[question_id]:
+                changes[(target_id, tag_id)]["reputation"] += change * reputation
+                changes[(target_id, tag_id)]["reputation_last_month"] += change * (reputation_last_month or 0)
+        UserTagStats.apply_changes(changes)
+
+    @classmethod
+    def pre_remove(cls, sender, instance, *args, **kwargs):
+        tag_ids = set(instance.tags.values_list("id", flat=True))
+        TagCooccurrence.change(tag_ids, tag_ids, -1)
+        cls._update_user_tag_stats({instance.pk: tag_ids}, -1)
+        # The stats above include the reputation of the question votes. Remove the tags now, so the
+        # vote activities deleted by the cascade find no tags and do not remove it a second time,
+        # whatever the order the cascade deletes them in.
+        cls.tags.through.objects.filter(question_id=instance.pk).delete()
+
+    def touch_last_activity(self, when: Optional[datetime] = None) -> None:
+        """Update last activity on the question using a single UPDATE query.
+        Unlike save(), it does not trigger the question signals or recalculate the search vector.
+        :param when: time of the activity, defaults to now
+        """
+        self.last_activity = when or timezone.now()
+        Question.objects.filter(pk=self.pk).update(last_activity=self.last_activity)
+        Question.sync_search_index([self.pk])
 
     def user_can_delete(self, user) -> bool:
         return self.author == user or user.is_staff or user.is_moderator
@@ -298,6 +483,22 @@ class QuestionAdditionalData(models.Model):
         self.search_vector = instance.document
         super(QuestionAdditionalData, self).save(*args, **kwargs)
 
+    @classmethod
+    def update_search_vectors(cls, question_ids: list[int]) -> int:
+        """Recalculate the search vectors of questions with a single UPDATE query,
+        creating the missing rows first.
+        :param question_ids: questions to update, ids of deleted questions are ignored
+        :returns: number of search vectors updated
+        """
+        missing = Question.objects.filter(id__in=question_ids, additional_data__isnull=True).values_list(
+            "id", flat=True
+        )
+        cls.objects.bulk_create([cls(question_id=question_id) for question_id in missing], ignore_conflicts=True)
+        document = Question.objects.with_documents().filter(id=OuterRef("question_id")).values("document")[:1]
+        count = cls.objects.filter(question_id__in=question_ids).update(search_vector=Subquery(document))
+        bump_search_generation()
+        return count
+
 
 class Answer(VotableUserInput, Flaggable):
     """Class to represent an answer to a question in the forum"""
@@ -309,6 +510,8 @@ class Answer(VotableUserInput, Flaggable):
     def __str__(self):
         return f"[Ans{self.id} to Q{self.question_id}] {self.question.title} ({self.author.display_name()})"
 
+    tracker = FieldTracker(fields=["content"])
+
     class Meta:
         order_with_respect_to = "question"
 
@@ -332,22 +535,44 @@ class Answer(VotableUserInput, Flaggable):
     def get_answer(self) -> Optional["Answer"]:
         return self
 
+    def _update_question(
+        self, answers_count_change: int, last_activity: datetime, content_changed: bool, **fields
+    ) -> None:
+        """Update the question counters and last activity without saving the question,
+        the question in memory is updated as well.
+        """
+        q = self.question
+        q.answers_count += answers_count_change
+        q.last_activity = last_activity
+        for field, value in fields.items():
+            setattr(q, field, value)
+        Question.objects.filter(pk=q.pk).update(
+            answers_count=F("answers_count") + answers_count_change,
+            last_activity=last_activity,
+            **fields,
+        )
+        if content_changed:
+            q.update_search_vector()
+        Question.sync_search_index([q.pk])
+
+    def _update_user_tag_stats(self, change: int) -> None:
+        tag_ids = Question.tags.through.objects.filter(question_id=self.question_id).values_list("tag_id", flat=True)
+        UserTagStats.apply_changes({(self.author_id, tag_id): dict(answers_by_user=change) for tag_id in tag_ids})
+
     def save(self, *args, **kwargs) -> None:
-        if self.id is None:  # New answer, increase counter
-            self.question.answers_count += 1
+        created = self.id is None
+        content_changed = created or self.tracker.has_changed("content")
         super(Answer, self).save(*args, **kwargs)
-        if self.is_accepted:
-            self.question.has_accepted_answer = True
-        self.question.last_activity = self.updated_at
-        self.question.save()
+        fields = dict(has_accepted_answer=True) if self.is_accepted else dict()
+        self._update_question(1 if created else 0, self.updated_at, content_changed, **fields)
+        if created:
+            self._update_user_tag_stats(1)
 
     def delete(self, using=None, keep_parents=False):
         super(Answer, self).delete()
-        self.question.answers_count -= 1
-        if self.is_accepted:
-            self.question.has_accepted_answer = False
-        self.question.last_activity = timezone.now()
-        self.question.save()
+        fields = dict(has_accepted_answer=False) if self.is_accepted else dict()
+        self._update_question(-1, timezone.now(), True, **fields)
+        self._update_user_tag_stats(-1)
 
 
 class QuestionView(models.Model):
@@ -375,13 +600,9 @@ class QuestionView(models.Model):
     def __str__(self):
         return f"QuestionView[q={self.question_id},u={self.author.username},t={self.created_at.isoformat()}]"
 
-    @classmethod
-    def post_create(cls, sender, instance, created, *args, **kwargs):
-        if not created:
-            return
-        instance.question.views += 1
-        instance.question.save()
-        logger.debug(f"Create {instance.__str__()}")
-
 
-post_save.connect(QuestionView.post_create, sender=QuestionView)
+m2m_changed.connect(Question.tags_changed, sender=Question.tags.through)
+pre_delete.connect(Question.pre_remove, sender=Question)
+for votable in (Question, Answer):
+    m2m_changed.connect(votable.voters_changed, sender=votable.users_upvoted.through)
+    m2m_changed.connect(votable.voters_changed, sender=votable.users_downvoted.through)
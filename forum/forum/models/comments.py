@@ -38,9 +38,7 @@ class Comment(Flaggable):
         update_last_activity = self.id is None
         super(Comment, self).save(*args, **kwargs)
         if update_last_activity:
-            q = self.get_question()
-            q.last_activity = self.created_at
-            q.save()
+            self.get_question().touch_last_activity(self.created_at)
 
     def get_author(self) -> settings.AUTH_USER_MODEL:
         return self.author
@@ -46,9 +46,9 @@ class QuestionBookmark(models.Model):
     def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
         super(QuestionBookmark, self).save(force_insert, force_update, using, update_fields)
         self.user.bookmarks_count = QuestionBookmark.objects.filter(user=self.user).count()
-        self.user.save()
+        self.user.save(update_fields=["bookmarks_count"])
 
     def delete(self, using=None, keep_parents=False):
         super(QuestionBookmark, self).delete(using, keep_parents)
         self.user.bookmarks_count = QuestionBookmark.objects.filter(user=self.user).count()
-        self.user.save()
+        self.user.save(update_fields=["bookmarks_count"])
@@ -1,11 +1,17 @@
+from collections import defaultdict
+from typing import Dict, Tuple
+
 from django.conf import settings
 from django.db import models
+from django.db.models import F, Q
 
 from wiwik_lib.advanced_model_manager import AdvancedModelManager
 from wiwik_lib.models import user_model_defer_fields
 
 
 class UserTagStats(models.Model):
+    COUNTERS = ("questions_by_user", "answers_by_user", "reputation", "reputation_last_month")
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     tag = models.ForeignKey("tags.Tag", on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True, blank=True, null=True)
@@ -32,9 +38,41 @@ class UserTagStats(models.Model):
         deferred_fields=user_model_defer_fields("user"),
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "tag"], name="unique_user_tag_stats"),
+        ]
+
     def __str__(self):
         return (
             f"UserTagStats[{self.user.username} - {self.tag.tag_word}] "
             f"#q={self.questions_by_user}, #a={self.answers_by_user}, "
             f"rep={self.reputation}, rep_month={self.reputation_last_month}"
         )
+
+    @classmethod
+    def apply_changes(cls, changes: Dict[Tuple[int, int], Dict[str, int]]) -> None:
+        """Atomically add changes to the counters of users in tags, missing stats are created
+        and stats left without questions, answers or reputation are deleted.
+        :param changes: counter changes (i.e., answers_by_user=1) by (user_id, tag_id)
+        """
+        changes = {pair: values for pair, values in changes.items() if any(values.values())}
+        if len(changes) == 0:
+            return
+        pairs_q = Q()
+        for user_id, tag_id in changes.keys():
+            pairs_q |= Q(user_id=user_id, tag_id=tag_id)
+        cls.objects.bulk_create(
+            [cls(user_id=user_id, tag_id=tag_id) for user_id, tag_id in changes.keys()],
+            ignore_conflicts=True,
+        )
+        # A single update for all pairs with the same changes, e.g., all tags of a question
+        pairs_by_values = defaultdict(list)
+        for pair, values in changes.items():
+            pairs_by_values[tuple(sorted((k, v) for k, v in values.items() if v != 0))].append(pair)
+        for values, pairs in pairs_by_values.items():
+            values_q = Q()
+            for user_id, tag_id in pairs:
+                values_q |= Q(user_id=user_id, tag_id=tag_id)
+            cls.objects.filter(values_q).update(**{field: F(field) + change for field, change in values})
+        cls.objects.filter(pairs_q, **{field: 0 for field in cls.COUNTERS}).delete()
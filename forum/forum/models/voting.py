@@ -1,10 +1,17 @@
 from datetime import timedelta
+from typing import Dict
 
+from constance import config
 from django.conf import settings
 from django.db import models
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
 from django.utils import timezone
 
+from userauth.models import ForumUser
 from wiwik_lib.advanced_model_manager import AdvancedModelManager
+from .base import Question
+from .stats import UserTagStats
 
 
 class VoteActivity(models.Model):
@@ -109,13 +116,64 @@ class VoteActivity(models.Model):
             section = "Older"
         return section
 
+    @classmethod
+    def reputation_changes(cls) -> Dict[str, int]:
+        """Get the reputation change of activity types changing reputation, as configured"""
+        return {
+            cls.ActivityType.EDITED: config.EDITED_CHANGE,
+            cls.ActivityType.UPVOTE: config.UPVOTE_CHANGE,
+            cls.ActivityType.DOWNVOTE: config.DOWNVOTE_CHANGE,
+            cls.ActivityType.ACCEPT: config.ACCEPT_ANSWER_CHANGE,
+            cls.ActivityType.ACCEPT_OLD: config.ACCEPT_ANSWER_OLD_QUESTION_CHANGE,
+        }
+
     def save(self, *args, **kwargs):
         update_last_activity = self.id is None
         super(VoteActivity, self).save(*args, **kwargs)
         if update_last_activity and (self.question or self.answer):
             q = self.question or self.answer.get_question()
-            q.last_activity = self.created_at
-            q.save()
+            q.touch_last_activity(self.created_at)
+
+    def _apply_reputation_change(self, change: int) -> None:
+        """Atomically apply a reputation delta on the target user, keeping a cached target instance in sync"""
+        ForumUser.objects.filter(pk=self.target_id).update(reputation_score=F("reputation_score") + change)
+        if VoteActivity.target.is_cached(self):
+            self.target.reputation_score = (
+                ForumUser.objects.filter(pk=self.target_id).values_list("reputation_score", flat=True).first() or 0
+            )
+
+    def _apply_user_tag_stats_change(self, change: int, change_last_month: int) -> None:
+        """Apply a reputation delta on the target user stats in the tags of the question"""
+        if self.question_id is None:
+            return
+        tag_ids = Question.tags.through.objects.filter(question_id=self.question_id).values_list("tag_id", flat=True)
+        UserTagStats.apply_changes(
+            {
+                (self.target_id, tag_id): dict(reputation=change, reputation_last_month=change_last_month)
+                for tag_id in tag_ids
+            }
+        )
+
+    @classmethod
+    def post_create(cls, sender, instance, created, *args, **kwargs):
+        if not created or not instance.reputation_change:
+            return
+        instance._apply_reputation_change(instance.reputation_change)
+        instance._apply_user_tag_stats_change(instance.reputation_change, instance.reputation_change)
+
+    @classmethod
+    def post_remove(cls, sender, instance, *args, **kwargs):
+        if not instance.reputation_change:
+            return
+        instance._apply_reputation_change(-instance.reputation_change)
+        in_last_month = instance.created_at >= timezone.now() - timedelta(days=30)
+        instance._apply_user_tag_stats_change(
+            -instance.reputation_change, -instance.reputation_change if in_last_month else 0
+        )
+
+
+post_save.connect(VoteActivity.post_create, sender=VoteActivity)
+post_delete.connect(VoteActivity.post_remove, sender=VoteActivity)
 
 
 class SearchRecord(models.Model):
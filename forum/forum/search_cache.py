@@ -0,0 +1,64 @@
+import hashlib
+import time
+from typing import Callable, List, Optional
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db.models import QuerySet
+
+from forum.apps import logger
+
+SEARCH_GENERATION_CACHE_KEY = "search:generation"
+SEARCH_RESULTS_MAX = 1000
+CACHE_TIMEOUT = 5 * 60
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a search query so queries that differ only by whitespace share cached results.
+    Case is kept, operator values such as `resolved:yes` are case-sensitive.
+    """
+    return " ".join(query.split())
+
+
+def _generation() -> int:
+    return cache.get_or_set(SEARCH_GENERATION_CACHE_KEY, time.time_ns, None)
+
+
+def bump_search_generation() -> None:
+    """Invalidate cached search results, called when questions are indexed"""
+    try:
+        cache.incr(SEARCH_GENERATION_CACHE_KEY)
+    except ValueError:
+        cache.set(SEARCH_GENERATION_CACHE_KEY, time.time_ns(), None)
+
+
+def _search_results_cache_key(base_queryset: QuerySet, query: str) -> Optional[str]:
+    try:
+        filters = str(base_queryset.query)
+    except EmptyResultSet:
+        return None
+    digest = hashlib.sha1(f"{filters}|{normalize_query(query)}".encode()).hexdigest()
+    return f"search:ids:{_generation()}:{digest}"
+
+
+def search_question_ids(
+    base_queryset: QuerySet, query: str, query_method: Callable[[QuerySet, str], QuerySet]
+) -> List[int]:
+    """Ids of the questions matching a query, ordered by relevance.
+    Results are cached by the query and the filters of the base queryset, until questions are indexed.
+    Only the first SEARCH_RESULTS_MAX results are kept, matches beyond are not listed.
+    :param base_queryset: questions to search in
+    :param query: query as entered by the user
+    :param query_method: method searching the base queryset when results are not cached
+    :returns: ids of the first SEARCH_RESULTS_MAX results
+    """
+    key = _search_results_cache_key(base_queryset, query)
+    cached = cache.get(key) if key is not None else None
+    if cached is not None:
+        return cached
+    qs = query_method(base_queryset, query)
+    question_ids = list(qs.values_list("id", flat=True)[:SEARCH_RESULTS_MAX])
+    if key is not None:
+        cache.set(key, question_ids, CACHE_TIMEOUT)
+    logger.debug(f'Search "{query}" found {len(question_ids)} results')
+    return question_ids
@@ -0,0 +1,126 @@
+from unittest import mock
+
+import fakeredis
+from django.test import override_settings
+from meilisearch.errors import MeilisearchCommunicationError, MeilisearchTimeoutError
+
+from forum.jobs import flush_meilisearch_sync
+from forum.models.base import MEILISEARCH_SYNC_QUEUE
+from forum.tests.base import ForumApiTestCase
+from forum.views import utils
+
+
+@mock.patch("scheduler.helpers.queues.getters._get_connection", return_value=fakeredis.FakeStrictRedis())
+class TestFlushMeilisearchSync(ForumApiTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.question = utils.create_question(cls.users[0], cls.title, cls.question_content, ",".join(cls.tags))
+
+    def setUp(self):
+        super().setUp()
+        MEILISEARCH_SYNC_QUEUE.drain()
+        self.enterContext(override_settings(MEILISEARCH_ENABLED=True))
+        self.index = mock.MagicMock()
+        self.enterContext(mock.patch("forum.jobs.populate_meilisearch._get_meilisearch_index", return_value=self.index))
+
+    def synced_docs(self) -> list:
+        return [doc for call in self.index.add_documents.call_args_list for doc in call.args[0]]
+
+    def test_title_changed__synced_once_on_flush(self, conn):
+        self.question.title = "new title"
+        self.question.save()
+        self.question.title = "newer title"
+        self.question.save()
+        self.index.add_documents.assert_not_called()
+        # act
+        res = flush_meilisearch_sync()
+        # assert
+        self.assertEqual(1, res)
+        self.assertEqual(1, self.index.add_documents.call_count)
+        self.assertEqual(["newer title"], [doc["title"] for doc in self.synced_docs()])
+        self.assertEqual(0, flush_meilisearch_sync())
+
+    def test_unindexed_field_changed__not_synced(self, conn):
+        self.question.views += 1
+        self.question.save()
+        # act
+        res = flush_meilisearch_sync()
+        # assert
+        self.assertEqual(0, res)
+        self.index.add_documents.assert_not_called()
+
+    def test_answer_created__synced_on_flush(self, conn):
+        utils.create_answer(self.answer_content, self.users[1], self.question)
+        # act
+        res = flush_meilisearch_sync()
+        # assert
+        self.assertEqual(1, res)
+        self.assertEqual([self.question.id], [doc["id"] for doc in self.synced_docs()])
+
+    def test_question_upvoted__synced_on_flush(self, conn):
+        utils.upvote(self.users[1], self.question)
+        # act
+        res = flush_meilisearch_sync()
+        # assert
+        self.assertEqual(1, res)
+        self.assertEqual([1], [doc["votes"] for doc in self.synced_docs()])
+
+    def test_tags_changed__synced_on_flush(self, conn):
+        utils.create_answer(self.answer_content, self.users[1], self.question)
+        flush_meilisearch_sync()
+        self.index.reset_mock()
+        # act
+        self.question.tags.clear()
+        res = flush_meilisearch_sync()
+        # assert
+        self.assertEqual(1, res)
+        self.assertEqual([[]], [doc["tags"] for doc in self.synced_docs()])
+
+    def test_question_deleted__deleted_on_flush(self, conn):
+        q = utils.create_question(self.users[0], self.title, self.question_content, ",".join(self.tags))
+        q_id = q.id
+        q.delete()
+        # act
+        res = flush_meilisearch_sync()
+        # assert
+        self.assertEqual(1, res)
+        self.index.add_documents.assert_not_called()
+        self.index.delete_documents.assert_called_once_with([q_id])
+
+    def test_meilisearch_unreachable__requeued(self, conn):
+        self.question.title = "title while unreachable"
+        self.question.save()
+        self.index.add_documents.side_effect = MeilisearchCommunicationError("unreachable")
+        # act
+        with self.assertRaises(MeilisearchCommunicationError):
+            flush_meilisearch_sync()
+        # assert
+        self.assertEqual({str(self.question.id)}, MEILISEARCH_SYNC_QUEUE.drain())
+
+    def test_meilisearch_timeout__requeued(self, conn):
+        self.question.title = "title while timing out"
+        self.question.save()
+        self.index.add_documents.side_effect = MeilisearchTimeoutError("timeout")
+        # act
+        with self.assertRaises(MeilisearchTimeoutError):
+            flush_meilisearch_sync()
+        # assert
+        self.assertEqual({str(self.question.id)}, MEILISEARCH_SYNC_QUEUE.drain())
+
+    def test_queue_unavailable__not_synced_in_request(self, conn):
+        # act
+        with mock.patch.object(MEILISEARCH_SYNC_QUEUE, "add", return_value=False):
+            self.question.title = "title while redis is down"
+            self.question.save()
+        # assert
+        self.index.add_documents.assert_not_called()
+        self.index.delete_documents.assert_not_called()
+
+    @override_settings(RUN_ASYNC_JOBS_SYNC=True)
+    def test_jobs_run_sync__synced_immediately(self, conn):
+        # act
+        self.question.title = "new title"
+        self.question.save()
+        # assert
+        self.assertEqual(["new title"], [doc["title"] for doc in self.synced_docs()])
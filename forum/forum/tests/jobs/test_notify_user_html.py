@@ -33,6 +33,20 @@ class TestUsersAutocompleteView(ForumApiTestCase):
         self.assertIsNotNone(self.user.last_email_datetime)
         mock.assert_called_once()
 
+    @patch("django.core.mail.EmailMessage.send")
+    def test_notify_user_email__stale_user__reputation_kept(self, mock):
+        # arrange
+        self.user.email_notifications = True
+        self.user.last_email_datetime = None
+        self.user.save()
+        ForumUser.objects.filter(id=self.user.id).update(reputation_score=10)
+        # act
+        jobs.notify_user_email(self.user, self.subject, self.text, self.html, True)
+        # assert
+        self.user.refresh_from_db()
+        self.assertEqual(10, self.user.reputation_score)
+        self.assertIsNotNone(self.user.last_email_datetime)
+
     @patch("forum.jobs.notify_user.send_email_async")
     def test_notify_user_email__user_email_notifications_off__not_sending(self, mock):
         # arrange
@@ -0,0 +1,67 @@
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from forum.jobs import populate_meilisearch
+from forum.tests.base import ForumApiTestCase
+from forum.views import utils
+
+
+class TestPopulateMeilisearch(ForumApiTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.questions = [
+            utils.create_question(cls.users[i % 3], f"{cls.title} {i}", cls.question_content, f"tag{i % 2},tag2")
+            for i in range(5)
+        ]
+        utils.create_answer(cls.answer_content, cls.users[1], cls.questions[0])
+
+    def _index_mock(self, status: str = "succeeded") -> mock.MagicMock:
+        index = mock.MagicMock()
+        index.wait_for_task.return_value = mock.MagicMock(status=status, error=None)
+        return index
+
+    def test_populate_meilisearch__batches_documents(self):
+        index = self._index_mock()
+        # act
+        with mock.patch("forum.jobs.populate_meilisearch._get_meilisearch_index", return_value=index):
+            res = populate_meilisearch(batch_size=2)
+        # assert
+        self.assertEqual(5, res)
+        self.assertEqual(3, index.add_documents.call_count)
+        self.assertEqual(3, index.wait_for_task.call_count)
+        docs = [doc for call in index.add_documents.call_args_list for doc in call.args[0]]
+        self.assertEqual([q.id for q in self.questions], [doc["id"] for doc in docs])
+        self.assertEqual(["tag0", "tag2"], sorted(docs[0]["tags"]))
+        self.assertEqual([self.answer_content], docs[0]["answers"])
+        self.assertEqual(self.users[0].username, docs[0]["author"])
+        self.assertIsNone(docs[0]["space"])
+
+    def test_populate_meilisearch__queries_independent_of_number_of_questions(self):
+        index = self._index_mock()
+        with mock.patch("forum.jobs.populate_meilisearch._get_meilisearch_index", return_value=index):
+            with CaptureQueriesContext(connection) as ctx:
+                populate_meilisearch()
+            # act
+            utils.create_question(self.users[0], self.title, self.question_content, "tag3,tag4")
+            with CaptureQueriesContext(connection) as ctx_more:
+                populate_meilisearch()
+        # assert
+        self.assertEqual(len(ctx.captured_queries), len(ctx_more.captured_queries))
+
+    def test_populate_meilisearch__task_failed__not_counted(self):
+        index = self._index_mock(status="failed")
+        # act
+        with mock.patch("forum.jobs.populate_meilisearch._get_meilisearch_index", return_value=index):
+            res = populate_meilisearch()
+        # assert
+        self.assertEqual(0, res)
+        self.assertEqual(1, index.add_documents.call_count)
+
+    def test_populate_meilisearch__meilisearch_disabled__nothing_indexed(self):
+        # act
+        res = populate_meilisearch()
+        # assert
+        self.assertEqual(0, res)
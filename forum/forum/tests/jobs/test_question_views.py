@@ -0,0 +1,57 @@
+from unittest import mock
+
+import fakeredis
+from django.test import override_settings
+
+from forum import models
+from forum.jobs import flush_question_views
+from forum.jobs.question_views import record_question_view, QUESTION_VIEWS_BUFFER
+from forum.tests.base import ForumApiTestCase
+from forum.views import utils
+
+
+@mock.patch("scheduler.helpers.queues.getters._get_connection", return_value=fakeredis.FakeStrictRedis())
+class TestFlushQuestionViews(ForumApiTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.question = utils.create_question(cls.users[0], cls.title, cls.question_content, ",".join(cls.tags))
+
+    def setUp(self):
+        super().setUp()
+        QUESTION_VIEWS_BUFFER.drain()
+
+    def test_record_views__written_on_flush(self, conn):
+        record_question_view(self.users[1], self.question)
+        record_question_view(self.users[1], self.question)
+        record_question_view(self.users[2], self.question)
+        self.question.refresh_from_db()
+        self.assertEqual(0, self.question.views)
+        self.assertEqual(0, models.QuestionView.objects.count())
+        # act
+        res = flush_question_views()
+        # assert
+        self.assertEqual(2, res)
+        self.question.refresh_from_db()
+        self.assertEqual(2, self.question.views)
+        self.assertEqual(2, models.QuestionView.objects.filter(question=self.question).count())
+        self.assertEqual(0, flush_question_views())
+
+    def test_record_view__question_deleted_before_flush__ignored(self, conn):
+        q = utils.create_question(self.users[0], self.title, self.question_content, ",".join(self.tags))
+        record_question_view(self.users[1], q)
+        q.delete()
+        # act
+        res = flush_question_views()
+        # assert
+        self.assertEqual(0, res)
+        self.assertEqual(0, models.QuestionView.objects.count())
+
+    @override_settings(RUN_ASYNC_JOBS_SYNC=True)
+    def test_record_view__jobs_run_sync__written_immediately(self, conn):
+        # act
+        record_question_view(self.users[1], self.question)
+        # assert
+        self.question.refresh_from_db()
+        self.assertEqual(1, self.question.views)
+        self.assertEqual(1, models.QuestionView.objects.filter(question=self.question).count())
@@ -0,0 +1,61 @@
+from unittest import mock
+
+from constance import config
+
+from forum import models
+from forum.jobs import recalculate_user_reputation_score
+from forum.tests.base import ForumApiTestCase
+from forum.views import utils
+
+
+class TestRecalculateUserReputationScore(ForumApiTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.question = utils.create_question(cls.users[0], cls.title, cls.question_content, ",".join(cls.tags))
+        cls.answer = utils.create_answer(cls.answer_content, cls.users[1], cls.question)
+
+    def setUp(self):
+        super().setUp()
+        self.upvote_change = config.UPVOTE_CHANGE
+
+    def tearDown(self):
+        super().tearDown()
+        config.UPVOTE_CHANGE = self.upvote_change
+
+    def test_upvote_change_configured__reputation_recalculated(self):
+        utils.upvote(self.users[1], self.question)
+        utils.upvote(self.users[2], self.question)
+        utils.upvote(self.users[0], self.answer)
+        utils.downvote(self.users[2], self.answer)
+        config.UPVOTE_CHANGE = self.upvote_change + 5
+        # act
+        res = recalculate_user_reputation_score()
+        # assert
+        self.assertEqual(2, res)
+        self.assertEqual(
+            3,
+            models.VoteActivity.objects.filter(
+                type=models.VoteActivity.ActivityType.UPVOTE, reputation_change=config.UPVOTE_CHANGE
+            ).count(),
+        )
+        self.users[0].refresh_from_db()
+        self.users[1].refresh_from_db()
+        self.assertEqual(2 * config.UPVOTE_CHANGE, self.users[0].reputation_score)
+        self.assertEqual(config.UPVOTE_CHANGE + config.DOWNVOTE_CHANGE, self.users[1].reputation_score)
+        stats = models.UserTagStats.objects.get(user=self.users[0])
+        self.assertEqual(2 * config.UPVOTE_CHANGE, stats.reputation)
+        self.assertEqual(2 * config.UPVOTE_CHANGE, stats.reputation_last_month)
+
+    def test_run_by_worker__progress_reported(self):
+        utils.upvote(self.users[1], self.question)
+        current_job = mock.MagicMock(meta=dict())
+        # act
+        with (
+            mock.patch("forum.jobs.base.get_current_job", return_value=current_job),
+            mock.patch("forum.jobs.base.get_queue"),
+        ):
+            recalculate_user_reputation_score()
+        # assert
+        self.assertEqual(len(models.VoteActivity.reputation_changes()) + 2, current_job.set_field.call_count)
+        self.assertEqual(dict(step="Updated users tag stats", progress=1), current_job.meta)
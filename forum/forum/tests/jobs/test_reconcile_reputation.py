@@ -0,0 +1,55 @@
+from constance import config
+
+from forum.jobs import reconcile_users_reputation
+from forum.tests.base import ForumApiTestCase
+from forum.views import utils
+from userauth.models import ForumUser
+
+
+class TestReconcileUsersReputation(ForumApiTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.question = utils.create_question(cls.users[0], cls.title, cls.question_content, ",".join(cls.tags))
+        cls.answer = utils.create_answer(cls.answer_content, cls.users[1], cls.question)
+
+    def test_vote__updates_reputation_incrementally(self):
+        # act
+        utils.upvote(self.users[1], self.question)
+        utils.upvote(self.users[2], self.question)
+        utils.downvote(self.users[0], self.answer)
+        # assert
+        self.users[0].refresh_from_db()
+        self.users[1].refresh_from_db()
+        self.assertEqual(2 * config.UPVOTE_CHANGE, self.users[0].reputation_score)
+        self.assertEqual(config.DOWNVOTE_CHANGE, self.users[1].reputation_score)
+
+    def test_undo_vote__reverts_reputation(self):
+        utils.upvote(self.users[1], self.question)
+        # act
+        utils.undo_upvote(self.users[1], self.question)
+        # assert
+        self.users[0].refresh_from_db()
+        self.assertEqual(0, self.users[0].reputation_score)
+
+    def test_reconcile__no_drift__nothing_repaired(self):
+        utils.upvote(self.users[1], self.question)
+        # act
+        res = reconcile_users_reputation()
+        # assert
+        self.assertEqual(0, res)
+
+    def test_reconcile__drift__repaired(self):
+        utils.upvote(self.users[1], self.question)
+        utils.upvote(self.users[0], self.answer)
+        ForumUser.objects.filter(pk__in=[self.users[0].pk, self.users[2].pk]).update(reputation_score=1234)
+        # act
+        res = reconcile_users_reputation()
+        # assert
+        self.assertEqual(2, res)
+        self.users[0].refresh_from_db()
+        self.users[1].refresh_from_db()
+        self.users[2].refresh_from_db()
+        self.assertEqual(config.UPVOTE_CHANGE, self.users[0].reputation_score)
+        self.assertEqual(config.UPVOTE_CHANGE, self.users[1].reputation_score)
+        self.assertEqual(0, self.users[2].reputation_score)
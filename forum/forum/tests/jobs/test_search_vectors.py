@@ -0,0 +1,61 @@
+from unittest import mock
+
+import fakeredis
+
+from forum import models
+from forum.jobs import flush_search_vector_updates
+from forum.models.base import SEARCH_VECTOR_UPDATES
+from forum.tests.base import ForumApiTestCase
+from forum.views import utils
+
+
+@mock.patch("scheduler.helpers.queues.getters._get_connection", return_value=fakeredis.FakeStrictRedis())
+class TestFlushSearchVectorUpdates(ForumApiTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.question = utils.create_question(cls.users[0], cls.title, cls.question_content, ",".join(cls.tags))
+
+    def setUp(self):
+        super().setUp()
+        SEARCH_VECTOR_UPDATES.drain()
+
+    def search_vector(self) -> str:
+        return models.QuestionAdditionalData.objects.get(question=self.question).search_vector
+
+    def test_title_changed__search_vector_updated_on_flush(self, conn):
+        self.question.title = "new title"
+        self.question.save()
+        self.question.title = "newer title"
+        self.question.save()
+        self.assertEqual(self.title, self.search_vector())
+        # act
+        res = flush_search_vector_updates()
+        # assert
+        self.assertEqual(1, res)
+        self.assertEqual("newer title", self.search_vector())
+        self.assertEqual(0, flush_search_vector_updates())
+
+    def test_unindexed_field_changed__search_vector_not_updated(self, conn):
+        self.question.views += 1
+        self.question.save()
+        # act
+        res = flush_search_vector_updates()
+        # assert
+        self.assertEqual(0, res)
+
+    def test_answer_created__search_vector_updated_on_flush(self, conn):
+        utils.create_answer(self.answer_content, self.users[1], self.question)
+        # act
+        res = flush_search_vector_updates()
+        # assert
+        self.assertEqual(1, res)
+
+    def test_answer_accepted__search_vector_not_updated(self, conn):
+        answer = utils.create_answer(self.answer_content, self.users[1], self.question)
+        flush_search_vector_updates()
+        # act
+        utils.accept_answer(answer)
+        res = flush_search_vector_updates()
+        # assert
+        self.assertEqual(0, res)
@@ -0,0 +1,142 @@
+from datetime import timedelta
+
+from constance import config
+from django.utils import timezone
+
+from forum import models
+from forum.jobs import rebuild_user_tag_stats, update_user_tag_stats_last_month
+from forum.tests.base import ForumApiTestCase
+from forum.views import utils
+
+
+class TestUserTagStats(ForumApiTestCase):
+    tags = ["tag1", "tag2"]
+
+    def _stats(self) -> dict:
+        return {
+            (s.user.username, s.tag.tag_word): (
+                s.questions_by_user,
+                s.answers_by_user,
+                s.reputation,
+                s.reputation_last_month,
+            )
+            for s in models.UserTagStats.objects.all()
+        }
+
+    def test_question_answer_and_votes__stats_updated(self):
+        # act
+        q = utils.create_question(self.users[0], self.title, self.question_content, ",".join(self.tags))
+        answer = utils.create_answer(self.answer_content, self.users[1], q)
+        utils.upvote(self.users[2], q)
+        utils.upvote(self.users[2], answer)
+        # assert
+        rep = config.UPVOTE_CHANGE
+        self.assertEqual(
+            {
+                (self.users[0].username, "tag1"): (1, 0, rep, rep),
+                (self.users[0].username, "tag2"): (1, 0, rep, rep),
+                (self.users[1].username, "tag1"): (0, 1, rep, rep),
+                (self.users[1].username, "tag2"): (0, 1, rep, rep),
+            },
+            self._stats(),
+        )
+
+    def test_undo_vote_and_delete_answer__stats_removed(self):
+        q = utils.create_question(self.users[0], self.title, self.question_content, ",".join(self.tags))
+        answer = utils.create_answer(self.answer_content, self.users[1], q)
+        utils.upvote(self.users[2], q)
+        # act
+        utils.undo_upvote(self.users[2], q)
+        utils.delete_answer(answer)
+        # assert
+        self.assertEqual(
+            {
+                (self.users[0].username, "tag1"): (1, 0, 0, 0),
+                (self.users[0].username, "tag2"): (1, 0, 0, 0),
+            },
+            self._stats(),
+        )
+
+    def test_update_question_tags__stats_moved_to_new_tags(self):
+        q = utils.create_question(self.users[0], self.title, self.question_content, ",".join(self.tags))
+        utils.create_answer(self.answer_content, self.users[1], q)
+        utils.upvote(self.users[2], q)
+        # act
+        utils.update_question(self.users[0], q, q.title, q.content, "tag1,tag3")
+        # assert
+        rep = config.UPVOTE_CHANGE
+        self.assertEqual(
+            {
+                (self.users[0].username, "tag1"): (1, 0, rep, rep),
+                (self.users[0].username, "tag3"): (1, 0, rep, rep),
+                (self.users[1].username, "tag1"): (0, 1, 0, 0),
+                (self.users[1].username, "tag3"): (0, 1, 0, 0),
+            },
+            self._stats(),
+        )
+
+    def test_delete_question__stats_removed(self):
+        q = utils.create_question(self.users[0], self.title, self.question_content, ",".join(self.tags))
+        utils.create_answer(self.answer_content, self.users[1], q)
+        utils.upvote(self.users[2], q)
+        # act
+        utils.delete_question(q)
+        # assert
+        self.assertEqual(0, models.UserTagStats.objects.count())
+
+    def test_delete_question__vote_activities_deleted_before_tags__reputation_removed_once(self):
+        q = utils.create_question(self.users[0], self.title, self.question_content, ",".join(self.tags))
+        utils.upvote(self.users[2], q)
+        # act
+        models.Question.pre_remove(models.Question, q)
+        models.VoteActivity.objects.filter(question=q).delete()
+        # assert
+        self.assertEqual(dict(), self._stats())
+
+    def test_rebuild_user_tag_stats__drift__repaired(self):
+        q = utils.create_question(self.users[0], self.title, self.question_content, ",".join(self.tags))
+        answer = utils.create_answer(self.answer_content, self.users[1], q)
+        utils.upvote(self.users[2], answer)
+        expected = self._stats()
+        models.UserTagStats.objects.filter(user=self.users[0]).delete()
+        models.UserTagStats.objects.filter(user=self.users[1]).update(answers_by_user=7, reputation=100)
+        models.UserTagStats.objects.create(user=self.users[2], tag=q.tags.first(), reputation=3)
+        # act
+        res = rebuild_user_tag_stats()
+        # assert
+        self.assertEqual(5, res)
+        self.assertEqual(expected, self._stats())
+
+    def test_rebuild_user_tag_stats__no_drift__nothing_changed(self):
+        q = utils.create_question(self.users[0], self.title, self.question_content, ",".join(self.tags))
+        utils.upvote(self.users[2], q)
+        # act
+        res = rebuild_user_tag_stats()
+        # assert
+        self.assertEqual(0, res)
+
+    def test_update_user_tag_stats_last_month__old_reputation_removed(self):
+        q = utils.create_question(self.users[0], self.title, self.question_content, ",".join(self.tags))
+        utils.upvote(self.users[2], q)
+        models.VoteActivity.objects.update(created_at=timezone.now() - timedelta(days=31))
+        # act
+        res = update_user_tag_stats_last_month()
+        # assert
+        self.assertEqual(2, res)
+        rep = config.UPVOTE_CHANGE
+        self.assertEqual(
+            {
+                (self.users[0].username, "tag1"): (1, 0, rep, 0),
+                (self.users[0].username, "tag2"): (1, 0, rep, 0),
+            },
+            self._stats(),
+        )
+
+    def test_apply_changes__existing_stats__single_row_per_user_and_tag(self):
+        tag = utils.create_question(self.users[0], self.title, self.question_content, self.tags[0]).tags.first()
+        # act
+        models.UserTagStats.apply_changes({(self.users[0].id, tag.id): dict(answers_by_user=1)})
+        models.UserTagStats.apply_changes({(self.users[0].id, tag.id): dict(answers_by_user=1)})
+        # assert
+        stats = models.UserTagStats.objects.get(user=self.users[0], tag=tag)
+        self.assertEqual((1, 2), (stats.questions_by_user, stats.answers_by_user))
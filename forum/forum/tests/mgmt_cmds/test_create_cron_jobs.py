@@ -29,7 +29,7 @@ class CreateCronJobsTest(TestCase):
         # act
         out = self.call_command()
         # assert
-        self.assertEqual(prev_count + 6, Task.objects.filter(task_type=TaskType.CRON).count())
+        self.assertEqual(prev_count + 13, Task.objects.filter(task_type=TaskType.CRON).count())
         self.assertEqual(
             textwrap.dedent(
                 """\
@@ -39,6 +39,13 @@ class CreateCronJobsTest(TestCase):
             Creating CronJob: Moderator revoke/grant
             Creating CronJob: Calculate users impact
             Creating CronJob: Calculate badges for users
+            Creating CronJob: Reconcile users reputation
+            Creating CronJob: Flush question views
+            Creating CronJob: Update search vectors
+            Creating CronJob: Sync meilisearch index
+            Creating CronJob: Refresh tags stats
+            Creating CronJob: Update users tag stats of last month
+            Creating CronJob: Calculate posts similarity
             """
             ),
             out,
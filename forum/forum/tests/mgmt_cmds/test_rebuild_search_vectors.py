@@ -0,0 +1,40 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from forum import models
+from forum.tests.base import ForumApiTestCase
+from forum.views import utils
+
+
+class RebuildSearchVectorsTest(ForumApiTestCase):
+    def call_command(self, *args, **kwargs):
+        out = StringIO()
+        call_command(
+            "rebuild_search_vectors",
+            "--no-color",
+            *args,
+            **kwargs,
+            stdout=out,
+            stderr=StringIO(),
+        )
+        return out.getvalue()
+
+    def test__missing_and_stale_vectors__rebuilt(self):
+        q1 = utils.create_question(self.users[0], "title 1", self.question_content, ",".join(self.tags))
+        q2 = utils.create_question(self.users[0], "title 2", self.question_content, ",".join(self.tags))
+        q3 = utils.create_question(self.users[0], "title 3", self.question_content, ",".join(self.tags))
+        models.QuestionAdditionalData.objects.filter(question=q1).delete()
+        models.QuestionAdditionalData.objects.filter(question=q2).update(search_vector="stale")
+        # act
+        out = self.call_command("--batch-size", "2")
+        # assert
+        self.assertEqual("Rebuilt search vectors for 3 questions\n", out)
+        self.assertEqual(
+            ["title 1", "title 2", "title 3"],
+            list(
+                models.QuestionAdditionalData.objects.filter(question__in=[q1, q2, q3])
+                .order_by("question_id")
+                .values_list("search_vector", flat=True)
+            ),
+        )
@@ -0,0 +1,32 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from forum import models
+from forum.tests.base import ForumApiTestCase
+from forum.views import utils
+
+
+class RebuildUserTagStatsTest(ForumApiTestCase):
+    def call_command(self, *args, **kwargs):
+        out = StringIO()
+        call_command(
+            "rebuild_user_tag_stats",
+            "--no-color",
+            *args,
+            **kwargs,
+            stdout=out,
+            stderr=StringIO(),
+        )
+        return out.getvalue()
+
+    def test__missing_stats__rebuilt(self):
+        q = utils.create_question(self.users[0], self.title, self.question_content, ",".join(self.tags))
+        utils.create_answer(self.answer_content, self.users[1], q)
+        models.UserTagStats.objects.all().delete()
+        # act
+        out = self.call_command("--batch-size", "1")
+        # assert
+        self.assertEqual("Rebuilt users tag stats, 2 stats changed\n", out)
+        self.assertEqual(1, models.UserTagStats.objects.get(user=self.users[0]).questions_by_user)
+        self.assertEqual(1, models.UserTagStats.objects.get(user=self.users[1]).answers_by_user)
@@ -0,0 +1,88 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from forum import models
+from forum.tests.base import ForumApiTestCase
+from forum.views import utils
+
+
+class RebuildVoteCountersTest(ForumApiTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.question = utils.create_question(cls.users[0], cls.title, cls.question_content, ",".join(cls.tags))
+        cls.answer = utils.create_answer(cls.answer_content, cls.users[1], cls.question)
+
+    def call_command(self, *args, **kwargs):
+        out = StringIO()
+        call_command(
+            "rebuild_vote_counters",
+            "--no-color",
+            *args,
+            **kwargs,
+            stdout=out,
+            stderr=StringIO(),
+        )
+        return out.getvalue()
+
+    def test__counters_drifted__rebuilt(self):
+        utils.upvote(self.users[1], self.question)
+        utils.upvote(self.users[2], self.question)
+        utils.downvote(self.users[0], self.answer)
+        models.Question.objects.update(votes=100)
+        models.Answer.objects.update(votes=100)
+        # act
+        out = self.call_command()
+        # assert
+        self.assertIn("Rebuilt votes counters for 1 questions", out)
+        self.assertIn("Rebuilt votes counters for 1 answers", out)
+        self.question.refresh_from_db()
+        self.answer.refresh_from_db()
+        self.assertEqual(2, self.question.votes)
+        self.assertEqual(-1, self.answer.votes)
+
+    def test_unrelated_save__does_not_recount_votes(self):
+        utils.upvote(self.users[1], self.question)
+        models.Question.objects.filter(pk=self.question.pk).update(votes=5)
+        self.question.refresh_from_db()
+        # act
+        self.question.views += 1
+        self.question.save()
+        # assert
+        self.question.refresh_from_db()
+        self.assertEqual(5, self.question.votes)
+
+    def test_vote_twice__counted_once(self):
+        # act
+        utils.upvote(self.users[1], self.question)
+        self.question.users_upvoted.add(self.users[1])
+        utils.downvote(self.users[2], self.answer)
+        utils.downvote(self.users[2], self.answer)
+        # assert
+        self.question.refresh_from_db()
+        self.answer.refresh_from_db()
+        self.assertEqual(1, self.question.votes)
+        self.assertEqual(-1, self.answer.votes)
+
+    def test_remove_missing_voter__votes_unchanged(self):
+        utils.upvote(self.users[1], self.question)
+        # act
+        self.question.users_upvoted.remove(self.users[1], self.users[2])
+        self.question.users_upvoted.remove(self.users[1])
+        # assert
+        self.question.refresh_from_db()
+        self.assertEqual(0, self.question.votes)
+
+    def test_clear_voters__votes_removed(self):
+        utils.upvote(self.users[1], self.question)
+        utils.upvote(self.users[2], self.question)
+        utils.downvote(self.users[0], self.answer)
+        # act
+        self.question.users_upvoted.clear()
+        self.answer.users_downvoted.clear()
+        # assert
+        self.question.refresh_from_db()
+        self.answer.refresh_from_db()
+        self.assertEqual(0, self.question.votes)
+        self.assertEqual(0, self.answer.votes)
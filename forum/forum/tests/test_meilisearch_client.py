@@ -0,0 +1,102 @@
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase, TestCase, override_settings
+from meilisearch import Client
+from meilisearch._httprequests import HttpRequests
+from meilisearch.errors import MeilisearchApiError, MeilisearchCommunicationError
+
+from forum import meilisearch_client
+from forum.meilisearch_client import MeilisearchIndex
+
+INDEX_SETTINGS = {"searchableAttributes": ["title"]}
+
+
+@override_settings(MEILISEARCH_ENABLED=True, MEILISEARCH_SERVER_ADDRESS="http://meilisearch:7700")
+@mock.patch("forum.meilisearch_client.Client")
+class TestMeilisearchIndex(TestCase):
+    def test_get__meilisearch_disabled__none(self, client_cls):
+        with self.settings(MEILISEARCH_ENABLED=False):
+            # act
+            res = MeilisearchIndex("posts", INDEX_SETTINGS).get()
+        # assert
+        self.assertIsNone(res)
+        client_cls.assert_not_called()
+
+    def test_get__connects_once_and_applies_settings(self, client_cls):
+        handle = MeilisearchIndex("posts", INDEX_SETTINGS)
+        # act
+        first = handle.get()
+        second = handle.get()
+        # assert
+        self.assertIs(first, second)
+        client_cls.assert_called_once_with("http://meilisearch:7700", None, timeout=5)
+        client_cls.return_value.get_index.assert_called_once_with("posts")
+        first.update_settings.assert_called_once_with(INDEX_SETTINGS)
+
+    def test_get__index_not_found__created(self, client_cls):
+        client = client_cls.return_value
+        error = MeilisearchApiError("not found", mock.MagicMock(text='{"code": "index_not_found"}'))
+        client.get_index.side_effect = error
+        # act
+        index = MeilisearchIndex("posts", INDEX_SETTINGS).get()
+        # assert
+        client.create_index.assert_called_once_with("posts", {"primaryKey": "id"})
+        client.wait_for_task.assert_called_once()
+        self.assertIs(client.index.return_value, index)
+        index.update_settings.assert_called_once_with(INDEX_SETTINGS)
+
+    def test_get__unhealthy__reconnects_without_reapplying_settings(self, client_cls):
+        handle = MeilisearchIndex("posts", INDEX_SETTINGS)
+        first = handle.get()
+        client_cls.return_value.health.side_effect = MeilisearchCommunicationError("unreachable")
+        # act
+        with mock.patch.object(meilisearch_client, "HEALTH_CHECK_INTERVAL_SECONDS", -1):
+            handle.get()
+        # assert
+        self.assertEqual(2, client_cls.call_count)
+        first.update_settings.assert_called_once()
+
+    def test_get__healthy__keeps_connection(self, client_cls):
+        handle = MeilisearchIndex("posts", INDEX_SETTINGS)
+        first = handle.get()
+        # act
+        with mock.patch.object(meilisearch_client, "HEALTH_CHECK_INTERVAL_SECONDS", -1):
+            second = handle.get()
+        # assert
+        self.assertIs(first, second)
+        client_cls.return_value.health.assert_called_once()
+        client_cls.assert_called_once()
+
+    def test_requests__sent_with_session(self, client_cls):
+        index = MeilisearchIndex("posts", INDEX_SETTINGS).get()
+        session = index.http.session
+        # act
+        with mock.patch.object(session, "request") as request:
+            index.http.post("indexes/posts/search", {"q": "query"})
+        # assert
+        request.assert_called_once()
+        self.assertEqual("POST", request.call_args.args[0])
+        self.assertIs(session, index.task_handler.http.session)
+
+
+class TestMeilisearchSdkContract(SimpleTestCase):
+    """`_SessionHttpRequests` relies on private internals of the meilisearch SDK, fail loudly if they change"""
+
+    def test_http_requests__dispatch_on_requests_functions(self):
+        http = HttpRequests(mock.MagicMock())
+        for method in ("get", "post", "put", "patch", "delete"):
+            with self.subTest(method=method), mock.patch.object(http, "send_request") as send_request:
+                # act
+                getattr(http, method)("path")
+                # assert
+                http_method = send_request.call_args.args[0]
+                self.assertIs(getattr(requests, method), http_method)
+                self.assertTrue(callable(getattr(requests.Session, http_method.__name__)))
+
+    def test_client_and_index__http_attributes(self):
+        client = Client("http://meilisearch:7700")
+        index = client.index("posts")
+        for obj in (client, client.task_handler, index, index.task_handler):
+            with self.subTest(obj=type(obj).__name__):
+                self.assertIsInstance(obj.http, HttpRequests)
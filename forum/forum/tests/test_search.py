@@ -1,3 +1,5 @@
+from unittest import mock
+
 from bs4 import BeautifulSoup
 from django.test.utils import override_settings
 
@@ -77,6 +79,15 @@ class TestSearch(ForumApiTestCase):
         soup = BeautifulSoup(res.content, "html.parser")
         self.assertEqual(2, len(soup.find_all("div", {"class": "summary"})))
 
+    def test_search__partial_username__no_results(self):
+        # arrange
+        self.client.login(self.usernames[0], self.password)
+        # act
+        res = self.client.questions_list(query=f'user:{self.usernames[0][:-1].upper()} "my question title"')
+        # assert
+        soup = BeautifulSoup(res.content, "html.parser")
+        self.assertEqual(0, len(soup.find_all("div", {"class": "summary"})))
+
     def test_search__tag__green(self):
         # arrange
         self.client.login(self.usernames[0], self.password)
@@ -154,3 +165,56 @@ class TestSearch(ForumApiTestCase):
         # assert
         soup = BeautifulSoup(res.content, "html.parser")
         self.assertEqual(len(self.questions), len(soup.find_all("div", {"class": "summary"})))
+
+
+class TestMeilisearchQuery(ForumApiTestCase):
+    def test_meilisearch_query__operators_translated_to_filters(self):
+        # act
+        filters, query = forum.views.search.meilisearch_query(
+            '[python] user:john score:2 resolved:yes space:eng answers:1 "my question"'
+        )
+        # assert
+        self.assertEqual(
+            [
+                'tags = "python"',
+                'author = "john"',
+                "votes >= 2",
+                "has_accepted = true",
+                'space = "eng"',
+                "answers_count = 1",
+            ],
+            filters,
+        )
+        self.assertEqual("my question", query)
+
+    def test_meilisearch_query__quotes_escaped(self):
+        # act
+        filters, query = forum.views.search.meilisearch_query("'[c\"s]' score:nan")
+        # assert
+        self.assertEqual(['tags = "c\\"s"', "votes >= 0"], filters)
+        self.assertEqual("", query)
+
+    def test_meilisearch_method__filters_on_server(self):
+        questions = [utils.create_question(self.users[0], self.title, self.question_content, "tag1") for _ in range(3)]
+        index = mock.MagicMock()
+        index.search.return_value = {
+            "hits": [{"id": questions[2].id}, {"id": questions[0].id}],
+        }
+        # act
+        with (
+            self.settings(
+                MEILISEARCH_ENABLED=True, MEILISEARCH_SERVER_ADDRESS="http://meili", MEILISEARCH_MASTERKEY="key"
+            ),
+            mock.patch.object(forum.views.search.POSTS_INDEX, "get", return_value=index),
+        ):
+            qs = forum.views.search.meilisearchmethod()(Question.objects, "[tag1] my question")
+        # assert
+        self.assertEqual({questions[0].id, questions[2].id}, set(qs.values_list("id", flat=True)))
+        index.search.assert_called_once_with(
+            "my question",
+            {
+                "attributesToRetrieve": ["id"],
+                "filter": ['tags = "tag1"'],
+                "limit": forum.views.search.MEILISEARCH_MAX_HITS,
+            },
+        )
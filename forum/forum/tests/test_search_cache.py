@@ -0,0 +1,80 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings
+
+from forum.models import Question
+from forum.search_cache import bump_search_generation, search_question_ids
+from forum.tests.base import ForumApiTestCase
+from forum.views import search, utils
+from forum.views.helpers import get_questions_queryset
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestSearchCache(ForumApiTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.questions = [
+            utils.create_question(cls.users[i], f"my question title {i}", cls.question_content, ",".join(cls.tags))
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.query_method = mock.MagicMock(side_effect=search.sqlite3_query_method)
+
+    def test_search__repeated__cached(self):
+        # act
+        first = search_question_ids(Question.objects.all(), "my question", self.query_method)
+        second = search_question_ids(Question.objects.all(), "  my   question ", self.query_method)
+        # assert
+        self.assertEqual(1, self.query_method.call_count)
+        self.assertEqual(first, second)
+        self.assertEqual(3, len(first))
+
+    def test_search__different_case__cached_separately(self):
+        search_question_ids(Question.objects.all(), "my question resolved:yes", self.query_method)
+        # act
+        search_question_ids(Question.objects.all(), "my question resolved:YES", self.query_method)
+        # assert
+        self.assertEqual(2, self.query_method.call_count)
+
+    def test_search__different_filters__cached_separately(self):
+        search_question_ids(Question.objects.all(), "my question", self.query_method)
+        # act
+        res = search_question_ids(Question.objects.filter(author=self.users[0]), "my question", self.query_method)
+        # assert
+        self.assertEqual(2, self.query_method.call_count)
+        self.assertEqual([self.questions[0].id], res)
+
+    def test_search__generation_bumped__searched_again(self):
+        search_question_ids(Question.objects.all(), "my question", self.query_method)
+        # act
+        bump_search_generation()
+        search_question_ids(Question.objects.all(), "my question", self.query_method)
+        # assert
+        self.assertEqual(2, self.query_method.call_count)
+
+    def test_search__question_indexed__cache_invalidated(self):
+        search_question_ids(Question.objects.all(), "my question", self.query_method)
+        # act
+        utils.create_question(self.users[0], "my question title 3", self.question_content, ",".join(self.tags))
+        question_ids = search_question_ids(Question.objects.all(), "my question", self.query_method)
+        # assert
+        self.assertEqual(2, self.query_method.call_count)
+        self.assertEqual(4, len(question_ids))
+
+    def test_get_questions_queryset__ordered_as_search_results(self):
+        ordered_ids = [self.questions[1].id, self.questions[2].id, self.questions[0].id]
+        query_method = mock.MagicMock(return_value=mock.MagicMock(**{"values_list.return_value": ordered_ids}))
+        # act
+        with mock.patch.object(search, "query_method", query_method):
+            qs = get_questions_queryset(Question.objects.all(), None, "my question", None)
+            with self.assertNumQueries(1):
+                res = [q.id for q in qs]
+        # assert
+        self.assertEqual(ordered_ids, res)
@@ -55,7 +55,7 @@ class TestEditAnswerView(ForumApiTestCase):
         assert_url_in_chain(res, self.answer_url)
         start_job.assert_has_calls(
             [
-                mock.call(review_bagdes_event, TRIGGER_EVENT_TYPES["Update post"]),
+                mock.call(review_bagdes_event, TRIGGER_EVENT_TYPES["Update post"], [self.users[1].id]),
                 mock.call(view_thread_background_tasks, self.users[1], self.answer.question),
             ],
             any_order=True,
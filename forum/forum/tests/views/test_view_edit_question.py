@@ -8,7 +8,6 @@ from django.urls import reverse
 from badges.jobs import review_bagdes_event
 from common.test_utils import assert_message_in_response, assert_url_in_chain
 from forum import models, jobs
-from forum.jobs import add_meilisearch_document
 from forum.tests.base import ForumApiTestCase
 from forum.views import utils
 from forum.views.q_and_a_crud.view_thread import view_thread_background_tasks
@@ -68,11 +67,16 @@ class TestEditQuestionView(ForumApiTestCase):
         self.assertEqual(set(new_tags), set(q.tag_words()))
         assert_message_in_response(res, "Question updated successfully")
         assert_url_in_chain(res, reverse("forum:thread", args=[self.question.pk]))
-        start_job.assert_has_calls(
-            [
-                mock.call(jobs.update_user_tag_stats, q.id, q.author_id),
-            ]
-        )  # No notification should be sent if author edited.
+        self.assertEqual(
+            set(new_tags),
+            set(
+                models.UserTagStats.objects.filter(user=q.author, questions_by_user=1).values_list(
+                    "tag__tag_word", flat=True
+                )
+            ),
+        )
+        # No notification should be sent if author edited.
+        self.assertNotIn(jobs.notify_user_email, [c.args[0] for c in start_job.call_args_list])
 
     def test_edit_question_post__no_changes(self):
         # arrange
@@ -111,8 +115,6 @@ class TestEditQuestionView(ForumApiTestCase):
         self.assertEqual(2, admin_user.reputation_score)
         start_job.assert_has_calls(
             [
-                mock.call(jobs.update_user_tag_stats, q.id, q.author_id),
-                mock.call(add_meilisearch_document, q.id),
                 mock.call(
                     jobs.notify_user_email,
                     q.author,
@@ -121,7 +123,7 @@ class TestEditQuestionView(ForumApiTestCase):
                     mock.ANY,
                     False,
                 ),
-                mock.call(review_bagdes_event, mock.ANY),
+                mock.call(review_bagdes_event, mock.ANY, mock.ANY),
                 mock.call(view_thread_background_tasks, admin_user, q),
             ]
         )
@@ -1,5 +1,6 @@
 from unittest import mock
 
+import fakeredis
 from bs4 import BeautifulSoup
 from constance import config
 from django.test.utils import override_settings
@@ -10,7 +11,6 @@ from badges.logic.utils import TRIGGER_EVENT_TYPES
 from common.test_utils import assert_url_in_chain
 from forum import models, jobs
 from forum.integrations import slack_api
-from forum.jobs import add_meilisearch_document
 from forum.models import PostInvitation, UserTagStats
 from forum.tests.base import ForumApiTestCase
 from forum.views import utils, notifications
@@ -78,6 +78,7 @@ class TestThreadView(ForumApiTestCase):
         )
         # act 2
         view_thread_background_tasks(self.users[2], self.question)
+        self.question.refresh_from_db()
         self.assertEqual(prev_views + 1, self.question.views)
 
     @mock.patch("forum.jobs.start_job")
@@ -188,7 +189,7 @@ class TestThreadView(ForumApiTestCase):
                     mock.ANY,
                     self.question.author.email,
                 ),
-                mock.call(review_bagdes_event, TRIGGER_EVENT_TYPES["Create comment"]),
+                mock.call(review_bagdes_event, TRIGGER_EVENT_TYPES["Create comment"], [self.users[0].id]),
             ],
             any_order=True,
         )
@@ -221,7 +222,7 @@ class TestThreadView(ForumApiTestCase):
                     mock.ANY,
                     self.question.author.email,
                 ),
-                mock.call(review_bagdes_event, TRIGGER_EVENT_TYPES["Create comment"]),
+                mock.call(review_bagdes_event, TRIGGER_EVENT_TYPES["Create comment"], [self.users[0].id]),
                 mock.call(
                     jobs.notify_user_email,
                     self.users[1],
@@ -231,11 +232,10 @@ class TestThreadView(ForumApiTestCase):
                     False,
                 ),
                 mock.call(view_thread_background_tasks, self.users[0], self.question),
-                mock.call(add_meilisearch_document, self.question.id),
             ],
             any_order=True,
         )
-        self.assertEqual(5, start_job.call_count)
+        self.assertEqual(4, start_job.call_count)
         self.question.refresh_from_db()
         self.assertEqual(comment.created_at, self.question.last_activity)
 
@@ -267,13 +267,12 @@ class TestThreadView(ForumApiTestCase):
                     mock.ANY,
                     self.question.author.email,
                 ),
-                mock.call(review_bagdes_event, TRIGGER_EVENT_TYPES["Create comment"]),
+                mock.call(review_bagdes_event, TRIGGER_EVENT_TYPES["Create comment"], [self.users[0].id]),
                 mock.call(view_thread_background_tasks, self.users[0], self.question),
-                mock.call(add_meilisearch_document, self.question.id),
             ],
             any_order=True,
         )
-        self.assertEqual(4, start_job.call_count)
+        self.assertEqual(3, start_job.call_count)
 
     @override_settings(MEILISEARCH_ENABLED=False)
     @mock.patch("forum.jobs.start_job")
@@ -303,13 +302,12 @@ class TestThreadView(ForumApiTestCase):
                     mock.ANY,
                     self.question.author.email,
                 ),
-                mock.call(review_bagdes_event, TRIGGER_EVENT_TYPES["Create comment"]),
+                mock.call(review_bagdes_event, TRIGGER_EVENT_TYPES["Create comment"], [self.users[0].id]),
                 mock.call(view_thread_background_tasks, self.users[0], self.question),
-                mock.call(add_meilisearch_document, self.question.id),
             ],
             any_order=True,
         )
-        self.assertEqual(4, start_job.call_count)
+        self.assertEqual(3, start_job.call_count)
 
     @mock.patch("forum.jobs.start_job")
     def test_thread_view_create_answer_comment__green(self, start_job: mock.MagicMock):
@@ -396,11 +394,6 @@ class TestThreadView(ForumApiTestCase):
         notifications._notify_question_followers.assert_called_once()
         jobs.start_job.assert_has_calls(
             [
-                mock.call(
-                    jobs.update_user_tag_stats,
-                    answer.get_question().id,
-                    answer.author_id,
-                ),
                 mock.call(
                     slack_api.slack_post_im_message_to_email,
                     mock.ANY,
@@ -496,7 +489,11 @@ class TestThreadView(ForumApiTestCase):
         # assert
         self.assertEqual(200, res.status_code)
         start_job.assert_called_once_with(view_thread_background_tasks, self.users[1], self.question)
-        view_thread_background_tasks(self.users[1], self.question)
+        with mock.patch("scheduler.helpers.queues.getters._get_connection", return_value=fakeredis.FakeStrictRedis()):
+            view_thread_background_tasks(self.users[1], self.question)
+            self.question.refresh_from_db()
+            self.assertEqual(0, self.question.views)
+            jobs.flush_question_views()
         self.question.refresh_from_db()
         self.assertEqual(1, self.question.views)
 
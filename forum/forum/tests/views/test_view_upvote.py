@@ -1,3 +1,5 @@
+from unittest import mock
+
 from constance import config
 from django.urls import reverse
 
@@ -38,6 +40,19 @@ class TestUpvoteView(ForumApiTestCase):
         self.assertEqual(config.UPVOTE_CHANGE, item.reputation_change)
         self.assertGreater(self.question.last_activity, self.prev_last_activity)
 
+    @mock.patch("forum.jobs.start_job")
+    def test_upvote_answer__touches_last_activity_without_saving_question(self, start_job: mock.MagicMock):
+        self.client.login(self.usernames[0], self.password)
+        prev_updated_at = models.Question.objects.get(pk=self.question.pk).updated_at
+        # act
+        with mock.patch.object(models.Question, "update_search_vector") as update_search_vector:
+            self.client.upvote(self.question.pk, "answer", self.answer_diff_user.pk)
+        # assert
+        update_search_vector.assert_not_called()
+        self.question.refresh_from_db()
+        self.assertGreater(self.question.last_activity, self.prev_last_activity)
+        self.assertEqual(prev_updated_at, self.question.updated_at)
+
     def test_upvote_answer__green(self):
         self.client.login(self.usernames[0], self.password)
 
@@ -11,6 +11,7 @@ from common.utils import TabEnum
 from forum import jobs
 from forum.jobs.others import log_search
 from forum.models import Question
+from forum.search_cache import search_question_ids
 from forum.views import search
 from spaces.models import Space
 from userauth.models import ForumUser
@@ -29,7 +30,8 @@ def get_questions_queryset(
     ).defer(*user_model_defer_fields("author"), "source", "source_id", "link")
     start_time = time.time()
     if query is not None:
-        qs = search.query_method(base_queryset, query)
+        question_ids = search_question_ids(base_queryset, query, search.query_method)
+        qs = search.questions_by_ids(base_queryset, question_ids)
     elif tab == TabEnum.MOST_VIEWED.value:
         qs = base_queryset.all().order_by("-views")
     elif tab == TabEnum.UNRESOLVED.value:
@@ -44,8 +46,7 @@ def get_questions_queryset(
         qs = base_queryset.all().order_by("-type", "-created_at")
     if query and user:
         mstaken = int((time.time() - start_time) * 1000)
-        first_five = list(qs.values_list("id", flat=True)[:5])
-        jobs.start_job(log_search, user, query, first_five, mstaken)
+        jobs.start_job(log_search, user, query, question_ids[:5], mstaken)
     return qs
 
 
@@ -13,10 +13,10 @@ from scheduler import job
 from common import utils as common_utils
 from forum import jobs
 from forum.apps import logger
+from forum.jobs.question_views import record_question_view
 from forum.models import (
     Question,
     VoteActivity,
-    QuestionView,
     QuestionBookmark,
     Answer,
     Comment,
@@ -136,10 +136,7 @@ def view_thread_background_tasks(user: ForumUser, q: Question):
         return
     last_hour = timezone.now() - timedelta(hours=1)
     if not q.viewed_by(user, last_hour):
-        QuestionView.objects.create(
-            author=user,
-            question=q,
-        )
+        record_question_view(user, q)
     unseen_activities = VoteActivity.objects.filter(target=user, question=q, seen=None)
     unseen_count = unseen_activities.count()
     logger.debug(f"Marking {unseen_count} activities as seen")
@@ -1,37 +1,39 @@
 import shlex
+from typing import List, Tuple
 
 from constance import config
 from django.conf import settings
 from django.contrib.postgres.fields import ArrayField
 from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramDistance
-from django.db.models import CharField, Func, BigIntegerField
-from django.db.models import QuerySet, Q, F, Value
-from django.db.models.signals import post_save, pre_delete
+from django.db.models import CharField, Func, BigIntegerField, IntegerField
+from django.db.models import QuerySet, Q, F, Value, Case, When
+from django.db.models.signals import post_delete
 from django.dispatch import receiver
 
-from forum import jobs
 from forum.apps import logger
-from forum.jobs.populate_meilisearch import (
-    add_meilisearch_document,
-    delete_meilisearch_document,
-)
+from forum.jobs.populate_meilisearch import POSTS_INDEX, INDEX_SETTINGS
 from forum.models import Question
 
+MEILISEARCH_MAX_HITS = INDEX_SETTINGS["pagination"]["maxTotalHits"]
+
 
 def _postgres_enabled() -> bool:
     return settings.DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql"
 
 
-def initial_query(qs: QuerySet, query: str):
+def _query_parts(query: str) -> List[str]:
     try:
-        query_parts = shlex.split(query)
+        return shlex.split(query)
     except ValueError:
         query = query.replace('"', "'")
         if query.count("'") % 2 == 1:
             query += "'"
-        query_parts = shlex.split(query)
+        return shlex.split(query)
+
+
+def initial_query(qs: QuerySet, query: str):
     result_query = []
-    for qpart in query_parts:
+    for qpart in _query_parts(query):
         if len(qpart) <= 1:
             continue
         elif qpart[0] == "[" and qpart[-1] == "]":
@@ -39,7 +41,7 @@ def initial_query(qs: QuerySet, query: str):
             qs = qs.filter(tags__tag_word__iexact=tag_word)
         elif qpart.startswith("user:"):
             username = qpart.split(":")[1]
-            qs = qs.filter(author__username__icontains=username)
+            qs = qs.filter(author__username__iexact=username)
         elif qpart.startswith("answers:"):
             num_answers = int(qpart.split(":")[1])
             qs = qs.filter(answers_count=num_answers)
@@ -103,6 +105,80 @@ class ArrayPosition(Func):
         super().__init__(*expressions, **extra)
 
 
+def questions_by_ids(qs: QuerySet, question_ids: List[int]) -> QuerySet:
+    """Filter questions by ids, ordered as the ids are"""
+    qs = qs.filter(id__in=question_ids)
+    if len(question_ids) == 0:
+        return qs
+    if _postgres_enabled():
+        ordering = ArrayPosition(question_ids, F("id"), output_field=BigIntegerField())
+    else:
+        ordering = Case(
+            *[When(id=question_id, then=Value(i)) for i, question_id in enumerate(question_ids)],
+            output_field=IntegerField(),
+        )
+    return qs.annotate(ordering=ordering).order_by("ordering")
+
+
+def _meilisearch_value(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def meilisearch_query(query: str) -> Tuple[List[str], str]:
+    """Translate the search operators of a query to meilisearch filter expressions,
+    the same operators `initial_query` applies on the database.
+    :param query: query as entered by the user
+    :returns: filter expressions and the remaining text to search
+    """
+    filters = []
+    result_query = []
+    for qpart in _query_parts(query):
+        if len(qpart) <= 1:
+            continue
+        elif qpart[0] == "[" and qpart[-1] == "]":
+            filters.append(f"tags = {_meilisearch_value(qpart[1:-1])}")
+        elif qpart.startswith("user:"):
+            filters.append(f"author = {_meilisearch_value(qpart.split(':')[1])}")
+        elif qpart.startswith("answers:"):
+            try:
+                filters.append(f"answers_count = {int(qpart.split(':')[1])}")
+            except ValueError:
+                pass
+        elif qpart.startswith("score:"):
+            try:
+                score = int(qpart.split(":")[1])
+            except ValueError:
+                score = 0
+            filters.append(f"votes >= {score}")
+        elif qpart.startswith("resolved:"):
+            filters.append(f"has_accepted = {'true' if qpart.split(':')[1] == 'yes' else 'false'}")
+        elif qpart.startswith("space:"):
+            filters.append(f"space = {_meilisearch_value(qpart.split(':')[1])}")
+        else:
+            result_query.append(qpart)
+    return filters, " ".join(result_query)
+
+
+def meilisearch_question_ids(query: str, filters: List[str], limit: int = MEILISEARCH_MAX_HITS) -> List[int]:
+    """Search questions in meilisearch, filters are applied by meilisearch before limiting the results.
+    The index returns at most MEILISEARCH_MAX_HITS results, matches beyond are not listed.
+    :param query: text to search
+    :param filters: meilisearch filter expressions, all of them should match
+    :param limit: maximum number of results to return
+    :returns: ids of the questions found, ordered by relevance
+    """
+    response = POSTS_INDEX.get().search(
+        query,
+        {
+            "attributesToRetrieve": ["id"],
+            "filter": filters,
+            "limit": limit,
+        },
+    )
+    return [hit["id"] for hit in response["hits"]]
+
+
 def meilisearchmethod():
     if (
         not settings.MEILISEARCH_ENABLED
@@ -110,30 +186,15 @@ def meilisearchmethod():
         or not settings.MEILISEARCH_MASTERKEY
     ):
         return ValueError("Can not use meilisearch when its configuration is off")
-    import meilisearch
-
-    client = meilisearch.Client(settings.MEILISEARCH_SERVER_ADDRESS, settings.MEILISEARCH_MASTERKEY)
-    index = client.index("posts")
 
     def meilisearch(qs: QuerySet, initial_q: str):
-        qs, query = initial_query(qs, initial_q)
+        filters, query = meilisearch_query(initial_q)
         if not query:
+            qs, _ = initial_query(qs, initial_q)
             return qs.annotate(relevance=Value(1))
-        meilisearch_response = index.search(
-            query,
-            {
-                "attributesToRetrieve": ["id"],
-                "limit": 20,
-            },
-        )
-        question_ids = list(map(lambda x: x["id"], meilisearch_response["hits"]))
-
-        qs = qs.filter(id__in=question_ids)
-        if len(question_ids) > 0 and _postgres_enabled():
-            qs = qs.annotate(ordering=ArrayPosition(question_ids, F("id"), output_field=BigIntegerField())).order_by(
-                "ordering"
-            )
-        return qs
+        # Results are paginated by the view, only the first MEILISEARCH_MAX_HITS matches are returned
+        question_ids = meilisearch_question_ids(query, filters)
+        return questions_by_ids(qs, question_ids)
 
     return meilisearch
 
@@ -144,7 +205,7 @@ def configure_query_method():
         f"Determining search method, meilisearch={settings.MEILISEARCH_ENABLED},postgres_enabled={postgres_enabled}"
     )
     if settings.MEILISEARCH_ENABLED:
-        logger.info("Meilisearch enabled, checking whether server is reachable")
+        logger.info("Meilisearch enabled, query method based on meilisearch")
         return meilisearchmethod()
     elif postgres_enabled:
         logger.info("Database engine is postgres, query method based on postgres full text search")
@@ -162,11 +223,6 @@ def configure_query_method():
 query_method = configure_query_method()
 
 
-@receiver(post_save, sender=Question)
-def create_meilisearch_doc(sender, instance, created, **kwargs):
-    jobs.start_job(add_meilisearch_document, instance.id)
-
-
-@receiver(pre_delete, sender=Question)
+@receiver(post_delete, sender=Question)
 def delete_meilisearch_doc(sender, instance, **kwargs):
-    jobs.start_job(delete_meilisearch_document, instance.id)
+    Question.sync_search_index([instance.id])
@@ -25,7 +25,7 @@ def view_bookmark_question(request, question_pk: int):
         return redirect("forum:thread", pk=question_pk)
     logger.debug(f"Creating bookmark for [user={user.username} question={question.id}]")
     models.QuestionBookmark.objects.create(user=user, question=question)
-    jobs.start_job(review_bagdes_event, TRIGGER_EVENT_TYPES["Bookmark thread"])
+    jobs.start_job(review_bagdes_event, TRIGGER_EVENT_TYPES["Bookmark thread"], [question.author_id])
     return redirect("forum:thread", pk=question_pk)
 
 
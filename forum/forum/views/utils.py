@@ -1,9 +1,8 @@
 from typing import Union, List, Optional
 
-from constance import config
 from django.contrib.auth.models import AbstractUser
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Model
+from django.db.models import Model, Sum
 from django.utils import timezone
 
 from badges.jobs import review_bagdes_event
@@ -22,14 +21,21 @@ from wiwik_lib.views.follow_views import delete_follow, create_follow
 
 
 def recalculate_user_reputation(user: AbstractUser) -> None:
-    """Calculate a user reputation based on VoteActivity"""
+    """Calculate a user reputation from scratch based on VoteActivity.
+    Reputation is maintained incrementally when VoteActivity is created/deleted,
+    this should only be used to repair a single user.
+    """
     if user is None or not isinstance(user, ForumUser):
         logger.warning(f"User {user} is not a ForumUser, skipping reputation recalculation")
         return
-    reputation_qs = models.VoteActivity.objects.filter(target=user, reputation_change__isnull=False)
-    reputation = sum([a.reputation_change for a in reputation_qs])
+    reputation = (
+        models.VoteActivity.objects.filter(target=user, reputation_change__isnull=False)
+        .aggregate(rep=Sum("reputation_change"))
+        .get("rep")
+        or 0
+    )
     user.reputation_score = reputation
-    user.save()
+    ForumUser.objects.filter(pk=user.pk).update(reputation_score=reputation)
 
 
 def create_activity(
@@ -45,13 +51,7 @@ def create_activity(
     :param activity_type: Type of activity
     :returns: Created VoteActivity
     """
-    rep_change_map = {
-        models.VoteActivity.ActivityType.EDITED: config.EDITED_CHANGE,
-        models.VoteActivity.ActivityType.UPVOTE: config.UPVOTE_CHANGE,
-        models.VoteActivity.ActivityType.DOWNVOTE: config.DOWNVOTE_CHANGE,
-        models.VoteActivity.ActivityType.ACCEPT: config.ACCEPT_ANSWER_CHANGE,
-        models.VoteActivity.ActivityType.ACCEPT_OLD: config.ACCEPT_ANSWER_OLD_QUESTION_CHANGE,
-    }
+    rep_change_map = models.VoteActivity.reputation_changes()
     source_username = source.username if source else None
     if activity_type not in rep_change_map:
         logger.warning(f"Activity type {activity_type} unknown")
@@ -81,7 +81,6 @@ def create_activity(
         reputation_change=rep_change,
         type=activity_type,
     )
-    recalculate_user_reputation(target)
     return activity
 
 
@@ -118,7 +117,6 @@ def delete_activity(
         f"{activity_type} for {target.username} on {userinput.get_model()} {userinput.id}"
     )
     activity.delete()
-    recalculate_user_reputation(target)
 
 
 # ======== Question methods ================
@@ -181,8 +179,7 @@ def create_question(
             question_tag_words,
             q,
         )
-    jobs.start_job(jobs.update_user_tag_stats, q.id, user.id)
-    jobs.start_job(review_bagdes_event, TRIGGER_EVENT_TYPES["Create post"])
+    jobs.start_job(review_bagdes_event, TRIGGER_EVENT_TYPES["Create post"], [user.id])
     return q
 
 
@@ -219,12 +216,11 @@ def update_question(user: AbstractUser, q: models.Question, title: str, content:
         tag = _get_tag(tag_word, user)
         q.tags.add(tag)
         follow_models.create_follow_tag(tag, q.author)
-    jobs.start_job(jobs.update_user_tag_stats, q.id, q.author.id)
     q.last_activity = timezone.now()
     q.save()
     create_follow(q, user)
     notifications.notify_question_changes(user, q, old_title, old_content)
-    jobs.start_job(review_bagdes_event, TRIGGER_EVENT_TYPES["Update post"])
+    jobs.start_job(review_bagdes_event, TRIGGER_EVENT_TYPES["Update post"], [user.id])
     return q
 
 
@@ -232,12 +228,9 @@ def delete_question(question: models.Question) -> None:
     answers_list = list(question.answer_set.all().using("default"))
     for answer in answers_list:
         delete_answer(answer)
-    jobs.start_job(tag_jobs.update_tag_stats)
-    author = question.author
-    editor = question.editor
+    tag_ids = list(question.tags.values_list("id", flat=True))
     question.delete()
-    recalculate_user_reputation(author)
-    recalculate_user_reputation(editor)
+    tag_jobs.mark_tags_dirty(*tag_ids)
 
 
 # Answers method
@@ -266,11 +259,10 @@ def create_answer(
     tags = a.question.tags.all()
     for tag in tags:
         follow_models.create_follow_tag(tag, user)
-    jobs.start_job(jobs.update_user_tag_stats, a.question_id, user.id)
     create_follow(question, user)
     if send_notifications:
         notifications.notify_new_answer(user, a)
-    jobs.start_job(review_bagdes_event, TRIGGER_EVENT_TYPES["Create post"])
+    jobs.start_job(review_bagdes_event, TRIGGER_EVENT_TYPES["Create post"], [user.id])
     return a
 
 
@@ -285,28 +277,26 @@ def update_answer(user: AbstractUser, answer: models.Answer, content: str) -> mo
         create_activity(None, user, answer, models.VoteActivity.ActivityType.EDITED)
     answer.save()
     notifications.notify_answer_changes(user, answer, old_content)
-    jobs.start_job(review_bagdes_event, TRIGGER_EVENT_TYPES["Update post"])
+    jobs.start_job(review_bagdes_event, TRIGGER_EVENT_TYPES["Update post"], [user.id])
     return answer
 
 
 def delete_answer(answer: models.Answer):
-    author = answer.author
-    editor = answer.editor
     answer.delete()
-    recalculate_user_reputation(author)
-    recalculate_user_reputation(editor)
 
 
 def undo_upvote(user: AbstractUser, model_obj: models.VotableUserInput) -> models.VotableUserInput:
-    model_obj.users_upvoted.remove(user)
-    model_obj.save()
+    if model_obj.users_upvoted.filter(id=user.id).exists():
+        model_obj.users_upvoted.remove(user)
+        model_obj.get_question().touch_last_activity()
     delete_activity(user, model_obj.author, model_obj, models.VoteActivity.ActivityType.UPVOTE)
     return model_obj
 
 
 def undo_downvote(user: AbstractUser, model_obj: models.VotableUserInput) -> models.VotableUserInput:
-    model_obj.users_downvoted.remove(user)
-    model_obj.save()
+    if model_obj.users_downvoted.filter(id=user.id).exists():
+        model_obj.users_downvoted.remove(user)
+        model_obj.get_question().touch_last_activity()
     delete_activity(user, model_obj.author, model_obj, models.VoteActivity.ActivityType.DOWNVOTE)
     return model_obj
 
@@ -317,10 +307,12 @@ def upvote(user: AbstractUser, model_obj: models.VotableUserInput) -> models.Vot
         undo_downvote(user, model_obj)
 
     model_obj.users_upvoted.add(user)
-    model_obj.save()
-    create_follow(model_obj.get_question(), user)
+    question = model_obj.get_question()
+    create_follow(question, user)
     create_activity(user, model_obj.author, model_obj, models.VoteActivity.ActivityType.UPVOTE)
-    jobs.start_job(review_bagdes_event, TRIGGER_EVENT_TYPES["Upvote"])
+    jobs.start_job(
+        review_bagdes_event, TRIGGER_EVENT_TYPES["Upvote"], [user.id, model_obj.author_id, question.author_id]
+    )
     return model_obj
 
 
@@ -330,7 +322,6 @@ def downvote(user: AbstractUser, model_obj: models.VotableUserInput) -> models.V
         undo_upvote(user, model_obj)
 
     model_obj.users_downvoted.add(user)
-    model_obj.save()
     create_follow(model_obj.get_question(), user)
     create_activity(user, model_obj.author, model_obj, models.VoteActivity.ActivityType.DOWNVOTE)
     return model_obj
@@ -365,7 +356,7 @@ def create_comment(content: str, user: AbstractUser, parent: models.UserInput) -
     q = comment.get_question()
     notifications.notify_new_comment(user, parent, comment)
     create_follow(q, user)
-    jobs.start_job(review_bagdes_event, TRIGGER_EVENT_TYPES["Create comment"])
+    jobs.start_job(review_bagdes_event, TRIGGER_EVENT_TYPES["Create comment"], [user.id])
     return comment
 
 
@@ -379,8 +370,7 @@ def upvote_comment(user: AbstractUser, comment: models.Comment) -> models.Commen
     comment.users_upvoted.add(user)
     comment.votes += 1
     comment.save()
-    comment.get_question().last_activity = timezone.now()
-    comment.get_question().save()
+    comment.get_question().touch_last_activity()
     return comment
 
 
@@ -39,7 +39,7 @@ def view_acceptanswer(request, question_pk: int, answer_pk: int):
         else:
             activity_type = models.VoteActivity.ActivityType.ACCEPT
         utils.create_activity(user, answer.author, answer, activity_type)
-        jobs.start_job(review_bagdes_event, TRIGGER_EVENT_TYPES["Accept answer"])
+        jobs.start_job(review_bagdes_event, TRIGGER_EVENT_TYPES["Accept answer"], [answer.author_id])
     logger.info(f"user {user.username} approved answer {answer_pk} on question {question_pk}")
     messages.success(request, "Answer accepted")
     return redirect("forum:thread", pk=question_pk)
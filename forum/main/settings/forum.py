@@ -7,6 +7,7 @@ import os
 from datetime import timedelta
 
 from .base import getenv_asbool
+from .base_dir import BASE_DIR
 
 CONSTANCE_CONFIG = {
     "USE_CDN": (True, "Should 3rd party libraries be downloaded using CDN", bool),
@@ -141,7 +142,11 @@ CONSTANCE_DATABASE_CACHE_BACKEND = "default"
 MEILISEARCH_ENABLED = getenv_asbool("MEILISEARCH_ENABLED", default="FALSE")
 MEILISEARCH_SERVER_ADDRESS = os.getenv("MEILISEARCH_SERVER_ADDRESS", None)
 MEILISEARCH_MASTERKEY = os.getenv("MEILISEARCH_MASTERKEY", None)
+MEILISEARCH_POOL_SIZE = int(os.getenv("MEILISEARCH_POOL_SIZE", "10"))
+MEILISEARCH_TIMEOUT = int(os.getenv("MEILISEARCH_TIMEOUT", "5"))
+MEILISEARCH_SYNC_CRON = os.getenv("MEILISEARCH_SYNC_CRON", "* * * * *")
 EDIT_LOCK_TIMEOUT = timedelta(minutes=5)
+SIMILARITY_MODEL_PATH = os.getenv("SIMILARITY_MODEL_PATH", os.path.join(BASE_DIR, "similarity-model.joblib"))
 _admin_email = os.getenv("ADMIN_EMAIL", None)
 if _admin_email is not None:
     ADMINS = [
@@ -2,7 +2,7 @@ from admin_numeric_filter.admin import NumericFilterModelAdmin, SliderNumericFil
 from django.contrib import admin
 from rangefilter.filters import DateRangeFilter
 
-from similarity.models import PostSimilarity
+from similarity.models import PostSimilarity, SimilarQuestion
 
 
 @admin.register(PostSimilarity)
@@ -40,3 +40,9 @@ class PostSimilarityAdmin(NumericFilterModelAdmin):
 
     def q2_id(self, o):
         return o.question2.id
+
+
+@admin.register(SimilarQuestion)
+class SimilarQuestionAdmin(admin.ModelAdmin):
+    list_display = ("id", "question_id", "similar_id", "rank")
+    readonly_fields = ("question", "similar", "rank")
@@ -1,3 +1,8 @@
-from .postgres_search_rank import postgres_search_rank, postgres_trigram_rank
+from .postgres_search_rank import (
+    postgres_search_rank,
+    postgres_trigram_rank,
+    postgres_search_ranks,
+    postgres_trigram_ranks,
+)
 
 # from .short_sentence_similarity import sentence_similarity
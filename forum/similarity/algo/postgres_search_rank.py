@@ -1,6 +1,8 @@
+from typing import Optional
+
 from constance import config
 from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramDistance
-from django.db.models import F
+from django.db.models import F, QuerySet
 
 from forum import models
 
@@ -33,3 +35,43 @@ def postgres_trigram_rank(text: str, q: models.Question) -> float:
         .first()
     )
     return 1 - distance
+
+
+def postgres_search_ranks(text: str, question_qs: QuerySet, limit: Optional[int] = None) -> dict[int, float]:
+    """
+    Calculate postgres full text search rank between text and the search vectors of all questions
+    in a single query. Only questions matching the text are returned.
+    :param text: text to rank questions by
+    :param question_qs: candidate questions
+    :param limit: return only the best ranked questions
+    :returns: rank by question id
+    """
+    search_query = SearchQuery(text)
+    search_rank = SearchRank(F("additional_data__search_vector"), search_query)
+    rank_qs = question_qs.annotate(rank=search_rank).filter(rank__gt=0).order_by("-rank").values_list("id", "rank")
+    if limit is not None:
+        rank_qs = rank_qs[:limit]
+    return dict(rank_qs)
+
+
+def postgres_trigram_ranks(text: str, question_qs: QuerySet, limit: Optional[int] = None) -> dict[int, float]:
+    """
+    Calculate postgres trigram rank between the text and title+content of all questions in a single query,
+    same as `postgres_trigram_rank`.
+    :param text: text to rank questions by
+    :param question_qs: candidate questions
+    :param limit: return only the best matching questions
+    :returns: rank by question id
+    """
+    title_weight = config.trigram_weight_title
+    content_weight = config.trigram_weight_content
+    relevance_qs = (
+        question_qs.annotate(title_distance=TrigramDistance("title", text))
+        .annotate(content_distance=TrigramDistance("content", text))
+        .annotate(relevance=1 - F("title_distance") * title_weight - F("content_distance") * content_weight)
+        .order_by("-relevance")
+        .values_list("id", "relevance")
+    )
+    if limit is not None:
+        relevance_qs = relevance_qs[:limit]
+    return {question_id: 1 - relevance for question_id, relevance in relevance_qs}
@@ -1,12 +1,39 @@
+import contextlib
+import dataclasses
+import fcntl
+import functools
+import itertools
+import os
 import string
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Optional, Iterator, Iterable
 
+import joblib
 import nltk
+import numpy as np
+from django.utils import timezone
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
 
 from similarity.apps import logger
 
+TFIDF_MODEL_VERSION = 1
 __vectorizer: Optional[TfidfVectorizer] = None
+__loaded_model: Optional[tuple[str, float, "TfidfModel"]] = None
+
+_stemmer = nltk.stem.porter.PorterStemmer()
+_remove_punctuation_map = dict((ord(char), None) for char in string.punctuation)
+
+
+@functools.lru_cache(maxsize=100_000)
+def _stem(token: str) -> str:
+    return _stemmer.stem(token)
+
+
+def normalize(text: str) -> list[str]:
+    """Tokenize and stem text. Defined at module level so fitted vectorizers can be serialized."""
+    return [_stem(token) for token in nltk.word_tokenize(text.lower().translate(_remove_punctuation_map))]
 
 
 def initialize_tfidf():
@@ -16,29 +43,169 @@ def initialize_tfidf():
     except LookupError:
         nltk.download("punkt_tab")
 
-    stemmer = nltk.stem.porter.PorterStemmer()
-    remove_punctuation_map = dict((ord(char), None) for char in string.punctuation)
+    return TfidfVectorizer(tokenizer=normalize, stop_words="english")
+
 
-    def stem_tokens(tokens):
-        return [stemmer.stem(item) for item in tokens]
+@dataclasses.dataclass
+class TfidfModel:
+    """TF-IDF vectorizer fitted over all posts, along with the TF-IDF matrix of the posts documents"""
 
-    def normalize(text):
-        return stem_tokens(nltk.word_tokenize(text.lower().translate(remove_punctuation_map)))
+    vectorizer: TfidfVectorizer
+    matrix: sparse.csr_matrix
+    question_ids: list[int]
+    fitted_at: datetime
+    version: int = TFIDF_MODEL_VERSION
 
-    return TfidfVectorizer(tokenizer=normalize, stop_words="english")
+    def transform(self, doc: str) -> sparse.csr_matrix:
+        return self.vectorizer.transform([doc])
+
+    def similarities(self, vector: sparse.csr_matrix) -> dict[int, float]:
+        """Similarity of a document vector with every post in the model, by question id"""
+        values = (self.matrix @ vector.T).toarray().ravel()
+        return dict(zip(self.question_ids, values.tolist()))
+
+    def set_documents(self, question_ids: list[int], vectors: sparse.csr_matrix) -> None:
+        """Add or replace the vectors of posts (a row per post) without refitting the vectorizer"""
+        count = self.matrix.shape[0]
+        index = {question_id: i for i, question_id in enumerate(self.question_ids)}
+        rows = list(range(count))
+        for i, question_id in enumerate(question_ids):
+            if question_id in index:
+                rows[index[question_id]] = count + i
+                continue
+            index[question_id] = len(rows)
+            rows.append(count + i)
+            self.question_ids.append(question_id)
+        self.matrix = sparse.vstack([self.matrix, vectors], format="csr")[rows]
+
+    def remove_documents(self, question_ids: Iterable[int]) -> None:
+        """Remove the vectors of posts, i.e., of deleted questions"""
+        removed = set(question_ids)
+        rows = [i for i, question_id in enumerate(self.question_ids) if question_id not in removed]
+        self.question_ids = [self.question_ids[i] for i in rows]
+        self.matrix = self.matrix[rows]
+
+
+def fit_tfidf_model(docs: list[str], question_ids: list[int]) -> TfidfModel:
+    vectorizer = initialize_tfidf()
+    matrix = vectorizer.fit_transform(docs).tocsr()
+    return TfidfModel(vectorizer=vectorizer, matrix=matrix, question_ids=list(question_ids), fitted_at=timezone.now())
+
+
+def save_tfidf_model(model: TfidfModel, path: str) -> None:
+    """Serialize model to path, replacing the previous model atomically"""
+    global __loaded_model
+    tmp_path = f"{path}.tmp"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, path)
+    __loaded_model = (path, os.path.getmtime(path), model)
 
 
-def calc_tfidf_pair(text1: str, text2: str) -> float:
+@contextlib.contextmanager
+def tfidf_model_lock(path: str):
+    """Serialize the writers of the model saved in path, readers do not need the lock
+    since the model is replaced atomically.
+    """
+    with open(f"{path}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def load_tfidf_model(path: str) -> Optional[TfidfModel]:
+    """Load model saved by `save_tfidf_model`, the model is cached until the file changes.
+    :returns: The model, or None if it does not exist or was saved by a different version.
+    """
+    global __loaded_model
+    if not os.path.exists(path):
+        return None
+    mtime = os.path.getmtime(path)
+    if __loaded_model is not None and __loaded_model[:2] == (path, mtime):
+        model = __loaded_model[2]
+    else:
+        try:
+            model = joblib.load(path)
+        except Exception as e:
+            logger.warning(f"Could not load TF-IDF model from {path}: {e}")
+            return None
+        __loaded_model = (path, mtime, model)
+    if getattr(model, "version", None) != TFIDF_MODEL_VERSION:
+        logger.info(f"TF-IDF model in {path} is of a different version, ignoring it")
+        return None
+    return model
+
+
+def calc_tfidf_pair(text1: str, text2: str, model: Optional[TfidfModel] = None) -> float:
+    """Calculate TF-IDF similarity of two texts.
+    Uses the IDF weights of the fitted model if given, otherwise fit TF-IDF on the two texts.
+    """
     global __vectorizer
+    if model is not None:
+        tfidf = model.vectorizer.transform([text1, text2])
+        return (tfidf * tfidf.T)[0, 1]
     if not __vectorizer:
         __vectorizer = initialize_tfidf()
     tfidf = __vectorizer.fit_transform([text1, text2])
     return (tfidf * tfidf.T)[0, 1]
 
 
-def calc_tfidf_multiple_documents(docs: list[str]) -> list[list[float]]:
-    global __vectorizer
-    if not __vectorizer:
-        __vectorizer = initialize_tfidf()
-    tfidf = __vectorizer.fit_transform(docs)
-    return (tfidf * tfidf.T).toarray()
+def _top_k_rows(
+    tfidf: sparse.csr_matrix, tfidf_t: sparse.csc_matrix, rows: np.ndarray, k: int
+) -> list[tuple[int, int, float]]:
+    """Find the k most similar documents of the documents in `rows`"""
+    res = list()
+    similarities = (tfidf[rows] @ tfidf_t).tocsr()
+    for offset, row in enumerate(rows.tolist()):
+        begin, end = similarities.indptr[offset], similarities.indptr[offset + 1]
+        columns, values = similarities.indices[begin:end], similarities.data[begin:end]
+        others = columns != row
+        columns, values = columns[others], values[others]
+        if len(values) > k:
+            best = np.argpartition(-values, k - 1)[:k]
+            columns, values = columns[best], values[best]
+        res.extend((row, column, value) for column, value in zip(columns.tolist(), values.tolist()))
+    return res
+
+
+__worker_matrices: Optional[tuple[sparse.csr_matrix, sparse.csc_matrix]] = None
+
+
+def _init_worker(tfidf: sparse.csr_matrix) -> None:
+    global __worker_matrices
+    __worker_matrices = (tfidf, tfidf.T.tocsc())
+
+
+def _worker_top_k_rows(rows: np.ndarray, k: int) -> list[tuple[int, int, float]]:
+    tfidf, tfidf_t = __worker_matrices
+    return _top_k_rows(tfidf, tfidf_t, rows, k)
+
+
+def top_k_similar(
+    tfidf: sparse.csr_matrix,
+    k: int,
+    chunk_size: int = 1000,
+    rows: Optional[Iterable[int]] = None,
+    workers: int = 1,
+) -> Iterator[tuple[int, int, float]]:
+    """Find the k most similar documents of every document.
+    Similarities are calculated by multiplying blocks of rows with the whole (sparse) matrix,
+    so memory is bounded by the chunk size and not by the number of documents squared.
+    :param tfidf: TF-IDF matrix, a row per document
+    :param k: number of most similar documents to return per document
+    :param chunk_size: number of rows to multiply at once
+    :param rows: rows to find similar documents for, all rows if None
+    :param workers: number of processes the blocks of rows are sharded between
+    :returns: tuples of (row, similar row, similarity), pairs with no similarity are not returned
+    """
+    rows = np.arange(tfidf.shape[0]) if rows is None else np.fromiter(rows, dtype=np.int64)
+    blocks = [rows[start : start + chunk_size] for start in range(0, len(rows), chunk_size)]
+    if workers <= 1 or len(blocks) <= 1:
+        tfidf_t = tfidf.T.tocsc()
+        for block in blocks:
+            yield from _top_k_rows(tfidf, tfidf_t, block, k)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tfidf,)) as executor:
+        for res in executor.map(_worker_top_k_rows, blocks, itertools.repeat(k)):
+            yield from res
@@ -1,5 +1,9 @@
+import heapq
+from datetime import datetime
+from typing import Optional
+
 from django.conf import settings
-from django.db.models import Q
+from django.db.models import Q, Exists, OuterRef
 from django.utils import timezone
 from scheduler import job
 
@@ -7,77 +11,251 @@ from forum.models import Question
 from forum.views import thread_markdown_bytesio
 from similarity import algo
 from similarity import models
-from similarity.algo.tfidf import calc_tfidf_pair, calc_tfidf_multiple_documents
+from similarity.algo.tfidf import (
+    TfidfModel,
+    calc_tfidf_pair,
+    fit_tfidf_model,
+    load_tfidf_model,
+    save_tfidf_model,
+    tfidf_model_lock,
+    top_k_similar,
+)
 from similarity.apps import logger
 
 KNOWN_SIMILARITIES = {"postgres_rank", "postgres_trigram_rank", "tfidf_rank"}
 SIMILARITY_THRESHOLD = 0.2
+SIMILARITY_TOP_K = 20
+SIMILARITY_CANDIDATES = 100
+BATCH_SIZE = 1000
+
+
+def _pair_key(q1_id: int, q2_id: int) -> tuple[int, int]:
+    return (q1_id, q2_id) if q1_id < q2_id else (q2_id, q1_id)
 
 
-def _upsert_similarity(q1: Question, q2: Question, **kwargs):
+def _upsert_similarities(similarities: dict[tuple[int, int], dict[str, Optional[float]]]) -> None:
     """
-    Create or update a new Similarity object with
+    Create or update Similarity objects in bulk, similarities with a low rank are deleted.
+    :param similarities: similarity values (i.e., tfidf_rank=0.3) by pair of question ids,
+                         values that are None are not updated
     """
-    similarities = kwargs
-    if len(similarities.keys()) == 0:
-        logger.warning("No similarities were given, give one of " + ", ".join(KNOWN_SIMILARITIES))
+    updates = dict()
+    for pair, values in similarities.items():
+        unknown = set(values.keys()) - KNOWN_SIMILARITIES
+        if len(values) == 0 or unknown:
+            logger.warning(f"Bad similarities {values}, give one of " + ", ".join(KNOWN_SIMILARITIES))
+            continue
+        updates[_pair_key(*pair)] = {k: v for k, v in values.items() if v is not None}
+    question_ids = {question_id for pair in updates.keys() for question_id in pair}
+    existing_question_ids = set(Question.objects.filter(id__in=question_ids).values_list("id", flat=True))
+    if existing_question_ids != question_ids:
+        # Similarities of questions deleted since they were ranked
+        logger.debug(f"Skipping similarities of deleted questions {question_ids - existing_question_ids}")
+        updates = {pair: values for pair, values in updates.items() if set(pair) <= existing_question_ids}
+    if len(updates) == 0:
         return
-    remove_keys = []
-    for k, v in similarities.items():
-        if v is None:
-            remove_keys.append(k)
-        if k not in KNOWN_SIMILARITIES:
-            logger.warning(f"{k} not in known similarities ({', '.join(KNOWN_SIMILARITIES)})")
-            return
-    for k in remove_keys:
-        similarities.pop(k)
-    sim = models.PostSimilarity.objects.filter(Q(question1=q1, question2=q2) | Q(question1=q2, question2=q1)).first()
-    if sim is None:
-        sim = models.PostSimilarity.objects.create(
-            question1=q1,
-            question2=q2,
-            rank=0,
-            tfidf_rank=0,
-            postgres_rank=0,
-            postgres_trigram_rank=0,
+    existing = {
+        _pair_key(sim.question1_id, sim.question2_id): sim
+        for sim in models.PostSimilarity.objects.filter(
+            Q(question1_id__in=question_ids) & Q(question2_id__in=question_ids)
+        )
+    }
+    now = timezone.now()
+    to_create, to_update, to_delete = list(), list(), list()
+    for (q1_id, q2_id), values in updates.items():
+        sim = existing.get((q1_id, q2_id))
+        if sim is None:
+            sim = models.PostSimilarity(
+                question1_id=q1_id,
+                question2_id=q2_id,
+                tfidf_rank=0,
+                postgres_rank=0,
+                postgres_trigram_rank=0,
+            )
+            to_create.append(sim)
+        else:
+            to_update.append(sim)
+        for k, v in values.items():
+            setattr(sim, k, v)
+        sim.rank = (float(sim.tfidf_rank) + float(sim.postgres_rank)) / 2
+        sim.updated_at = now
+        if sim.rank < SIMILARITY_THRESHOLD:
+            to_delete.append(sim)
+    logger.debug(f"Similarities: {len(to_create)} new, {len(to_update)} updated, {len(to_delete)} with low similarity")
+    to_create = [sim for sim in to_create if sim.rank >= SIMILARITY_THRESHOLD]
+    to_update = [sim for sim in to_update if sim.rank >= SIMILARITY_THRESHOLD]
+    models.PostSimilarity.objects.filter(id__in=[sim.id for sim in to_delete if sim.id is not None]).delete()
+    models.PostSimilarity.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+    models.PostSimilarity.objects.bulk_update(
+        to_update, [*KNOWN_SIMILARITIES, "rank", "updated_at"], batch_size=BATCH_SIZE
+    )
+    models.SimilarQuestion.update_ranks(
+        {
+            (sim.question1_id, sim.question2_id): (sim.rank if sim.rank >= SIMILARITY_THRESHOLD else None)
+            for sim in (*to_create, *to_update, *to_delete)
+        }
+    )
+
+
+def _prune_similarities(question_ids: Optional[list[int]] = None) -> int:
+    """Delete similarities of pairs that are not among the most similar questions of either question,
+    so the similarities table grows linearly with the number of questions.
+    :param question_ids: prune only pairs of these questions, all pairs if None
+    :returns: number of similarities deleted
+    """
+    similarity_qs = models.PostSimilarity.objects.exclude(
+        Exists(
+            models.SimilarQuestion.objects.filter(
+                question_id=OuterRef("question1_id"), similar_id=OuterRef("question2_id")
+            )
+        )
+    ).exclude(
+        Exists(
+            models.SimilarQuestion.objects.filter(
+                question_id=OuterRef("question2_id"), similar_id=OuterRef("question1_id")
+            )
+        )
+    )
+    if question_ids is not None:
+        similarity_qs = similarity_qs.filter(Q(question1_id__in=question_ids) | Q(question2_id__in=question_ids))
+    count, _ = similarity_qs.delete()
+    return count
+
+
+def _question_document(q: Question) -> str:
+    return thread_markdown_bytesio(q, include_authors=False).getvalue().decode("utf8")
+
+
+def _questions_documents(question_qs) -> tuple[list[Question], list[str]]:
+    """Render every question thread (without authors) as a document for TF-IDF"""
+    questions = list(question_qs.prefetch_related("tags"))
+    return questions, [_question_document(q) for q in questions]
+
+
+@job()
+def refit_tfidf_model() -> Optional[TfidfModel]:
+    """Fit the TF-IDF model over all posts and save it for the similarity jobs"""
+    with tfidf_model_lock(settings.SIMILARITY_MODEL_PATH):
+        return _refit_tfidf_model()
+
+
+def _refit_tfidf_model() -> Optional[TfidfModel]:
+    questions, docs = _questions_documents(Question.objects.order_by("id"))
+    if len(docs) == 0:
+        return None
+    try:
+        model = fit_tfidf_model(docs, [q.id for q in questions])
+    except ValueError as e:
+        logger.warning(f"Could not fit TF-IDF model: {e}")
+        return None
+    save_tfidf_model(model, settings.SIMILARITY_MODEL_PATH)
+    logger.info(f"Fitted TF-IDF model over {len(docs)} posts")
+    return model
+
+
+def _changed_questions(since: datetime):
+    """Questions whose thread (question or any answer) changed since a timestamp"""
+    return (
+        Question.objects.filter(Q(updated_at__gte=since) | Q(answer__updated_at__gte=since)).distinct().order_by("id")
+    )
+
+
+@job()
+def calculate_tfidf(top_k: int = SIMILARITY_TOP_K, since: Optional[datetime] = None, workers: int = 1) -> list[int]:
+    """Calculate the TF-IDF similarity of questions with their most similar questions.
+    :param top_k: number of most similar questions to keep per question
+    :param since: recalculate only questions changed since, using the saved model.
+                  If None, the model is refitted and all questions are recalculated.
+    :param workers: number of processes calculating the similarity matrix
+    :returns: ids of questions whose similarities were calculated
+    """
+    with tfidf_model_lock(settings.SIMILARITY_MODEL_PATH):
+        model = None
+        if since is not None:
+            model = load_tfidf_model(settings.SIMILARITY_MODEL_PATH)
+        if model is None:
+            model = _refit_tfidf_model()
+            question_ids = None if model is None else list(model.question_ids)
+        else:
+            questions, docs = _questions_documents(_changed_questions(since))
+            question_ids = [q.id for q in questions]
+            deleted_ids = set(model.question_ids) - set(Question.objects.values_list("id", flat=True))
+            if len(deleted_ids) > 0:
+                model.remove_documents(deleted_ids)
+            if len(docs) > 0:
+                model.set_documents(question_ids, model.vectorizer.transform(docs))
+            if len(deleted_ids) > 0 or len(docs) > 0:
+                save_tfidf_model(model, settings.SIMILARITY_MODEL_PATH)
+    if model is None or len(model.question_ids) < 2 or len(question_ids) == 0:
+        return list()
+    index = {question_id: i for i, question_id in enumerate(model.question_ids)}
+    similarities = dict()
+    for i, j, similarity in top_k_similar(
+        model.matrix, top_k, rows=[index[question_id] for question_id in question_ids], workers=workers
+    ):
+        similarities[_pair_key(model.question_ids[i], model.question_ids[j])] = dict(tfidf_rank=similarity)
+    _upsert_similarities(similarities)
+    _prune_similarities(None if since is None else question_ids)
+    logger.info(f"Calculated TF-IDF similarities of {len(question_ids)} questions")
+    return question_ids
+
+
+def _postgres_similarities(q: Question, tfidf_ranks: dict[int, float]) -> dict[tuple[int, int], dict[str, float]]:
+    """Rank candidates similar to a question using postgres full text search and trigram similarity,
+    in addition to the most similar candidates by TF-IDF.
+    """
+    tfidf_ranks = {k: v for k, v in tfidf_ranks.items() if k != q.id}
+    tfidf_ranks = dict(heapq.nlargest(SIMILARITY_CANDIDATES, tfidf_ranks.items(), key=lambda item: item[1]))
+    candidates_qs = Question.objects.exclude(id=q.id)
+    fts_ranks = algo.postgres_search_ranks(q.title, candidates_qs, limit=SIMILARITY_CANDIDATES)
+    trigram_ranks = algo.postgres_trigram_ranks(q.title, candidates_qs, limit=SIMILARITY_CANDIDATES)
+    return {
+        (q.id, q2_id): dict(
+            tfidf_rank=tfidf_ranks.get(q2_id, 0),
+            postgres_rank=fts_ranks.get(q2_id, 0),
+            postgres_trigram_rank=trigram_ranks.get(q2_id, 0),
         )
-    for k, v in similarities.items():
-        logger.debug(f"Updating similarity {q1.id} <> {q2.id}: {k}={v:5.4}")
-        setattr(sim, k, v)
-    sim.rank = (float(sim.tfidf_rank) + float(sim.postgres_rank)) / 2
-    if sim.rank < SIMILARITY_THRESHOLD:
-        logger.info("Deleting low similarity")
-        sim.delete()
+        for q2_id in tfidf_ranks.keys() | fts_ranks.keys() | trigram_ranks.keys()
+    }
+
+
+def calculate_postgres_similarities(question_ids: list[int]) -> None:
+    """Calculate postgres full text search and trigram similarities of questions with the TF-IDF
+    similarities already calculated.
+    """
+    if settings.DATABASES["default"]["ENGINE"] != "django.db.backends.postgresql":
         return
-    sim.updated_at = timezone.now()
-    sim.save()
-
-
-def calculate_tfidf():
-    docs = list()
-    question_ids = list()
-    question_qs = Question.objects.all()
-    for q in question_qs:
-        q_doc = thread_markdown_bytesio(q, include_authors=False).getvalue().decode("utf8")
-        docs.append(q_doc)
-        question_ids.append(q.id)
-    res = calc_tfidf_multiple_documents(docs)
-    for i in range(len(question_ids)):
-        for j in range(i, len(question_ids)):
-            if i == j:
-                continue
-            q1 = Question.objects.get(id=question_ids[i])
-            q2 = Question.objects.get(id=question_ids[j])
-            _upsert_similarity(q1, q2, tfidf_rank=res[i][j])
+    similarities = dict()
+    for q in Question.objects.filter(id__in=question_ids).order_by("id"):
+        tfidf_ranks = {
+            (sim.question2_id if sim.question1_id == q.id else sim.question1_id): float(sim.tfidf_rank)
+            for sim in models.PostSimilarity.objects.filter(Q(question1=q) | Q(question2=q))
+        }
+        for pair, values in _postgres_similarities(q, tfidf_ranks).items():
+            similarities[_pair_key(*pair)] = values
+    _upsert_similarities(similarities)
+    _prune_similarities(question_ids)
 
 
 @job()
 def calculate_similarity_for_question(q: Question) -> None:
+    """Rank the questions similar to a new question against the saved model, without changing the model.
+    The question is added to the model by the periodic `calculate_tfidf`.
+    """
     if settings.DATABASES["default"]["ENGINE"] != "django.db.backends.postgresql":
         return
-    question_qs = Question.objects.exclude(id=q.id)
-    for q2 in question_qs:
-        calculate_similarity_for_pair(q, q2)
+    model = load_tfidf_model(settings.SIMILARITY_MODEL_PATH)
+    tfidf_ranks = dict()
+    if model is not None:
+        # The model may still have questions deleted since it was saved
+        existing_question_ids = set(Question.objects.values_list("id", flat=True))
+        tfidf_ranks = {
+            question_id: rank
+            for question_id, rank in model.similarities(model.transform(_question_document(q))).items()
+            if question_id in existing_question_ids
+        }
+    _upsert_similarities(_postgres_similarities(q, tfidf_ranks))
+    _prune_similarities([q.id])
 
 
 @job()
@@ -85,19 +263,21 @@ def calculate_similarity_for_pair(q1: Question, q2: Question) -> None:
     if q1 == q2:
         logger.debug("Not calculating similarity for same question")
         return
-    q1, q1 = (q1, q2) if q1.id < q2.id else (q2, q1)
+    q1, q2 = (q1, q2) if q1.id < q2.id else (q2, q1)
     q1_str = thread_markdown_bytesio(q1).getvalue().decode("utf8")
     q2_str = thread_markdown_bytesio(q2).getvalue().decode("utf8")
-    tfidf = calc_tfidf_pair(q1_str, q2_str)
+    tfidf = calc_tfidf_pair(q1_str, q2_str, load_tfidf_model(settings.SIMILARITY_MODEL_PATH))
     fts_rank, trigram_rank = None, None
     if settings.DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
         fts_rank = algo.postgres_search_rank(q1.title, q2)
         trigram_rank = algo.postgres_trigram_rank(q1.title, q2)
 
-    _upsert_similarity(
-        q1,
-        q2,
-        postgres_rank=fts_rank,
-        postgres_trigram_rank=trigram_rank,
-        tfidf_rank=tfidf,
+    _upsert_similarities(
+        {
+            (q1.id, q2.id): dict(
+                postgres_rank=fts_rank,
+                postgres_trigram_rank=trigram_rank,
+                tfidf_rank=tfidf,
+            )
+        }
     )
@@ -1,19 +1,34 @@
-from django.core.management.base import BaseCommand
+from datetime import datetime
 
-from forum.models import Question
-from similarity.calculate_similarity_job import calculate_similarity_for_pair
+from django.utils import timezone
 
+from similarity.calculate_similarity_job import calculate_postgres_similarities, calculate_tfidf
+from wiwik_lib.utils import ManagementCommand
 
-class Command(BaseCommand):
+
+def _timestamp(value: str) -> datetime:
+    res = datetime.fromisoformat(value)
+    return timezone.make_aware(res) if timezone.is_naive(res) else res
+
+
+class Command(ManagementCommand):
     help = "Calculate similarities between all different questions"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of processes calculating the similarity matrix",
+        )
+        parser.add_argument(
+            "--since",
+            type=_timestamp,
+            default=None,
+            help="Recalculate only questions changed since an ISO timestamp, e.g., 2024-01-31T12:00",
+        )
+
     def handle(self, *args, **options):
-        question_qs = Question.objects.all().order_by("id")
-        # calculate_tfidf()
-        for q1 in question_qs:
-            newer_questions_qs = Question.objects.filter(id__gt=q1.id)
-            for q2 in newer_questions_qs:
-                # sim1 = sentence_similarity(q1.title, q2.title, False)
-                # sim2 = sentence_similarity(q1.title, q2.title, True)
-                # print("---%s\n---%s\n---%.3f\t%.3f\n" % (q1.title, q2.title, sim1, sim2))
-                calculate_similarity_for_pair(q1, q2)
+        question_ids = calculate_tfidf(since=options["since"], workers=options["workers"])
+        calculate_postgres_similarities(question_ids)
+        self.print(f"Calculated similarities for {len(question_ids)} questions")
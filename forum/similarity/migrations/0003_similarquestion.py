@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("forum", "0016_alter_voteactivity_type"),
+        ("similarity", "0002_alter_postsimilarity_options"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SimilarQuestion",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("rank", models.DecimalField(decimal_places=4, help_text="Calculated rank", max_digits=5)),
+                (
+                    "question",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="+", to="forum.question"
+                    ),
+                ),
+                (
+                    "similar",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="+", to="forum.question"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Similar Questions",
+                "indexes": [models.Index(fields=["question", "-rank"], name="similarity__questio_6dd0f8_idx")],
+                "constraints": [
+                    models.UniqueConstraint(fields=("question", "similar"), name="unique_similar_question")
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+import heapq
+from collections import defaultdict
+
+from django.db import migrations
+
+MAX_PER_QUESTION = 10
+
+
+def populate_similar_questions(apps, schema_editor):
+    PostSimilarity = apps.get_model("similarity", "PostSimilarity")
+    SimilarQuestion = apps.get_model("similarity", "SimilarQuestion")
+    ranks = defaultdict(dict)
+    for q1_id, q2_id, rank in PostSimilarity.objects.values_list("question1_id", "question2_id", "rank").iterator():
+        ranks[q1_id][q2_id] = max(rank, ranks[q1_id].get(q2_id, rank))
+        ranks[q2_id][q1_id] = max(rank, ranks[q2_id].get(q1_id, rank))
+    to_create = list()
+    for question_id, similar in ranks.items():
+        best = heapq.nlargest(MAX_PER_QUESTION, similar.items(), key=lambda item: item[1])
+        to_create.extend(
+            SimilarQuestion(question_id=question_id, similar_id=similar_id, rank=rank) for similar_id, rank in best
+        )
+    SimilarQuestion.objects.all().delete()
+    SimilarQuestion.objects.bulk_create(to_create, batch_size=1000)
+
+
+def do_nothing(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("similarity", "0003_similarquestion"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_similar_questions, do_nothing),
+    ]
@@ -1,4 +1,8 @@
-from django.db import models
+import heapq
+from collections import defaultdict
+from typing import Optional
+
+from django.db import models, transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
@@ -31,6 +35,60 @@ class PostSimilarity(models.Model):
         )
 
 
+class SimilarQuestion(models.Model):
+    """The most similar questions of a question, at most MAX_PER_QUESTION rows per question.
+    Both directions of a similarity are stored, so related questions are a single indexed lookup.
+    """
+
+    MAX_PER_QUESTION = 10
+
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name="+")
+    similar = models.ForeignKey(Question, on_delete=models.CASCADE, related_name="+")
+    rank = models.DecimalField(max_digits=5, decimal_places=4, help_text="Calculated rank")
+
+    class Meta:
+        verbose_name_plural = "Similar Questions"
+        constraints = [
+            models.UniqueConstraint(fields=["question", "similar"], name="unique_similar_question"),
+        ]
+        indexes = [
+            models.Index(fields=["question", "-rank"]),
+        ]
+
+    def __str__(self):
+        return f"SimilarQuestion {self.question_id}->{self.similar_id}={self.rank}"
+
+    @classmethod
+    def update_ranks(cls, ranks: dict[tuple[int, int], Optional[float]]) -> None:
+        """Merge new similarity ranks into the most similar questions of both questions of every pair.
+        :param ranks: rank by pair of question ids, None if the pair is no longer similar
+        """
+        candidates = defaultdict(dict)
+        for (q1_id, q2_id), rank in ranks.items():
+            candidates[q1_id][q2_id] = rank
+            candidates[q2_id][q1_id] = rank
+        current = defaultdict(dict)
+        for question_id, similar_id, rank in cls.objects.filter(question_id__in=candidates.keys()).values_list(
+            "question_id", "similar_id", "rank"
+        ):
+            current[question_id][similar_id] = float(rank)
+        changed, to_create = list(), list()
+        for question_id, new_ranks in candidates.items():
+            merged = {**current[question_id], **new_ranks}
+            best = heapq.nlargest(
+                cls.MAX_PER_QUESTION,
+                ((similar_id, rank) for similar_id, rank in merged.items() if rank is not None),
+                key=lambda item: item[1],
+            )
+            if dict(best) == current[question_id]:
+                continue
+            changed.append(question_id)
+            to_create.extend(cls(question_id=question_id, similar_id=s, rank=rank) for s, rank in best)
+        with transaction.atomic():
+            cls.objects.filter(question_id__in=changed).delete()
+            cls.objects.bulk_create(to_create, batch_size=1000, ignore_conflicts=True)
+
+
 @receiver(post_save, sender=Question)
 def calc_similarity_signal(sender, instance, created, **kwargs):
     if created:
@@ -1,24 +1,38 @@
+import importlib
+import os
+import tempfile
+from decimal import Decimal
 from io import StringIO
-from unittest.mock import MagicMock, call
+from unittest import mock
 
+from django.apps import apps as django_apps
 from django.conf import settings
 from django.core.management import call_command
 from django.test import Client
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 
 from forum.models import Question
 from forum.views import utils
 from similarity import algo, models
 from similarity.calculate_similarity_job import (
+    _upsert_similarities,
     calculate_similarity_for_question,
     calculate_tfidf,
+    refit_tfidf_model,
 )
-from similarity.models import PostSimilarity
+from similarity.algo import tfidf
+from similarity.algo.tfidf import fit_tfidf_model, top_k_similar, load_tfidf_model, save_tfidf_model
+from similarity.models import PostSimilarity, SimilarQuestion
 from similarity.views import most_similar_questions_by_postgres_rank
 from userauth.models import ForumUser
 
 
+TEST_MODEL_PATH = os.path.join(tempfile.gettempdir(), "wiwik-test-similarity-model.joblib")
+
+
+@override_settings(SIMILARITY_MODEL_PATH=TEST_MODEL_PATH)
 class TestBase(TestCase):
     usernames = [
         "myuser_name1",
@@ -44,6 +58,11 @@ class TestBase(TestCase):
     def setUp(self) -> None:
         self.client = Client()
 
+    def tearDown(self) -> None:
+        super().tearDown()
+        if os.path.exists(TEST_MODEL_PATH):
+            os.remove(TEST_MODEL_PATH)
+
 
 class TestSimilarity(TestBase):
     def test_admin_similarity_change_list__green(self):
@@ -91,38 +110,78 @@ class TestSimilarity(TestBase):
         self.assertContains(res, sim.__str__())
 
     def test_get_similarity(self):
-        for q1 in self.questions:
-            for q2 in self.questions:
-                if q1.id < q2.id:
-                    PostSimilarity.objects.create(
-                        question1=q1,
-                        question2=q2,
-                        rank=0,
-                        tfidf_rank=0.1,
-                        postgres_rank=0.9,
-                        postgres_trigram_rank=0.5,
-                    )
+        SimilarQuestion.update_ranks(
+            {(q1.id, q2.id): 0.5 for q1 in self.questions for q2 in self.questions if q1.id < q2.id}
+        )
         # act
         res = most_similar_questions_by_postgres_rank(self.questions[0], count=2)
         # assert
         self.assertEqual(2, len(res))
         self.assertNotIn(self.questions[0], res)
 
-    def test_calculate_similarity_pair__green(self):
+    def test_similar_question_update_ranks__bounded_per_question(self):
+        q1, q2, q3 = self.questions
+        # act
+        with mock.patch.object(SimilarQuestion, "MAX_PER_QUESTION", 1):
+            SimilarQuestion.update_ranks({(q1.id, q2.id): 0.3, (q1.id, q3.id): 0.6})
+            SimilarQuestion.update_ranks({(q2.id, q3.id): 0.4})
+        # assert
+        self.assertEqual(
+            [(q1.id, q3.id), (q2.id, q3.id), (q3.id, q1.id)],
+            list(SimilarQuestion.objects.order_by("question_id").values_list("question_id", "similar_id")),
+        )
+
+    def test_populate_similar_questions_migration__built_from_similarities(self):
+        q1, q2, q3 = self.questions
+        for qa, qb, rank in [(q1, q2, 0.5), (q1, q3, 0.3)]:
+            PostSimilarity.objects.create(
+                question1=qa, question2=qb, rank=rank, tfidf_rank=rank, postgres_rank=0, postgres_trigram_rank=0
+            )
+        migration = importlib.import_module("similarity.migrations.0004_populate_similarquestion")
+        # act
+        with mock.patch.object(migration, "MAX_PER_QUESTION", 1):
+            migration.populate_similar_questions(django_apps, None)
+        # assert
+        self.assertEqual(
+            [(q1.id, q2.id), (q2.id, q1.id), (q3.id, q1.id)],
+            list(SimilarQuestion.objects.order_by("question_id").values_list("question_id", "similar_id")),
+        )
+
+    def test_similar_question_update_ranks__no_longer_similar__removed(self):
+        q1, q2, _ = self.questions
+        SimilarQuestion.update_ranks({(q1.id, q2.id): 0.3})
+        # act
+        SimilarQuestion.update_ranks({(q1.id, q2.id): None})
+        # assert
+        self.assertEqual(0, SimilarQuestion.objects.count())
+
+    def test_upsert_similarities__question_deleted__skipped(self):
+        q1, q2, _ = self.questions
+        deleted = utils.create_question(self.users[0], self.question_title, self.question_content, "")
+        deleted_id = deleted.id
+        deleted.delete()
+        # act
+        _upsert_similarities({(q1.id, q2.id): dict(tfidf_rank=0.5), (q1.id, deleted_id): dict(tfidf_rank=0.5)})
+        # assert
+        self.assertEqual([(q1.id, q2.id)], list(PostSimilarity.objects.values_list("question1_id", "question2_id")))
+
+    def test_calculate_similarity_for_question__ranks_all_questions_at_once(self):
         # arrange
-        settings.DATABASES["default"]["ENGINE"] = "django.db.backends.postgresql"
-        algo.postgres_search_rank = MagicMock()
-        algo.postgres_search_rank.side_effect = [0.5, 0.1]
-        algo.postgres_trigram_rank = MagicMock()
-        algo.postgres_trigram_rank.side_effect = [0.5, 0.1]
+        q1, q2, q3 = self.questions
         # act
-        calculate_similarity_for_question(self.questions[0])
+        with (
+            mock.patch.dict(settings.DATABASES["default"], ENGINE="django.db.backends.postgresql"),
+            mock.patch.object(algo, "postgres_search_ranks", return_value={q2.id: 0.5, q3.id: 0.1}) as search_ranks,
+            mock.patch.object(algo, "postgres_trigram_ranks", return_value={q2.id: 0.5}) as trigram_ranks,
+        ):
+            calculate_similarity_for_question(q1)
         # assert
-        calls = []
-        for q in self.questions:
-            if q != self.questions[0]:
-                calls.append(call(self.questions[0].title, q))
-        algo.postgres_search_rank.assert_has_calls(calls, any_order=True)
+        search_ranks.assert_called_once_with(q1.title, mock.ANY, limit=mock.ANY)
+        trigram_ranks.assert_called_once_with(q1.title, mock.ANY, limit=mock.ANY)
+        self.assertEqual({q2.id, q3.id}, set(search_ranks.call_args.args[1].values_list("id", flat=True)))
+        sim = PostSimilarity.objects.get(question1=q1, question2=q2)
+        self.assertEqual(Decimal("0.5"), sim.postgres_rank)
+        self.assertEqual(Decimal("0.5"), sim.postgres_trigram_rank)
 
 
 class TestTfIdf(TestBase):
@@ -133,7 +192,149 @@ class TestTfIdf(TestBase):
         question_count = Question.objects.count()
         self.assertEqual(question_count * (question_count - 1) / 2, PostSimilarity.objects.count())
 
+    def test__tfidf_twice__updates_existing_similarities(self):
+        calculate_tfidf()
+        PostSimilarity.objects.update(tfidf_rank=0.5)
+        # act
+        calculate_tfidf()
+        # assert
+        question_count = Question.objects.count()
+        self.assertEqual(question_count * (question_count - 1) / 2, PostSimilarity.objects.count())
+        self.assertEqual(0, PostSimilarity.objects.filter(tfidf_rank=0.5).count())
+
+    def test__tfidf_top_k__limits_similar_questions(self):
+        # act
+        calculate_tfidf(top_k=1)
+        # assert
+        self.assertGreaterEqual(PostSimilarity.objects.count(), 1)
+        self.assertLess(PostSimilarity.objects.count(), 3)
+
+    def test__tfidf__maintains_similar_questions(self):
+        # act
+        with mock.patch.object(SimilarQuestion, "MAX_PER_QUESTION", 1):
+            calculate_tfidf()
+        # assert
+        self.assertEqual(3, SimilarQuestion.objects.count())
+        self.assertEqual(len(self.questions), SimilarQuestion.objects.values("question_id").distinct().count())
+        # Similarities not among the most similar of either question are pruned
+        self.assertLess(PostSimilarity.objects.count(), 3)
+
+    def test_refit_tfidf_model__saved_with_version(self):
+        # act
+        model = refit_tfidf_model()
+        # assert
+        loaded = load_tfidf_model(TEST_MODEL_PATH)
+        self.assertEqual(sorted(q.id for q in self.questions), sorted(loaded.question_ids))
+        self.assertEqual(tfidf.TFIDF_MODEL_VERSION, loaded.version)
+        self.assertEqual(model.fitted_at, loaded.fitted_at)
+
+    def test_load_tfidf_model__different_version__ignored(self):
+        model = refit_tfidf_model()
+        model.version = tfidf.TFIDF_MODEL_VERSION + 1
+        save_tfidf_model(model, TEST_MODEL_PATH)
+        # act
+        res = load_tfidf_model(TEST_MODEL_PATH)
+        # assert
+        self.assertIsNone(res)
+
+    def test_calculate_similarity_for_question__model_not_changed(self):
+        model = refit_tfidf_model()
+        question_ids = list(model.question_ids)
+        mtime = os.path.getmtime(TEST_MODEL_PATH)
+        q = utils.create_question(self.users[0], self.question_title, self.question_content, "")
+        # act
+        with (
+            mock.patch.dict(settings.DATABASES["default"], ENGINE="django.db.backends.postgresql"),
+            mock.patch.object(algo, "postgres_search_ranks", return_value=dict()),
+            mock.patch.object(algo, "postgres_trigram_ranks", return_value=dict()),
+        ):
+            calculate_similarity_for_question(q)
+        # assert
+        self.assertEqual(mtime, os.path.getmtime(TEST_MODEL_PATH))
+        self.assertEqual(question_ids, load_tfidf_model(TEST_MODEL_PATH).question_ids)
+        self.assertEqual(3, PostSimilarity.objects.filter(question2=q).count())
+
+    def test_calculate_similarity_for_question__question_deleted__not_ranked(self):
+        deleted = utils.create_question(self.users[1], self.question_title, self.question_content, "")
+        deleted_id = deleted.id
+        refit_tfidf_model()
+        deleted.delete()
+        q = utils.create_question(self.users[0], self.question_title, self.question_content, "")
+        # act
+        with (
+            mock.patch.dict(settings.DATABASES["default"], ENGINE="django.db.backends.postgresql"),
+            mock.patch.object(algo, "postgres_search_ranks", return_value=dict()),
+            mock.patch.object(algo, "postgres_trigram_ranks", return_value=dict()),
+        ):
+            calculate_similarity_for_question(q)
+        # assert
+        self.assertEqual(3, PostSimilarity.objects.filter(question2=q).count())
+        self.assertFalse(PostSimilarity.objects.filter(question1_id=deleted_id).exists())
+
+    def test_top_k_similar__green(self):
+        tfidf = fit_tfidf_model(["red apple", "red apple pie", "green tree", "apple tree"], [1, 2, 3, 4]).matrix
+        # act
+        res = list(top_k_similar(tfidf, k=1, chunk_size=3))
+        # assert
+        self.assertEqual(4, len(res))
+        self.assertEqual((0, 1), res[0][:2])
+        self.assertEqual((1, 0), res[1][:2])
+        self.assertTrue(all(row != other for row, other, _ in res))
+
+    def test_top_k_similar__workers__same_as_single_process(self):
+        tfidf = fit_tfidf_model(["red apple", "red apple pie", "green tree", "apple tree"], [1, 2, 3, 4]).matrix
+        # act
+        res = list(top_k_similar(tfidf, k=2, chunk_size=1, workers=2))
+        # assert
+        self.assertEqual(list(top_k_similar(tfidf, k=2)), res)
+
+    def test_top_k_similar__rows__only_given_rows(self):
+        tfidf = fit_tfidf_model(["red apple", "red apple pie", "green tree", "apple tree"], [1, 2, 3, 4]).matrix
+        # act
+        res = list(top_k_similar(tfidf, k=1, rows=[3]))
+        # assert
+        self.assertEqual(1, len(res))
+        self.assertEqual(3, res[0][0])
+
+    def test__tfidf_since__only_changed_questions_without_refit(self):
+        model = refit_tfidf_model()
+        since = timezone.now()
+        q = utils.create_question(self.users[0], self.question_title, self.question_content, "")
+        # act
+        res = calculate_tfidf(since=since)
+        # assert
+        self.assertEqual([q.id], res)
+        model_after = load_tfidf_model(TEST_MODEL_PATH)
+        self.assertEqual(model.fitted_at, model_after.fitted_at)
+        self.assertEqual(len(model_after.question_ids), model_after.matrix.shape[0])
+        self.assertIn(q.id, model_after.question_ids)
+        self.assertEqual(3, PostSimilarity.objects.filter(question2=q).count())
+        self.assertEqual(0, PostSimilarity.objects.exclude(question2=q).count())
+
+    def test__tfidf_since__question_deleted__removed_from_model(self):
+        deleted = utils.create_question(self.users[1], self.question_title, self.question_content, "")
+        deleted_id = deleted.id
+        refit_tfidf_model()
+        since = timezone.now()
+        deleted.delete()
+        q = utils.create_question(self.users[0], self.question_title, self.question_content, "")
+        # act
+        calculate_tfidf(since=since)
+        # assert
+        model_after = load_tfidf_model(TEST_MODEL_PATH)
+        self.assertNotIn(deleted_id, model_after.question_ids)
+        self.assertEqual(len(model_after.question_ids), model_after.matrix.shape[0])
+        self.assertEqual(3, PostSimilarity.objects.filter(question2=q).count())
+        self.assertFalse(SimilarQuestion.objects.filter(similar_id=deleted_id).exists())
+
+    def test__tfidf_since__no_saved_model__all_questions(self):
+        # act
+        res = calculate_tfidf(since=timezone.now())
+        # assert
+        self.assertEqual(sorted(q.id for q in self.questions), sorted(res))
+
 
+@override_settings(SIMILARITY_MODEL_PATH=TEST_MODEL_PATH)
 class TestCalculateSimilarities(TestCase):
     usernames = [
         "myuser_name1",
@@ -170,5 +371,22 @@ class TestCalculateSimilarities(TestCase):
         # act
         out = self.call_command()
         # assert
-        self.assertEqual("", out)
+        self.assertEqual("Calculated similarities for 2 questions\n", out)
+        self.assertEqual(1, models.PostSimilarity.objects.count())
+
+    def test__workers__green(self):
+        # act
+        self.call_command("--workers", "2")
+        # assert
+        self.assertEqual(1, models.PostSimilarity.objects.count())
+
+    def test__since__only_changed_questions(self):
+        self.call_command()
+        models.PostSimilarity.objects.all().delete()
+        since = timezone.now()
+        utils.create_answer("my_answer_content", self.users[0], self.questions[0])
+        # act
+        out = self.call_command("--since", since.isoformat())
+        # assert
+        self.assertEqual("Calculated similarities for 1 questions\n", out)
         self.assertEqual(1, models.PostSimilarity.objects.count())
@@ -1 +1 @@
-from .tag_stats import update_tag_stats
+from .tag_stats import update_tag_stats, mark_tags_dirty, refresh_dirty_tags_stats
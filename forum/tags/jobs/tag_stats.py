@@ -3,10 +3,35 @@ from scheduler import job
 from tags import utils
 from tags.apps import logger
 from tags.models import Tag
+from wiwik_lib.write_behind import WriteBehindBuffer
+
+DIRTY_TAGS_BUFFER = WriteBehindBuffer("dirty-tags")
 
 
 @job()
 def update_tag_stats():
     logger.info("Updating all tag stats")
-    for tag in Tag.objects.all():
-        utils.update_tag_stats_for_tag(tag)
+    utils.rebuild_tags_cooccurrence()
+    utils.update_tags_stats()
+
+
+def mark_tags_dirty(*tag_ids: int) -> None:
+    """Mark tags whose stats should be recalculated, the stats are updated by `refresh_dirty_tags_stats`.
+    Tags marked several times before a refresh are recalculated once.
+    """
+    if not DIRTY_TAGS_BUFFER.add(*map(str, tag_ids)):
+        utils.update_tags_stats(list(Tag.objects.filter(id__in=tag_ids)))
+        return
+    if DIRTY_TAGS_BUFFER.is_local:
+        refresh_dirty_tags_stats()
+
+
+@job()
+def refresh_dirty_tags_stats() -> int:
+    """Recalculate stats of tags marked dirty since the last refresh.
+    :returns: number of tags updated
+    """
+    tag_ids = [int(member) for member in DIRTY_TAGS_BUFFER.drain()]
+    if len(tag_ids) == 0:
+        return 0
+    return utils.update_tags_stats(list(Tag.objects.filter(id__in=tag_ids)))
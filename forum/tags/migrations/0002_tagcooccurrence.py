@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:40
+
+import django.db.models.deletion
+from collections import Counter
+from itertools import permutations
+
+from django.db import migrations, models
+
+
+def calculate_tags_cooccurrence(apps, schema_editor):
+    Question = apps.get_model("forum", "Question")
+    TagCooccurrence = apps.get_model("tags", "TagCooccurrence")
+    question_tags = dict()
+    for question_id, tag_id in Question.tags.through.objects.values_list("question_id", "tag_id"):
+        question_tags.setdefault(question_id, list()).append(tag_id)
+    counts = Counter(pair for tag_ids in question_tags.values() for pair in permutations(tag_ids, 2))
+    TagCooccurrence.objects.bulk_create(
+        [
+            TagCooccurrence(tag_id=tag_id, other_id=other_id, count=count)
+            for (tag_id, other_id), count in counts.items()
+        ],
+        batch_size=1000,
+    )
+
+
+def do_nothing(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("forum", "0016_alter_voteactivity_type"),
+        ("tags", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TagCooccurrence",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "count",
+                    models.PositiveIntegerField(default=0, help_text="Number of questions tagged with both tags"),
+                ),
+                (
+                    "other",
+                    models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="tags.tag"),
+                ),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="cooccurrences", to="tags.tag"
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [models.Index(fields=["tag", "-count"], name="tags_tagcoo_tag_id_f1eb38_idx")],
+                "constraints": [models.UniqueConstraint(fields=("tag", "other"), name="unique_tag_cooccurrence")],
+            },
+        ),
+        migrations.RunPython(calculate_tags_cooccurrence, do_nothing),
+    ]
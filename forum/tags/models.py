@@ -1,5 +1,8 @@
+from typing import Iterable
+
 from django.conf import settings
 from django.db import models
+from django.db.models import F, Q
 
 from userauth.models import ForumUser
 from wiwik_lib.models import Flaggable, Editable, Followable
@@ -68,8 +71,8 @@ class Tag(Flaggable, Editable, Followable):
             f"Tag[{self.tag_word};"
             f"#Qs={self.number_of_questions};#Qs/week={self.number_asked_this_week};"
             f"#Qs/day={self.number_asked_today};#followers={self.number_followers};"
-            f'related={self.related or ""};'
-            f'experts={self.experts or ""};stars={self.stars or ""};]'
+            f"related={self.related or ''};"
+            f"experts={self.experts or ''};stars={self.stars or ''};]"
         )
 
     def experts_list(self):
@@ -137,3 +140,61 @@ class Synonym(models.Model):
 
     def __str__(self):
         return f"Synonym[{self.name} tag_word={self.tag.tag_word} at={self.created_at}]"
+
+
+class TagCooccurrence(models.Model):
+    """Number of questions tagged with both tags, i.e., a sparse tag-by-tag co-occurrence matrix.
+    Both (tag, other) and (other, tag) are stored, so tags related to a tag are read with a single indexed query.
+    """
+
+    RELATED_TAGS_COUNT = 3
+
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="cooccurrences")
+    other = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="+")
+    count = models.PositiveIntegerField(default=0, help_text="Number of questions tagged with both tags")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["tag", "other"], name="unique_tag_cooccurrence"),
+        ]
+        indexes = [
+            models.Index(fields=["tag", "-count"]),
+        ]
+
+    def __str__(self):
+        return f"TagCooccurrence[{self.tag_id},{self.other_id}:{self.count}]"
+
+    @classmethod
+    def change(cls, tag_ids: Iterable[int], other_ids: Iterable[int], change: int) -> None:
+        """Change the co-occurrence of every tag in `tag_ids` with every other tag in `other_ids`,
+        and update the related tags of the tags changed.
+        :param tag_ids: tags added to/removed from a question
+        :param other_ids: tags of the question
+        :param change: number of questions to add to the co-occurrence count (negative to remove)
+        """
+        other_ids = set(other_ids)
+        pairs = {(a, b) for a in tag_ids for b in other_ids if a != b}
+        pairs |= {(b, a) for a, b in pairs}
+        if len(pairs) == 0 or change == 0:
+            return
+        pairs_q = Q()
+        for a, b in pairs:
+            pairs_q |= Q(tag_id=a, other_id=b)
+        if change > 0:
+            cls.objects.bulk_create([cls(tag_id=a, other_id=b) for a, b in pairs], ignore_conflicts=True)
+        else:
+            cls.objects.filter(pairs_q, count__lte=-change).delete()
+        cls.objects.filter(pairs_q).update(count=F("count") + change)
+        cls.refresh_related({a for a, _ in pairs})
+
+    @classmethod
+    def refresh_related(cls, tag_ids: Iterable[int]) -> None:
+        """Update the related tags of tags from their most co-occurring tags"""
+        tags = list(Tag.objects.filter(id__in=tag_ids))
+        for tag in tags:
+            tag.related = ",".join(
+                cls.objects.filter(tag=tag)
+                .order_by("-count", "other__tag_word")
+                .values_list("other__tag_word", flat=True)[: cls.RELATED_TAGS_COUNT]
+            )
+        Tag.objects.bulk_update(tags, ["related"])
@@ -65,10 +65,12 @@ class TagsClient(Client):
             follow=True,
         )
 
-    def autocomplete(self, query: str):
-        url = reverse("tags:autocomplete")
+    def autocomplete(self, query: str, tags: str = None):
+        url = reverse("tags:autocomplete") + "?"
         if query is not None:
-            url += "?q=" + query
+            url += f"q={query}&"
+        if tags is not None:
+            url += f"tags={tags}&"
         return self.get(url, follow=True)
 
     def synonyms_list_get(self, query: str = None, page: int = None, order_by: int = None):
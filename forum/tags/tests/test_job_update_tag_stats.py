@@ -1,6 +1,16 @@
+from unittest import mock
+
+import fakeredis
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from forum.views import utils
 from tags import jobs
+from tags.jobs.tag_stats import DIRTY_TAGS_BUFFER
 from tags.models import Tag
 from tags.tests.base import TagsApiTestCase
+from tags.utils import update_tags_stats
+from userauth.models import ForumUser
 
 
 class TestJobUpdateTagStates(TagsApiTestCase):
@@ -13,3 +23,65 @@ class TestJobUpdateTagStates(TagsApiTestCase):
             self.assertEqual(0, tag.number_asked_today)
             self.assertEqual(0, tag.number_of_questions)
             self.assertEqual(0, tag.number_asked_this_week)
+
+    def test_update_tag_stats__questions_followers_experts_related(self):
+        voter = ForumUser.objects.create_user("voter", "voter@a.com", self.password)
+        q1 = utils.create_question(self.user, "title1", "content1", "tag0,tag1")
+        utils.create_question(self.user, "title2", "content2", "tag0,tag1,tag2")
+        utils.create_question(voter, "title3", "content3", "tag0,tag2,tag3")
+        utils.upvote(voter, q1)
+        # act
+        jobs.update_tag_stats()
+        # assert
+        tag0 = Tag.objects.get(tag_word="tag0")
+        self.assertEqual(3, tag0.number_of_questions)
+        self.assertEqual(3, tag0.number_asked_this_week)
+        self.assertEqual(3, tag0.number_asked_today)
+        self.assertEqual(2, tag0.number_followers)
+        self.assertEqual(["tag1", "tag2", "tag3"], tag0.related_tags())
+        self.assertEqual(self.user.username, tag0.experts)
+        self.assertIsNone(tag0.stars)
+        tag3 = Tag.objects.get(tag_word="tag3")
+        self.assertEqual(1, tag3.number_of_questions)
+        self.assertEqual(["tag0", "tag2"], tag3.related_tags())
+        self.assertIsNone(tag3.experts)
+
+    def test_update_tags_stats__number_of_queries_independent_of_tags(self):
+        utils.create_question(self.user, "title0", "content0", "tag0,tag1")
+        with CaptureQueriesContext(connection) as few_tags_queries:
+            update_tags_stats()
+        for i in range(5):
+            utils.create_question(self.user, f"title{i}", f"content{i}", f"tag{i},tag{i + 1},new{i}")
+        # act
+        with CaptureQueriesContext(connection) as queries:
+            update_tags_stats()
+        # assert
+        self.assertEqual(len(few_tags_queries), len(queries))
+
+
+@mock.patch("scheduler.helpers.queues.getters._get_connection", return_value=fakeredis.FakeStrictRedis())
+class TestJobRefreshDirtyTagsStats(TagsApiTestCase):
+    def setUp(self):
+        super().setUp()
+        DIRTY_TAGS_BUFFER.drain()
+
+    def test_answers_burst__tag_stats_refreshed_once(self, conn):
+        q = utils.create_question(self.user, "title1", "content1", "tag0")
+        for i in range(5):
+            utils.create_answer(f"answer content {i}", self.user, q)
+        tag = Tag.objects.get(tag_word="tag0")
+        self.assertEqual(0, tag.number_of_questions)
+        # act
+        with mock.patch("tags.utils.update_tags_stats", wraps=update_tags_stats) as update_mock:
+            res = jobs.refresh_dirty_tags_stats()
+        # assert
+        self.assertEqual(1, res)
+        update_mock.assert_called_once()
+        tag.refresh_from_db()
+        self.assertEqual(1, tag.number_of_questions)
+
+    def test_refresh_dirty_tags_stats__nothing_dirty(self, conn):
+        # act
+        res = jobs.refresh_dirty_tags_stats()
+        # assert
+        self.assertEqual(0, res)
@@ -0,0 +1,71 @@
+import json
+
+from forum.views import utils
+from tags.models import Tag, TagCooccurrence
+from tags.tests.base import TagsApiTestCase
+from tags.utils import rebuild_tags_cooccurrence
+
+
+class TestTagCooccurrence(TagsApiTestCase):
+    def _cooccurrences(self) -> dict:
+        return {
+            (c.tag.tag_word, c.other.tag_word): c.count for c in TagCooccurrence.objects.select_related("tag", "other")
+        }
+
+    def test_create_question__cooccurrences_and_related_tags_updated(self):
+        # act
+        utils.create_question(self.user, "title1", "content1", "tag0,tag1")
+        utils.create_question(self.user, "title2", "content2", "tag0,tag1,tag2")
+        # assert
+        self.assertEqual(
+            {
+                ("tag0", "tag1"): 2,
+                ("tag1", "tag0"): 2,
+                ("tag0", "tag2"): 1,
+                ("tag2", "tag0"): 1,
+                ("tag1", "tag2"): 1,
+                ("tag2", "tag1"): 1,
+            },
+            self._cooccurrences(),
+        )
+        self.assertEqual(["tag1", "tag2"], Tag.objects.get(tag_word="tag0").related_tags())
+
+    def test_update_question__removed_tag__cooccurrences_updated(self):
+        q = utils.create_question(self.user, "title1", "content1", "tag0,tag1,tag2")
+        # act
+        utils.update_question(self.user, q, q.title, q.content, "tag0,tag1")
+        # assert
+        self.assertEqual({("tag0", "tag1"): 1, ("tag1", "tag0"): 1}, self._cooccurrences())
+        self.assertIsNone(Tag.objects.get(tag_word="tag2").related_tags())
+
+    def test_delete_question__cooccurrences_removed(self):
+        utils.create_question(self.user, "title1", "content1", "tag0,tag1")
+        q = utils.create_question(self.user, "title2", "content2", "tag0,tag1,tag2")
+        # act
+        utils.delete_question(q)
+        # assert
+        self.assertEqual({("tag0", "tag1"): 1, ("tag1", "tag0"): 1}, self._cooccurrences())
+
+    def test_rebuild_tags_cooccurrence__same_as_incremental(self):
+        utils.create_question(self.user, "title1", "content1", "tag0,tag1")
+        q = utils.create_question(self.user, "title2", "content2", "tag0,tag1,tag2")
+        utils.update_question(self.user, q, q.title, q.content, "tag0,tag2,tag3")
+        expected = self._cooccurrences()
+        TagCooccurrence.objects.update(count=100)
+        # act
+        res = rebuild_tags_cooccurrence()
+        # assert
+        self.assertEqual(8, res)
+        self.assertEqual(expected, self._cooccurrences())
+
+    def test_autocomplete__selected_tags__related_tags_first(self):
+        utils.create_question(self.user, "title1", "content1", "tag0,tag2")
+        self.client.login(self.username, self.password)
+        # act
+        res = self.client.autocomplete("tag", tags="tag0")
+        # assert
+        self.assertEqual(200, res.status_code)
+        results = json.loads(res.content)["results"]
+        self.assertEqual("tag2", results[0])
+        self.assertNotIn("tag0", results)
+        self.assertIn("tag1", results)
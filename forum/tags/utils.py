@@ -1,13 +1,19 @@
-from collections import Counter
-from typing import List
+import heapq
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 from constance import config
-from django.db.models import Sum
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count, Q, Sum
 from django.utils import timezone
+from scipy import sparse
 
 from forum.models import Question, VoteActivity
 from tags.apps import logger
-from tags.models import Tag
+from tags.models import Tag, TagCooccurrence
+from wiwik_lib.models import Follow
 
 
 def day_beginning(dt=None) -> timezone.datetime:
@@ -43,38 +49,130 @@ def users_with_most_reputation_since(
     return res
 
 
-def update_tag_stats_for_tag(tag: Tag):
-    tag.number_of_questions = Question.objects.filter(tags__tag_word__iexact=tag.tag_word).count()
-
-    seven_days_ago = timezone.now() - timezone.timedelta(days=7)
-    tag.number_asked_this_week = Question.objects.filter(
-        tags__tag_word__iexact=tag.tag_word, created_at__gte=seven_days_ago
-    ).count()
-    begining_of_day = day_beginning()
-    tag.number_asked_today = Question.objects.filter(
-        tags__tag_word__iexact=tag.tag_word, created_at__gte=begining_of_day
-    ).count()
-
-    tag.number_followers = tag.follows.count()
-
-    experts_usernames = users_with_most_reputation_since(tag, count=config.NUMBER_OF_TAG_EXPERTS)
-    tag.experts = ",".join(experts_usernames) if len(experts_usernames) > 0 else None
-
-    stars_usernames = users_with_most_reputation_since(
-        tag,
-        since=timezone.now() - timezone.timedelta(days=30),
-        exclude_usernames=experts_usernames,
-        count=config.NUMBER_OF_TAG_RISING_STARS,
+def _top_per_tag(rows: Iterable[Tuple[int, str, int]], count: int) -> Dict[int, List[str]]:
+    """Get the `count` values with the highest score per tag from rows of (tag_id, value, score)"""
+    by_tag = defaultdict(list)
+    for tag_id, value, score in rows:
+        if tag_id is not None and score is not None:
+            by_tag[tag_id].append((-score, value))
+    return {tag_id: [value for _, value in heapq.nsmallest(count, values)] for tag_id, values in by_tag.items()}
+
+
+def _tag_reputation_rows(tag_ids: Optional[List[int]], since: timezone.datetime = None):
+    qs = VoteActivity.objects.filter(question__isnull=False, target__is_active=True)
+    if tag_ids is not None:
+        qs = qs.filter(question__tags__in=tag_ids)
+    if since is not None:
+        qs = qs.filter(created_at__gte=since)
+    return (
+        qs.order_by()
+        .values("question__tags", "target__username")
+        .annotate(tot=Sum("reputation_change"))
+        .values_list("question__tags", "target__username", "tot")
     )
-    tag.stars = ",".join(stars_usernames) if len(stars_usernames) > 0 else None
-    tag.updated_at = timezone.now()
-
-    # Calculate related tags
-    tag_questions = Question.objects.filter(tags__tag_word__iexact=tag.tag_word)
-    tags = [t.tag_word for q in tag_questions for t in q.tags.all()]
-    tags_counter = Counter(tags)
-    del tags_counter[tag.tag_word]
-    tag.related = ",".join([i[0] for i in tags_counter.most_common(3)])
-
-    tag.save()
-    logger.info(f"Updated {tag}")
+
+
+def update_tags_stats(tags: Optional[List[Tag]] = None, batch_size: int = 1000) -> int:
+    """Calculate the statistics of tags using a few aggregate queries for all tags and save them in bulk:
+    number of questions (total, this week and today), number of followers, experts, rising stars and related tags.
+    :param tags: tags to update, all tags if None
+    :param batch_size: number of tags to write in a single bulk update
+    :returns: number of tags updated
+    """
+    tag_ids = None if tags is None else [tag.id for tag in tags]
+    if tags is None:
+        tags = list(Tag.objects.all())
+    if len(tags) == 0:
+        return 0
+    now = timezone.now()
+    tag_questions_qs = Question.tags.through.objects.order_by()
+    if tag_ids is not None:
+        tag_questions_qs = tag_questions_qs.filter(tag_id__in=tag_ids)
+
+    questions_counts = {
+        row["tag_id"]: row
+        for row in tag_questions_qs.values("tag_id").annotate(
+            total=Count("question_id"),
+            week=Count("question_id", filter=Q(question__created_at__gte=now - timezone.timedelta(days=7))),
+            today=Count("question_id", filter=Q(question__created_at__gte=day_beginning(now))),
+        )
+    }
+
+    followers_qs = Follow.objects.filter(content_type=ContentType.objects.get_for_model(Tag))
+    if tag_ids is not None:
+        followers_qs = followers_qs.filter(object_id__in=tag_ids)
+    followers_counts = dict(
+        followers_qs.order_by().values("object_id").annotate(count=Count("id")).values_list("object_id", "count")
+    )
+
+    experts = _top_per_tag(_tag_reputation_rows(tag_ids), config.NUMBER_OF_TAG_EXPERTS)
+    stars_candidates = defaultdict(list)
+    for tag_id, username, tot in _tag_reputation_rows(tag_ids, since=now - timezone.timedelta(days=30)):
+        if username not in experts.get(tag_id, []):
+            stars_candidates[tag_id].append((tag_id, username, tot))
+    stars = _top_per_tag((row for rows in stars_candidates.values() for row in rows), config.NUMBER_OF_TAG_RISING_STARS)
+
+    cooccurrences_qs = TagCooccurrence.objects.order_by()
+    if tag_ids is not None:
+        cooccurrences_qs = cooccurrences_qs.filter(tag_id__in=tag_ids)
+    related = _top_per_tag(
+        cooccurrences_qs.values_list("tag_id", "other__tag_word", "count"), TagCooccurrence.RELATED_TAGS_COUNT
+    )
+
+    for tag in tags:
+        counts = questions_counts.get(tag.id, dict())
+        tag.number_of_questions = counts.get("total", 0)
+        tag.number_asked_this_week = counts.get("week", 0)
+        tag.number_asked_today = counts.get("today", 0)
+        tag.number_followers = followers_counts.get(tag.id, 0)
+        tag.experts = ",".join(experts.get(tag.id, [])) or None
+        tag.stars = ",".join(stars.get(tag.id, [])) or None
+        tag.related = ",".join(related.get(tag.id, []))
+        tag.updated_at = now
+    Tag.objects.bulk_update(
+        tags,
+        [
+            "number_of_questions",
+            "number_asked_this_week",
+            "number_asked_today",
+            "number_followers",
+            "experts",
+            "stars",
+            "related",
+            "updated_at",
+        ],
+        batch_size=batch_size,
+    )
+    logger.info(f"Updated stats of {len(tags)} tags")
+    return len(tags)
+
+
+def rebuild_tags_cooccurrence(batch_size: int = 1000) -> int:
+    """Rebuild the tag co-occurrence matrix from the tags of all questions.
+    The co-occurrence matrix is the product of the transposed question-by-tag incidence matrix with itself.
+    :param batch_size: number of co-occurrences to write in a single bulk create
+    :returns: number of co-occurrences (pairs of different tags) written
+    """
+    rows = np.array(list(Question.tags.through.objects.values_list("question_id", "tag_id")), dtype=np.int64)
+    cooccurrences = list()
+    if len(rows) > 0:
+        _, question_index = np.unique(rows[:, 0], return_inverse=True)
+        incidence = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int64), (question_index, rows[:, 1])),
+            shape=(question_index.max() + 1, rows[:, 1].max() + 1),
+        )
+        matrix = (incidence.T @ incidence).tocoo()
+        cooccurrences = [
+            TagCooccurrence(tag_id=tag_id, other_id=other_id, count=count)
+            for tag_id, other_id, count in zip(matrix.row.tolist(), matrix.col.tolist(), matrix.data.tolist())
+            if tag_id != other_id
+        ]
+    with transaction.atomic():
+        TagCooccurrence.objects.all().delete()
+        TagCooccurrence.objects.bulk_create(cooccurrences, batch_size=batch_size)
+    logger.info(f"Rebuilt tag co-occurrence matrix with {len(cooccurrences)} pairs")
+    return len(cooccurrences)
+
+
+def update_tag_stats_for_tag(tag: Tag):
+    update_tags_stats([tag])
@@ -104,7 +104,7 @@ def view_approve_synonym(request, synonym_pk: int):
         synonym.active = True
         synonym.approved_by = user
         synonym.save()
-        jobs.start_job(review_bagdes_event, TRIGGER_EVENT_TYPES["Synonym approved"])
+        jobs.start_job(review_bagdes_event, TRIGGER_EVENT_TYPES["Synonym approved"], [synonym.author_id])
     else:
         logger.warning(
             f"user {request.user.username} tried to approve synonym "
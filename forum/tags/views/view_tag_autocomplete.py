@@ -1,14 +1,31 @@
+from typing import List, Optional
+
 from django.contrib.auth.decorators import login_required
+from django.db.models import Sum
 from django.http import JsonResponse
 
 from tags import models
 
 
-def get_tags_matching(query: str):
-    qs = models.Tag.objects.all()
+def get_tags_related_to(tag_words: List[str], query: str = None, count: int = 10) -> List[str]:
+    """Get tags most co-occurring with tags, e.g., to suggest tags for a question with these tags"""
+    qs = models.TagCooccurrence.objects.filter(tag__tag_word__in=tag_words).exclude(other__tag_word__in=tag_words)
+    if query:
+        qs = qs.filter(other__tag_word__icontains=query)
+    return list(
+        qs.values("other__tag_word")
+        .annotate(total=Sum("count"))
+        .order_by("-total", "other__tag_word")
+        .values_list("other__tag_word", flat=True)[:count]
+    )
+
+
+def get_tags_matching(query: str, selected: Optional[List[str]] = None):
+    results = get_tags_related_to(selected, query) if selected else []
+    qs = models.Tag.objects.exclude(tag_word__in=results + (selected or []))
     if query is not None:
         qs = qs.filter(tag_word__icontains=query)
-    results = list(qs.order_by("-number_asked_this_week").values_list("tag_word", flat=True)[:10])
+    results += list(qs.order_by("-number_asked_this_week").values_list("tag_word", flat=True)[: 10 - len(results)])
     if len(results) < 10 and query is not None:
         synonym_list = list(
             models.Synonym.objects.filter(active=True, name__icontains=query)
@@ -24,5 +41,6 @@ def get_tags_matching(query: str):
 @login_required
 def view_tags_autocomplete(request):
     query = request.GET.get("q", None)
-    results = get_tags_matching(query)
+    selected = [tag_word for tag_word in request.GET.get("tags", "").split(",") if tag_word]
+    results = get_tags_matching(query, selected)
     return JsonResponse({"results": results})
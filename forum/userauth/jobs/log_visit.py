@@ -67,4 +67,4 @@ def log_request(
         max_consecutive_days=max_consecutive_days,
         total_days=total_days,
     )
-    jobs.start_job(review_bagdes_event, TRIGGER_EVENT_TYPES["Visit"])
+    jobs.start_job(review_bagdes_event, TRIGGER_EVENT_TYPES["Visit"], [user.id])
@@ -30,8 +30,8 @@ class Command(ManagementCommand):
         req = http.request("GET", picture_url)
         data = ContentFile(req.data)
         file_name = f"profile_pic_{user.username}.google.jpeg"
-        user.profile_pic.save(file_name, data, save=True)
-        user.save()
+        user.profile_pic.save(file_name, data, save=False)
+        user.save(update_fields=["profile_pic"])
         self.print(f"Profile pic for user {user.email} updated")
 
     def handle(self, *args, **options):
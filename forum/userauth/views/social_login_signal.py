@@ -23,12 +23,12 @@ def _populate_user_data_from_social(user: ForumUser, picture_only: bool = False)
         req = http.request("GET", picture_url)
         data = ContentFile(req.data)
         file_name = f"profile_pic_{user.username}.google.jpeg"
-        user.profile_pic.save(file_name, data, save=True)
+        user.profile_pic.save(file_name, data, save=False)
     if not picture_only and "email" in user_data:
         user.email = user_data["email"]
     if not picture_only and "name" in user_data:
         user.name = user_data["name"]
-    user.save()
+    user.save(update_fields=["profile_pic", "email", "name"])
 
 
 @receiver(user_signed_up)
@@ -18,7 +18,7 @@ def view_activate(request, uidb64, token):
         user = None
     if user is not None and account_activation_token.check_token(user, token):
         user.is_active = True
-        user.save()
+        user.save(update_fields=["is_active"])
         login(request, user)
         messages.success(
             request,
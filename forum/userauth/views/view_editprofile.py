@@ -32,9 +32,11 @@ def view_editprofile(request):
             set_val("github_handle", "github_handle", 1, 39)
             set_val("keybase_user", "keybase_user", 1, 16)
             user.email_notifications = data.get("email_notifications") == "on"
-            user.save()
+            user.save(
+                update_fields=["name", "about_me", "title", "github_handle", "keybase_user", "email_notifications"]
+            )
             messages.success(request, "Profile updated successfully")
-            jobs.start_job(review_bagdes_event, TRIGGER_EVENT_TYPES["Edit profile"])
+            jobs.start_job(review_bagdes_event, TRIGGER_EVENT_TYPES["Edit profile"], [user.id])
             return redirect("userauth:profile", username=user.username, tab="questions")
         except SuspiciousOperation as e:
             messages.error(request, e.args[0])
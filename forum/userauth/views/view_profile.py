@@ -1,9 +1,10 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import F, Count
+from django.db.models import F, Sum
 from django.shortcuts import render, redirect
 
+from badges.models import BadgeProgress
 from forum.models import QuestionBookmark, VoteActivity, UserTagStats, Question, Answer
 from userauth.models import ForumUser, UserVisit
 from userauth.views.common import get_request_param
@@ -32,7 +33,7 @@ def get_user_forum_data(seeuser: ForumUser, tab: str, page_number: int):
         "following": Follow.objects.filter(user=seeuser, content_type=question_content_type).count(),
         "reputation": (VoteActivity.objects.filter(target=seeuser, reputation_change__isnull=False).count()),
         "bookmarks": QuestionBookmark.objects.filter(user=seeuser).count(),
-        "badges": (VoteActivity.objects.filter(target=seeuser, badge__isnull=False).count()),
+        "badges": BadgeProgress.objects.filter(user=seeuser).aggregate(total=Sum("count"))["total"] or 0,
     }
 
     if tab == "questions":
@@ -45,14 +46,14 @@ def get_user_forum_data(seeuser: ForumUser, tab: str, page_number: int):
         items = VoteActivity.objects.filter(target=seeuser).order_by("-created_at")
     if tab == "badges":
         items = (
-            VoteActivity.objects.filter(target=seeuser, badge__isnull=False)
+            BadgeProgress.objects.filter(user=seeuser, count__gt=0)
             .values(
+                "count",
                 pk=F("badge__id"),
                 name=F("badge__name"),
                 badge_type=F("badge__type"),
                 description=F("badge__description"),
             )
-            .annotate(count=Count("name"))
             .order_by("name")
         )
     if tab == "following":
@@ -15,7 +15,8 @@ def view_profile_pic(request):
         extension = image_format.split("/")[-1]
         data = ContentFile(base64.b64decode(image_string))
         file_name = f"profile_pic_{user.username}.{extension}"
-        user.profile_pic.save(file_name, data, save=True)
+        user.profile_pic.save(file_name, data, save=False)
+        user.save(update_fields=["profile_pic"])
 
         messages.success(request, "Profile updated successfully")
         return redirect("userauth:profile", username=user.username, tab="questions")
@@ -11,7 +11,7 @@ def view_deactivate_user(request, username: str):
         raise PermissionDenied()
     u = get_object_or_404(ForumUser, username=username)
     u.is_active = False
-    u.save()
+    u.save(update_fields=["is_active"])
     return redirect("userauth:profile", username=u.username, tab="questions")
 
 
@@ -21,5 +21,5 @@ def view_activate_user(request, username: str):
         raise PermissionDenied()
     u = get_object_or_404(ForumUser, username=username)
     u.is_active = True
-    u.save()
+    u.save(update_fields=["is_active"])
     return redirect("userauth:profile", username=u.username, tab="questions")
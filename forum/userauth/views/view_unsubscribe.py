@@ -21,7 +21,7 @@ def view_unsubscribe(request, uidb64, token):
 
     if user is not None and account_activation_token.check_token(user, token):
         user.email_notifications = False
-        user.save()
+        user.save(update_fields=["email_notifications"])
         return redirect("userauth:login")
     else:
         messages.error(request, "Unsubscribe link is invalid!", "danger")
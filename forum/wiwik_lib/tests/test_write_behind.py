@@ -0,0 +1,31 @@
+from unittest import mock
+
+import redis
+from django.test import SimpleTestCase, override_settings
+
+from wiwik_lib.write_behind import WriteBehindBuffer
+
+
+@override_settings(RUN_ASYNC_JOBS_SYNC=False)
+class TestWriteBehindBuffer(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        connection = mock.MagicMock()
+        connection.sadd.side_effect = redis.exceptions.TimeoutError("timeout")
+        connection.pipeline.side_effect = redis.exceptions.TimeoutError("timeout")
+        self.enterContext(
+            mock.patch("wiwik_lib.write_behind.get_queue", return_value=mock.MagicMock(connection=connection))
+        )
+        self.buffer = WriteBehindBuffer("test")
+
+    def test_add__redis_timeout__not_added(self):
+        # act
+        res = self.buffer.add("1")
+        # assert
+        self.assertFalse(res)
+
+    def test_drain__redis_timeout__empty(self):
+        # act
+        res = self.buffer.drain()
+        # assert
+        self.assertEqual(set(), res)
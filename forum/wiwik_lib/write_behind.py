@@ -0,0 +1,59 @@
+import threading
+from typing import Dict, Set
+
+import redis
+from django.conf import settings
+from scheduler.helpers.queues import get_queue
+
+from wiwik_lib.apps import logger
+
+
+class WriteBehindBuffer:
+    """Set of pending writes to be flushed to the database in bulk by a periodic job.
+
+    Pending members are kept in redis so they are shared between web processes and workers.
+    When jobs run synchronously (RUN_ASYNC_JOBS_SYNC) there is no worker, and members are kept in memory.
+    """
+
+    _local_buffers: Dict[str, Set[str]] = dict()
+    _local_lock = threading.Lock()
+
+    def __init__(self, name: str):
+        self.key = f"write-behind:{name}"
+
+    @property
+    def is_local(self) -> bool:
+        return settings.RUN_ASYNC_JOBS_SYNC
+
+    def add(self, *members: str) -> bool:
+        """Add members to the buffer, members already pending are added once.
+
+        :returns: False when the buffer is not available and the caller should write directly.
+        """
+        if not members:
+            return True
+        if self.is_local:
+            with self._local_lock:
+                self._local_buffers.setdefault(self.key, set()).update(members)
+            return True
+        try:
+            get_queue("default").connection.sadd(self.key, *members)
+            return True
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Could not add to write-behind buffer {self.key}: {e}")
+            return False
+
+    def drain(self) -> Set[str]:
+        """Atomically remove and return all pending members"""
+        if self.is_local:
+            with self._local_lock:
+                return self._local_buffers.pop(self.key, set())
+        try:
+            with get_queue("default").connection.pipeline() as pipe:
+                pipe.smembers(self.key)
+                pipe.delete(self.key)
+                members, _ = pipe.execute()
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Could not drain write-behind buffer {self.key}: {e}")
+            return set()
+        return {m.decode() if isinstance(m, bytes) else m for m in members}